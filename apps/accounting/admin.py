@@ -4,7 +4,7 @@ from django.core.exceptions import ValidationError
 
 from apps.accounting.models import CompanyKhaznaTransaction, StationKhaznaTransaction
 from apps.notifications.models import Notification
-from apps.shared.generate_code import generate_unique_code
+from apps.shared.generate_code import REFERENCE_CODES
 from apps.users.models import CompanyUser, StationOwner
 
 
@@ -87,11 +87,8 @@ class CompanyKhaznaTransactionAdmin(admin.ModelAdmin):
     def save_model(self, request, obj, form, change):
         if not obj.pk:  # Only set created_by on creation, not updates
             obj.created_by = request.user
-            obj.reference_code = generate_unique_code(
-                model=CompanyKhaznaTransaction,
-                look_up="reference_code",
-                min_value=10**8,
-                max_value=10**9,
+            obj.reference_code = REFERENCE_CODES.next_code(
+                CompanyKhaznaTransaction, look_up="reference_code"
             )
             super().save_model(request, obj, form, change)
         else:
@@ -127,13 +124,12 @@ class CompanyKhaznaTransactionAdmin(admin.ModelAdmin):
                 ).values_list("id", flat=True)
             )
             users_to_notify.extend(company_owner)
-            for user_id in users_to_notify:
-                Notification.objects.create(
-                    user_id=user_id,
-                    title=notification_message,
-                    description=notification_message,
-                    type=Notification.NotificationType.MONEY,
-                )
+            Notification.objects.fan_out(
+                users_to_notify,
+                title=notification_message,
+                description=notification_message,
+                type=Notification.NotificationType.MONEY,
+            )
 
     def created_with_ms(self, obj):
         if obj.created:
@@ -231,11 +227,8 @@ class StationKhaznaTransactionAdmin(admin.ModelAdmin):
 
         if not obj.pk:  # Only set created_by on creation, not updates
             obj.created_by = request.user
-            obj.reference_code = generate_unique_code(
-                model=StationKhaznaTransaction,
-                look_up="reference_code",
-                min_value=10**8,
-                max_value=10**9,
+            obj.reference_code = REFERENCE_CODES.next_code(
+                StationKhaznaTransaction, look_up="reference_code"
             )
             super().save_model(request, obj, form, change)
         else:
@@ -263,13 +256,12 @@ class StationKhaznaTransactionAdmin(admin.ModelAdmin):
                     ).values_list("id", flat=True)
                 )
                 message = f"تم شحن رصيد محطة {obj.station.name} برصيد {obj.amount}"
-            for user_id in users_to_notify:
-                Notification.objects.create(
-                    user_id=user_id,
-                    title=message,
-                    description=message,
-                    type=Notification.NotificationType.MONEY,
-                )
+            Notification.objects.fan_out(
+                users_to_notify,
+                title=message,
+                description=message,
+                type=Notification.NotificationType.MONEY,
+            )
         super().save_model(request, obj, form, change)
 
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
@@ -1,34 +1,38 @@
 from django.forms.widgets import DateInput
-from django_filters import DateFilter
 from django_filters.rest_framework import FilterSet
 
-from apps.accounting.models import CompanyKhaznaTransaction, StationKhaznaTransaction
+from apps.accounting.models import (
+    CompanyKhaznaTransaction,
+    LedgerEntry,
+    StationKhaznaTransaction,
+)
+from apps.shared.filters import TimestampDateFilter
 
 
 class CompanyKhaznaTransactionFilter(FilterSet):
-    created_from = DateFilter(
-        field_name="created__date",
+    created_from = TimestampDateFilter(
+        field_name="created",
         lookup_expr="gte",
         label="Created From",
         widget=DateInput(attrs={"type": "date"}),
         help_text="Filter transactions created on or after this date. Format: YYYY-MM-DD",
     )
-    created_to = DateFilter(
-        field_name="created__date",
+    created_to = TimestampDateFilter(
+        field_name="created",
         lookup_expr="lte",
         label="Created To",
         widget=DateInput(attrs={"type": "date"}),
         help_text="Filter transactions created on or before this date. Format: YYYY-MM-DD",
     )
-    approved_from = DateFilter(
-        field_name="approved_at__date",
+    approved_from = TimestampDateFilter(
+        field_name="approved_at",
         lookup_expr="gte",
         label="Approved From",
         widget=DateInput(attrs={"type": "date"}),
         help_text="Filter transactions approved on or after this date. Format: YYYY-MM-DD",
     )
-    approved_to = DateFilter(
-        field_name="approved_at__date",
+    approved_to = TimestampDateFilter(
+        field_name="approved_at",
         lookup_expr="lte",
         label="Approved To",
         widget=DateInput(attrs={"type": "date"}),
@@ -52,29 +56,29 @@ class CompanyKhaznaTransactionFilter(FilterSet):
 
 
 class StationKhaznaTransactionFilter(FilterSet):
-    created_from = DateFilter(
-        field_name="created__date",
+    created_from = TimestampDateFilter(
+        field_name="created",
         lookup_expr="gte",
         label="Created From",
         widget=DateInput(attrs={"type": "date"}),
         help_text="Filter transactions created on or after this date. Format: YYYY-MM-DD",
     )
-    created_to = DateFilter(
-        field_name="created__date",
+    created_to = TimestampDateFilter(
+        field_name="created",
         lookup_expr="lte",
         label="Created To",
         widget=DateInput(attrs={"type": "date"}),
         help_text="Filter transactions created on or before this date. Format: YYYY-MM-DD",
     )
-    approved_from = DateFilter(
-        field_name="approved_at__date",
+    approved_from = TimestampDateFilter(
+        field_name="approved_at",
         lookup_expr="gte",
         label="Approved From",
         widget=DateInput(attrs={"type": "date"}),
         help_text="Filter transactions approved on or after this date. Format: YYYY-MM-DD",
     )
-    approved_to = DateFilter(
-        field_name="approved_at__date",
+    approved_to = TimestampDateFilter(
+        field_name="approved_at",
         lookup_expr="lte",
         label="Approved To",
         widget=DateInput(attrs={"type": "date"}),
@@ -95,3 +99,34 @@ class StationKhaznaTransactionFilter(FilterSet):
             "approved_from",
             "approved_to",
         ]
+
+
+class LedgerEntryFilter(FilterSet):
+    approved_from = TimestampDateFilter(
+        field_name="approved_at",
+        lookup_expr="gte",
+        label="Approved From",
+        widget=DateInput(attrs={"type": "date"}),
+        help_text="Filter entries approved on or after this date. Format: YYYY-MM-DD",
+    )
+    approved_to = TimestampDateFilter(
+        field_name="approved_at",
+        lookup_expr="lte",
+        label="Approved To",
+        widget=DateInput(attrs={"type": "date"}),
+        help_text="Filter entries approved on or before this date. Format: YYYY-MM-DD",
+    )
+
+    class Meta:
+        model = LedgerEntry
+        fields = [
+            "company",
+            "company_branch",
+            "station",
+            "station_branch",
+            "is_incoming",
+            "method",
+            "is_internal",
+            "approved_from",
+            "approved_to",
+        ]
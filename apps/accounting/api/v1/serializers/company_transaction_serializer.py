@@ -8,7 +8,7 @@ from apps.accounting.models import (
 from apps.companies.models.company_models import CompanyBranch
 from apps.notifications.models import Notification
 from apps.shared.base_exception_class import CustomValidationError
-from apps.shared.generate_code import generate_unique_code
+from apps.shared.generate_code import REFERENCE_CODES
 from apps.stations.api.v1.serializers import (
     StationBranchWithDistrictSerializer,
     StationNameSerializer,
@@ -62,11 +62,8 @@ class CreateCompanyKhaznaTransactionSerializer(serializers.ModelSerializer):
         return attrs
 
     def create(self, validated_data):
-        validated_data["reference_code"] = generate_unique_code(
-            model=CompanyKhaznaTransaction,
-            look_up="reference_code",
-            min_value=10**8,
-            max_value=10**9,
+        validated_data["reference_code"] = REFERENCE_CODES.next_code(
+            CompanyKhaznaTransaction, look_up="reference_code"
         )
         validated_data["company"] = validated_data["company_branch"].company
         instance = super().create(validated_data)
@@ -92,13 +89,12 @@ class CreateCompanyKhaznaTransactionSerializer(serializers.ModelSerializer):
                 instance.update_company_balance(instance.company)
                 message = f"تم شحن رصيد الشركة {instance.company.name} برصيد {instance.amount}"
             # send notifications
-            for user_id in users_to_notify:
-                Notification.objects.create(
-                    user_id=user_id,
-                    title=message,
-                    description=message,
-                    type=Notification.NotificationType.MONEY,
-                )
+            Notification.objects.fan_out(
+                users_to_notify,
+                title=message,
+                description=message,
+                type=Notification.NotificationType.MONEY,
+            )
         return instance
 
 
@@ -143,13 +139,12 @@ class UpdateCompanyKhaznaTransactionSerializer(serializers.ModelSerializer):
                 instance.update_company_balance(instance.company)
                 message = f"تم شحن رصيد الشركة {instance.company.name} برصيد {instance.amount}"
             # send notifications
-            for user_id in users_to_notify:
-                Notification.objects.create(
-                    user_id=user_id,
-                    title=message,
-                    description=message,
-                    type=Notification.NotificationType.MONEY,
-                )
+            Notification.objects.fan_out(
+                users_to_notify,
+                title=message,
+                description=message,
+                type=Notification.NotificationType.MONEY,
+            )
         return instance
 
 
@@ -176,11 +171,8 @@ class CreateStationKhaznaTransactionSerializer(serializers.ModelSerializer):
         return attrs
 
     def create(self, validated_data):
-        validated_data["reference_code"] = generate_unique_code(
-            model=StationKhaznaTransaction,
-            look_up="reference_code",
-            min_value=10**8,
-            max_value=10**9,
+        validated_data["reference_code"] = REFERENCE_CODES.next_code(
+            StationKhaznaTransaction, look_up="reference_code"
         )
         instance = super().create(validated_data)
 
@@ -205,13 +197,12 @@ class CreateStationKhaznaTransactionSerializer(serializers.ModelSerializer):
                 instance.update_station_balance(instance.station)
                 message = f"تم شحن رصيد المحطة {instance.station.name} برصيد {instance.amount}"
             # send notifications
-            for user_id in users_to_notify:
-                Notification.objects.create(
-                    user_id=user_id,
-                    title=message,
-                    description=message,
-                    type=Notification.NotificationType.MONEY,
-                )
+            Notification.objects.fan_out(
+                users_to_notify,
+                title=message,
+                description=message,
+                type=Notification.NotificationType.MONEY,
+            )
         return instance
 
 
@@ -257,13 +248,12 @@ class UpdateStationKhaznaTransactionSerializer(serializers.ModelSerializer):
                 instance.update_station_balance(instance.station)
                 message = f"تم شحن رصيد المحطة {instance.station.name} برصيد {instance.amount}"
             # send notifications
-            for user_id in users_to_notify:
-                Notification.objects.create(
-                    user_id=user_id,
-                    title=message,
-                    description=message,
-                    type=Notification.NotificationType.MONEY,
-                )
+            Notification.objects.fan_out(
+                users_to_notify,
+                title=message,
+                description=message,
+                type=Notification.NotificationType.MONEY,
+            )
         return instance
 
 
@@ -0,0 +1,16 @@
+from rest_framework import serializers
+
+from apps.accounting.models import LedgerEntry
+
+
+class ListLedgerEntrySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LedgerEntry
+        fields = "__all__"
+
+
+class LedgerTotalsSerializer(serializers.Serializer):
+    incoming = serializers.DecimalField(max_digits=14, decimal_places=2)
+    outgoing = serializers.DecimalField(max_digits=14, decimal_places=2)
+    undirected = serializers.DecimalField(max_digits=14, decimal_places=2)
+    entries = serializers.IntegerField()
@@ -3,6 +3,7 @@ from rest_framework.routers import DefaultRouter
 from apps.accounting.api.v1.views import (
     CompanyKhaznaTransactionViewSet,
     KhaznaTransactionViewSet,
+    LedgerEntryViewSet,
     StationKhaznaTransactionViewSet,
 )
 
@@ -20,5 +21,6 @@ router.register(
     StationKhaznaTransactionViewSet,
     basename="station-khazna-transactions",
 )
+router.register(r"ledger-entries", LedgerEntryViewSet, basename="ledger-entries")
 
 urlpatterns = router.urls
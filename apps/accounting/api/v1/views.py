@@ -1,10 +1,15 @@
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import viewsets
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
 from rest_framework.filters import SearchFilter
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
 from apps.accounting.api.v1.filters import (
     CompanyKhaznaTransactionFilter,
+    LedgerEntryFilter,
     StationKhaznaTransactionFilter,
 )
 from apps.accounting.api.v1.serializers.company_transaction_serializer import (
@@ -17,11 +22,18 @@ from apps.accounting.api.v1.serializers.company_transaction_serializer import (
     UpdateCompanyKhaznaTransactionSerializer,
     UpdateStationKhaznaTransactionSerializer,
 )
+from apps.accounting.api.v1.serializers.ledger_serializer import (
+    LedgerTotalsSerializer,
+    ListLedgerEntrySerializer,
+)
+from apps.accounting.ledger_entries import ledger_totals
 from apps.accounting.models import (
     CompanyKhaznaTransaction,
     KhaznaTransaction,
+    LedgerEntry,
     StationKhaznaTransaction,
 )
+from apps.shared.base_exception_class import CustomValidationError
 from apps.shared.constants import COMPANY_ROLES, DASHBOARD_ROLES
 from apps.shared.mixins.inject_user_mixins import InjectUserMixin
 from apps.shared.permissions import (
@@ -31,6 +43,7 @@ from apps.shared.permissions import (
     StationPermission,
 )
 from apps.users.models import User
+from apps.users.scope import get_scope
 
 
 class KhaznaTransactionViewSet(viewsets.ModelViewSet):
@@ -117,8 +130,88 @@ class StationKhaznaTransactionViewSet(InjectUserMixin, viewsets.ModelViewSet):
             return self.queryset.filter(station_id=self.request.station_id)
         if self.request.user.role == User.UserRoles.StationBranchManager:
             return self.queryset.filter(
-                station__branches__managers__user=self.request.user
+                station_id__in=get_scope(self.request).station_ids
             )
         if self.request.user.role == User.UserRoles.StationWorker:
             return self.queryset.filter(created_by_id=self.request.user.id)
         return self.queryset
+
+
+class LedgerEntryViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Approved khazna transactions from the append-only ledger. Filtering by
+    approved_from / approved_to only reads the partitions of those months.
+    """
+
+    queryset = LedgerEntry.objects.order_by("-id")
+    serializer_class = ListLedgerEntrySerializer
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = LedgerEntryFilter
+
+    def get_permissions(self):
+        return [
+            IsAuthenticated(),
+            EitherPermission(
+                [CompanyPermission, StationPermission, DashboardPermission]
+            ),
+        ]
+
+    def get_queryset(self):
+        role = self.request.user.role
+        if role == User.UserRoles.CompanyOwner:
+            return self.queryset.filter(company_id=self.request.company_id)
+        if role == User.UserRoles.CompanyBranchManager:
+            return self.queryset.filter(
+                company_branch_id__in=get_scope(self.request).company_branch_ids
+            )
+        if role == User.UserRoles.StationOwner:
+            return self.queryset.filter(station_id=self.request.station_id)
+        if role == User.UserRoles.StationBranchManager:
+            return self.queryset.filter(
+                station_branch_id__in=get_scope(self.request).station_branch_ids
+            )
+        if role in DASHBOARD_ROLES:
+            return self.queryset
+        return self.queryset.none()
+
+    def get_owner(self):
+        role = self.request.user.role
+        if role == User.UserRoles.CompanyOwner:
+            return {"company_id": self.request.company_id}
+        if role == User.UserRoles.StationOwner:
+            return {"station_id": self.request.station_id}
+        if role in DASHBOARD_ROLES:
+            for name in ("company", "station"):
+                value = self.request.query_params.get(name)
+                if value and value.isdigit():
+                    return {f"{name}_id": int(value)}
+            raise CustomValidationError(
+                message="company or station is required",
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+        raise CustomValidationError(
+            message="You do not have permission to perform this action.",
+            status_code=status.HTTP_403_FORBIDDEN,
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="company",
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description="Company id, for dashboard users",
+            ),
+            OpenApiParameter(
+                name="station",
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description="Station id, for dashboard users",
+            ),
+        ],
+        responses={200: LedgerTotalsSerializer},
+    )
+    @action(detail=False, methods=["get"], url_path="totals", url_name="totals")
+    def totals(self, request):
+        """All-time ledger totals of a company or a station."""
+        return Response(LedgerTotalsSerializer(ledger_totals(**self.get_owner())).data)
@@ -1,10 +1,10 @@
 from django.utils import timezone
 
 from apps.accounting.models import CompanyKhaznaTransaction, StationKhaznaTransaction
-from apps.shared.generate_code import generate_unique_code
+from apps.shared.generate_code import REFERENCE_CODES
 
 
-def generate_company_transaction(
+def build_company_transaction(
     company_id,
     company_branch_id,
     amount,
@@ -14,18 +14,17 @@ def generate_company_transaction(
     is_internal=False,
     for_what=None,
     created_by_id=None,
+    reference_code=None,
 ):
-    reference_code = generate_unique_code(
-        model=CompanyKhaznaTransaction,
-        look_up="reference_code",
-        min_value=10**8,
-        max_value=10**9,
-    )
+    if not reference_code:
+        reference_code = REFERENCE_CODES.next_code(
+            CompanyKhaznaTransaction, look_up="reference_code"
+        )
     reference_code = (
         str("INT-" + str(reference_code)) if is_internal else str(reference_code)
     )
     approved_at = timezone.localtime() if not approved_at else approved_at
-    CompanyKhaznaTransaction.objects.create(
+    return CompanyKhaznaTransaction(
         company_id=company_id,
         company_branch_id=company_branch_id,
         amount=amount,
@@ -39,7 +38,7 @@ def generate_company_transaction(
     )
 
 
-def generate_station_transaction(
+def build_station_transaction(
     station_id,
     amount,
     status,
@@ -48,15 +47,14 @@ def generate_station_transaction(
     approved_at=None,
     is_internal=False,
     created_by_id=None,
+    reference_code=None,
 ):
-    reference_code = generate_unique_code(
-        model=StationKhaznaTransaction,
-        look_up="reference_code",
-        min_value=10**8,
-        max_value=10**9,
-    )
+    if not reference_code:
+        reference_code = REFERENCE_CODES.next_code(
+            StationKhaznaTransaction, look_up="reference_code"
+        )
     approved_at = timezone.localtime() if not approved_at else approved_at
-    StationKhaznaTransaction.objects.create(
+    return StationKhaznaTransaction(
         station_id=station_id,
         station_branch_id=station_branch_id,
         amount=amount,
@@ -67,3 +65,11 @@ def generate_station_transaction(
         is_internal=is_internal,
         created_by_id=created_by_id,
     )
+
+
+def generate_company_transaction(**kwargs):
+    build_company_transaction(**kwargs).save()
+
+
+def generate_station_transaction(**kwargs):
+    build_station_transaction(**kwargs).save()
@@ -0,0 +1,67 @@
+"""
+Balance movements for cars, company branches, companies, stations and station
+branches.
+
+Every movement is one conditional UPDATE of the balance column, so concurrent
+requests can never both spend the same money and no other column is
+rewritten. Accounts moved together are updated in (table, id) order so two
+opposite transfers cannot deadlock, and the khazna row describing the movement
+is saved inside the same transaction. The company and station rollups are
+moved by the same amounts.
+"""
+
+from django.db import transaction
+from django.db.models import F
+from rest_framework import status
+
+from apps.companies import rollups as company_rollups
+from apps.shared.base_exception_class import CustomValidationError
+from apps.stations import rollups as station_rollups
+
+NOT_ENOUGH_BALANCE = "الرصيد غير كافٍ"
+
+
+def _apply(movements, error_message=NOT_ENOUGH_BALANCE, record=None, check=True):
+    # no savepoint: a failed movement has to abort the caller's transaction anyway
+    with transaction.atomic(savepoint=False):
+        for account, amount in sorted(
+            movements, key=lambda movement: (movement[0]._meta.db_table, movement[0].pk)
+        ):
+            queryset = type(account)._default_manager.filter(pk=account.pk)
+            if check and amount < 0:
+                queryset = queryset.filter(balance__gte=-amount)
+            if not queryset.update(balance=F("balance") + amount):
+                raise CustomValidationError(
+                    message=error_message,
+                    code="not_enough_balance",
+                    errors=[],
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                )
+        company_rollups.move_balances(movements)
+        station_rollups.move_balances(movements)
+        if record is not None:
+            record.save()
+    # keep the loaded instances roughly in sync, refresh_from_db for the exact value
+    for account, amount in movements:
+        account.balance += amount
+
+
+def transfer(
+    source, destination, amount, error_message=NOT_ENOUGH_BALANCE, record=None
+):
+    """Move `amount` from `source` to `destination` if `source` can afford it."""
+    _apply([(source, -amount), (destination, amount)], error_message, record)
+
+
+def debit(
+    account,
+    amount,
+    error_message=NOT_ENOUGH_BALANCE,
+    record=None,
+    allow_overdraft=False,
+):
+    _apply([(account, -amount)], error_message, record, check=not allow_overdraft)
+
+
+def credit(account, amount, record=None):
+    _apply([(account, amount)], record=record)
@@ -0,0 +1,186 @@
+"""
+The append-only ledger of approved khazna transactions and its daily snapshots.
+
+`record_entry` copies a company or station transaction into one flat
+LedgerEntry row once it is approved. Approved transactions are final, so an
+entry is never updated. `snapshot_day` sums a day of entries per company and
+per station into LedgerSnapshot rows, and `ledger_totals` adds the snapshots
+of the past days to the entries after the last of them, so a balance reads a
+few days of entries instead of the whole history. `backfill_entries` creates
+the monthly partitions of the history it copies, which would otherwise all
+land in the default partition.
+"""
+
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, DateTimeField, Max, Min, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from apps.accounting.models import (
+    CompanyKhaznaTransaction,
+    KhaznaTransaction,
+    LedgerEntry,
+    LedgerSnapshot,
+    StationKhaznaTransaction,
+)
+from apps.shared.helpers import day_range, start_of
+from apps.shared.partitions import create_partitions, is_partitioned, month_start
+
+OWNERS = ("company", "station")
+BACKFILL_BATCH_SIZE = 1000
+TOTALS = {
+    "incoming": Sum("amount", filter=Q(is_incoming=True)),
+    "outgoing": Sum("amount", filter=Q(is_incoming=False)),
+    "undirected": Sum("amount", filter=Q(is_incoming__isnull=True)),
+    "entries": Count("id"),
+}
+
+
+def build_entry(khazna_transaction):
+    return LedgerEntry(
+        transaction_id=khazna_transaction.pk,
+        approved_at=khazna_transaction.approved_at or khazna_transaction.created,
+        company_id=getattr(khazna_transaction, "company_id", None),
+        company_branch_id=getattr(khazna_transaction, "company_branch_id", None),
+        station_id=getattr(khazna_transaction, "station_id", None),
+        station_branch_id=getattr(khazna_transaction, "station_branch_id", None),
+        is_incoming=khazna_transaction.is_incoming,
+        amount=khazna_transaction.amount,
+        method=khazna_transaction.method,
+        reference_code=khazna_transaction.reference_code,
+        is_internal=khazna_transaction.is_internal,
+    )
+
+
+def remember_status(khazna_transaction):
+    khazna_transaction._ledger_status = khazna_transaction.__dict__.get("status")
+
+
+def record_entry(khazna_transaction, created=False):
+    """Add the entry of a transaction that was just approved."""
+    approved = KhaznaTransaction.TransactionStatus.APPROVED
+    old_status = None if created else khazna_transaction._ledger_status
+    remember_status(khazna_transaction)
+    if khazna_transaction.status != approved or old_status == approved:
+        return None
+    entry = build_entry(khazna_transaction)
+    entry.save()
+
+    # an entry of a day that may have been snapshotted already
+    day = timezone.localdate(entry.approved_at)
+    if day < timezone.localdate():
+        owner = (
+            {"company_id": entry.company_id}
+            if entry.company_id
+            else {"station_id": entry.station_id}
+        )
+        transaction.on_commit(lambda: snapshot_day(day, **owner))
+    return entry
+
+
+def snapshot_day(day, **owner):
+    """
+    Write the snapshots of `day` of every company and station, or of one of
+    them with company_id=... or station_id=...
+    """
+    start, end = day_range(day)
+    entries = LedgerEntry.objects.filter(
+        approved_at__gte=start, approved_at__lt=end, **owner
+    ).order_by()
+    kinds = [name.removesuffix("_id") for name in owner] or OWNERS
+    for kind in kinds:
+        rows = (
+            entries.filter(**{f"{kind}__isnull": False}).values(kind).annotate(**TOTALS)
+        )
+        for row in rows:
+            LedgerSnapshot.objects.update_or_create(
+                day=day,
+                **{f"{kind}_id": row[kind]},
+                defaults={name: row[name] or 0 for name in TOTALS},
+            )
+
+
+def ledger_totals(**owner):
+    """
+    Incoming, outgoing and undirected sums and the number of entries of a
+    company (company_id=...) or a station (station_id=...).
+    """
+    snapshots = LedgerSnapshot.objects.filter(day__lt=timezone.localdate(), **owner)
+    totals = snapshots.aggregate(
+        last_day=Max("day"),
+        **{name: Sum(name) for name in TOTALS},
+    )
+    recent = LedgerEntry.objects.filter(**owner)
+    if totals["last_day"]:
+        recent = recent.filter(
+            approved_at__gte=start_of(totals["last_day"] + timedelta(days=1))
+        )
+    recent_totals = recent.aggregate(**TOTALS)
+    return {name: (totals[name] or 0) + (recent_totals[name] or 0) for name in TOTALS}
+
+
+def create_history_partitions():
+    """The ledger partitions from the month of the first approved transaction."""
+    if connection.vendor != "postgresql":
+        return []
+    approved_at = Coalesce("approved_at", "created", output_field=DateTimeField())
+    first = KhaznaTransaction.objects.filter(
+        status=KhaznaTransaction.TransactionStatus.APPROVED
+    ).aggregate(first=Min(approved_at))["first"]
+    table = LedgerEntry._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        if not first or not is_partitioned(cursor, table):
+            return []
+        return create_partitions(cursor, table, month_start(timezone.localdate(first)))
+
+
+def backfill_entries():
+    """Add the entries of approved transactions that have none, returns their count."""
+    create_history_partitions()
+    added = 0
+    for model in (CompanyKhaznaTransaction, StationKhaznaTransaction):
+        missing = (
+            model.objects.filter(status=KhaznaTransaction.TransactionStatus.APPROVED)
+            .exclude(ledger_entries__isnull=False)
+            .order_by("id")
+        )
+        batch = []
+        for khazna_transaction in missing.iterator(chunk_size=BACKFILL_BATCH_SIZE):
+            batch.append(build_entry(khazna_transaction))
+            if len(batch) >= BACKFILL_BATCH_SIZE:
+                LedgerEntry.objects.bulk_create(batch)
+                added += len(batch)
+                batch = []
+        LedgerEntry.objects.bulk_create(batch)
+        added += len(batch)
+    return added
+
+
+def rebuild_snapshots():
+    """Rewrite the snapshots of every past day, returns their count."""
+    today_start = start_of(timezone.localdate())
+    snapshots = []
+    for kind in OWNERS:
+        rows = (
+            LedgerEntry.objects.filter(
+                approved_at__lt=today_start, **{f"{kind}__isnull": False}
+            )
+            .annotate(day=TruncDate("approved_at"))
+            .order_by()
+            .values(kind, "day")
+            .annotate(**TOTALS)
+        )
+        snapshots.extend(
+            LedgerSnapshot(
+                day=row["day"],
+                **{f"{kind}_id": row[kind]},
+                **{name: row[name] or 0 for name in TOTALS},
+            )
+            for row in rows.iterator()
+        )
+    with transaction.atomic():
+        LedgerSnapshot.objects.all().delete()
+        LedgerSnapshot.objects.bulk_create(snapshots, batch_size=BACKFILL_BATCH_SIZE)
+    return len(snapshots)
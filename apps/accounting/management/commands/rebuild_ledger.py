@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from apps.accounting.ledger_entries import backfill_entries, rebuild_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Add the ledger entries of approved khazna transactions that have none "
+        "and rewrite the daily snapshots of every past day."
+    )
+
+    def handle(self, *args, **options):
+        entries = backfill_entries()
+        snapshots = rebuild_snapshots()
+        self.stdout.write(
+            self.style.SUCCESS(f"Added {entries} entries, wrote {snapshots} snapshots")
+        )
@@ -0,0 +1,32 @@
+# Generated by Django 4.2 on 2026-10-18 15:06
+
+from django.db import migrations
+
+# must match CODE_BLOCK_SIZE in apps.shared.generate_code
+CODE_BLOCK_SIZE = 100
+
+
+def create_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "CREATE SEQUENCE IF NOT EXISTS shared_reference_code_seq "
+        f"INCREMENT BY {CODE_BLOCK_SIZE} MINVALUE 0 START WITH 0"
+    )
+
+
+def drop_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP SEQUENCE IF EXISTS shared_reference_code_seq")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounting", "0004_alter_companykhaznatransaction_company_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_sequence, drop_sequence),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 15:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounting", "0005_reference_code_sequence"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="khaznatransaction",
+            index=models.Index(fields=["created"], name="khazna_transaction_created"),
+        ),
+    ]
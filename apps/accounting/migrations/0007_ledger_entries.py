@@ -0,0 +1,258 @@
+# Generated by Django 4.2 on 2026-10-18 15:59
+
+from datetime import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+TABLE = "accounting_ledgerentry"
+MONTHS_AHEAD = 3
+
+
+def month_bound(index):
+    """The first midnight of the month `index` months after year 0."""
+    return timezone.make_aware(datetime(index // 12, index % 12 + 1, 1))
+
+
+def partition_ledger(apps, schema_editor):
+    """
+    Partition the new, empty ledger table by month of approved_at, with the
+    months from the first approved transaction, which the backfill copies,
+    up to MONTHS_AHEAD from now and a default partition. A frozen copy of
+    apps.shared.partitions.convert_to_partitioned as of this migration.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_get_indexdef(indexrelid) FROM pg_index "
+            "WHERE indrelid = %s::regclass AND NOT indisprimary",
+            [TABLE],
+        )
+        indexes = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'",
+            [TABLE],
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(
+            "SELECT min(coalesce(approved_at, created)) "
+            "FROM accounting_khaznatransaction WHERE status = 'approved'"
+        )
+        first = cursor.fetchone()[0]
+
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {TABLE}_unpartitioned")
+        cursor.execute(
+            f"CREATE TABLE {TABLE} (LIKE {TABLE}_unpartitioned INCLUDING DEFAULTS "
+            "INCLUDING CONSTRAINTS) PARTITION BY RANGE (approved_at)"
+        )
+        cursor.execute(
+            f"CREATE SEQUENCE {TABLE}_partitioned_id_seq OWNED BY {TABLE}.id"
+        )
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ALTER COLUMN id "
+            f"SET DEFAULT nextval('{TABLE}_partitioned_id_seq')"
+        )
+        cursor.execute(f"ALTER TABLE {TABLE} ADD PRIMARY KEY (id, approved_at)")
+
+        today = timezone.localdate()
+        first_day = timezone.localdate(first) if first else today
+        for index in range(
+            first_day.year * 12 + first_day.month - 1,
+            today.year * 12 + today.month + MONTHS_AHEAD,
+        ):
+            cursor.execute(
+                f"CREATE TABLE {TABLE}_{month_bound(index):%Y_%m} "
+                f"PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)",
+                [month_bound(index), month_bound(index + 1)],
+            )
+        cursor.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+        cursor.execute(f"DROP TABLE {TABLE}_unpartitioned")
+
+        for definition in indexes:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}")
+        cursor.execute(
+            "CREATE INDEX ledger_entry_approved_at_brin "
+            f"ON {TABLE} USING brin (approved_at)"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0019_operation_client_key"),
+        ("stations", "0005_rollups"),
+        ("accounting", "0006_created_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LedgerSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                (
+                    "incoming",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "outgoing",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "undirected",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("entries", models.PositiveIntegerField(default=0)),
+                (
+                    "company",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="companies.company",
+                    ),
+                ),
+                (
+                    "station",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="stations.station",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Ledger Snapshot",
+                "verbose_name_plural": "Ledger Snapshots",
+            },
+        ),
+        migrations.CreateModel(
+            name="LedgerEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("approved_at", models.DateTimeField()),
+                ("is_incoming", models.BooleanField(blank=True, null=True)),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=12)),
+                (
+                    "method",
+                    models.CharField(
+                        choices=[
+                            ("bank", "Bank"),
+                            ("instapay", "Instapay"),
+                            ("cash", "Cash"),
+                            ("wallet", "Wallet"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("reference_code", models.CharField(max_length=100)),
+                ("is_internal", models.BooleanField(default=False)),
+                (
+                    "company",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        to="companies.company",
+                    ),
+                ),
+                (
+                    "company_branch",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        to="companies.companybranch",
+                    ),
+                ),
+                (
+                    "station",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        to="stations.station",
+                    ),
+                ),
+                (
+                    "station_branch",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        to="stations.stationbranch",
+                    ),
+                ),
+                (
+                    "transaction",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="ledger_entries",
+                        to="accounting.khaznatransaction",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Ledger Entry",
+                "verbose_name_plural": "Ledger Entries",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="ledgersnapshot",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("company__isnull", False)),
+                fields=("company", "day"),
+                name="unique_company_ledger_snapshot",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="ledgersnapshot",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("station__isnull", False)),
+                fields=("station", "day"),
+                name="unique_station_ledger_snapshot",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ledgerentry",
+            index=models.Index(
+                fields=["company", "approved_at"], name="ledger_entry_company"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ledgerentry",
+            index=models.Index(
+                fields=["station", "approved_at"], name="ledger_entry_station"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="ledgerentry",
+            constraint=models.UniqueConstraint(
+                fields=("transaction", "approved_at"),
+                name="unique_ledger_entry_transaction",
+            ),
+        ),
+        migrations.RunPython(partition_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2 on 2026-10-18 16:14
+
+from django.db import migrations, models
+
+import apps.shared.validators
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounting", "0007_ledger_entries"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="khaznatransaction",
+            name="photo",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                upload_to="kazna_transaction_photos/",
+                validators=[apps.shared.validators.validate_image],
+            ),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 
+from apps.accounting import ledger
+from apps.shared.validators import validate_image
 from apps.utilities.models.abstract_base_model import AbstractBaseModel
 
 
@@ -36,7 +38,10 @@ class KhaznaTransaction(AbstractBaseModel):
     )
     approved_at = models.DateTimeField(null=True, blank=True)
     photo = models.ImageField(
-        upload_to="kazna_transaction_photos/", null=True, blank=True
+        upload_to="kazna_transaction_photos/",
+        null=True,
+        blank=True,
+        validators=[validate_image],
     )
     is_unpaid = models.BooleanField(
         default=False, help_text="True if the transaction hasn't been paid yet."
@@ -45,16 +50,15 @@ class KhaznaTransaction(AbstractBaseModel):
         default=False, help_text="True if the transaction is internal."
     )
 
+    class Meta:
+        indexes = [
+            # today's totals on the dashboards
+            models.Index(fields=["created"], name="khazna_transaction_created"),
+        ]
+
     def __str__(self):
         return f"{'IN' if self.is_incoming else 'OUT'} | {self.amount} | {self.reference_code}"  # noqa
 
-    def update_company_balance(self):
-        if self.is_incoming:
-            self.company.balance -= self.amount
-        else:
-            self.company.balance += self.amount
-        self.company.save()
-
 
 class CompanyKhaznaTransaction(KhaznaTransaction):
     class ForWhat(models.TextChoices):
@@ -83,10 +87,9 @@ class CompanyKhaznaTransaction(KhaznaTransaction):
 
     def update_company_balance(self, destination):
         if self.is_incoming:
-            destination.balance -= self.amount
+            ledger.debit(destination, self.amount, allow_overdraft=True)
         else:
-            destination.balance += self.amount
-        destination.save()
+            ledger.credit(destination, self.amount)
 
 
 class StationKhaznaTransaction(KhaznaTransaction):
@@ -104,7 +107,93 @@ class StationKhaznaTransaction(KhaznaTransaction):
 
     def update_station_balance(self, destination):
         if self.is_incoming:
-            destination.balance -= self.amount
+            ledger.debit(destination, self.amount, allow_overdraft=True)
         else:
-            destination.balance += self.amount
-        destination.save()
+            ledger.credit(destination, self.amount)
+
+
+class LedgerEntry(models.Model):
+    """
+    Append-only copy of an approved khazna transaction in one flat row, with
+    the company or station it belongs to. On postgres the table is
+    partitioned by month of `approved_at` with a BRIN index on it.
+    """
+
+    transaction = models.ForeignKey(
+        KhaznaTransaction, on_delete=models.PROTECT, related_name="ledger_entries"
+    )
+    approved_at = models.DateTimeField()
+    company = models.ForeignKey(
+        "companies.Company", on_delete=models.PROTECT, null=True, blank=True
+    )
+    company_branch = models.ForeignKey(
+        "companies.CompanyBranch", on_delete=models.PROTECT, null=True, blank=True
+    )
+    station = models.ForeignKey(
+        "stations.Station", on_delete=models.PROTECT, null=True, blank=True
+    )
+    station_branch = models.ForeignKey(
+        "stations.StationBranch", on_delete=models.PROTECT, null=True, blank=True
+    )
+    is_incoming = models.BooleanField(null=True, blank=True)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    method = models.CharField(
+        max_length=20, choices=KhaznaTransaction.TransactionMethod.choices
+    )
+    reference_code = models.CharField(max_length=100)
+    is_internal = models.BooleanField(default=False)
+
+    class Meta:
+        verbose_name = "Ledger Entry"
+        verbose_name_plural = "Ledger Entries"
+        constraints = [
+            # includes the partition key, approved_at never changes
+            models.UniqueConstraint(
+                fields=["transaction", "approved_at"],
+                name="unique_ledger_entry_transaction",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["company", "approved_at"], name="ledger_entry_company"
+            ),
+            models.Index(
+                fields=["station", "approved_at"], name="ledger_entry_station"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{'IN' if self.is_incoming else 'OUT'} | {self.amount} | {self.reference_code}"  # noqa
+
+
+class LedgerSnapshot(models.Model):
+    """Totals of the ledger entries of a company or a station on a day."""
+
+    day = models.DateField()
+    company = models.ForeignKey(
+        "companies.Company", on_delete=models.CASCADE, null=True, blank=True
+    )
+    station = models.ForeignKey(
+        "stations.Station", on_delete=models.CASCADE, null=True, blank=True
+    )
+    incoming = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    outgoing = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # internal movements are recorded without a direction
+    undirected = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    entries = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Ledger Snapshot"
+        verbose_name_plural = "Ledger Snapshots"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["company", "day"],
+                condition=models.Q(company__isnull=False),
+                name="unique_company_ledger_snapshot",
+            ),
+            models.UniqueConstraint(
+                fields=["station", "day"],
+                condition=models.Q(station__isnull=False),
+                name="unique_station_ledger_snapshot",
+            ),
+        ]
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+
+from apps.accounting.ledger_entries import record_entry, remember_status
+from apps.accounting.models import CompanyKhaznaTransaction, StationKhaznaTransaction
+
+
+@receiver(post_init, sender=CompanyKhaznaTransaction)
+@receiver(post_init, sender=StationKhaznaTransaction)
+def remember_ledger_status(sender, instance, **kwargs):
+    remember_status(instance)
+
+
+@receiver(post_save, sender=CompanyKhaznaTransaction)
+@receiver(post_save, sender=StationKhaznaTransaction)
+def record_ledger_entry(sender, instance, created, **kwargs):
+    record_entry(instance, created)
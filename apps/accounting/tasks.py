@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.accounting.ledger_entries import snapshot_day
+from apps.accounting.models import LedgerEntry
+from apps.shared.partitions import create_partitions
+
+
+@shared_task(ignore_result=True)
+def snapshot_ledger():
+    snapshot_day(timezone.localdate() - timedelta(days=1))
+
+
+@shared_task(ignore_result=True)
+def create_ledger_partitions():
+    if connection.vendor != "postgresql":
+        return
+    with transaction.atomic(), connection.cursor() as cursor:
+        create_partitions(cursor, LedgerEntry._meta.db_table)
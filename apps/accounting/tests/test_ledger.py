@@ -0,0 +1,151 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.accounting.helpers import build_company_transaction
+from apps.accounting.ledger_entries import backfill_entries, rebuild_snapshots
+from apps.accounting.models import KhaznaTransaction, LedgerEntry, LedgerSnapshot
+from apps.companies.models.company_models import Company, CompanyBranch
+from apps.shared.partitions import partition_name
+from apps.users.models import CompanyUser, User
+
+
+@pytest.mark.django_db
+class TestLedger:
+    @pytest.fixture(autouse=True)
+    def setup(self, admin_user, geo_data):
+        self.company = Company.objects.create(
+            name="Ledger Company",
+            district=geo_data["district"],
+            created_by=admin_user,
+        )
+        self.branch = CompanyBranch.objects.create(
+            name="Ledger Branch",
+            company=self.company,
+            district=geo_data["district"],
+            created_by=admin_user,
+        )
+        self.owner = CompanyUser.objects.create(
+            name="Ledger Owner",
+            phone_number="01000000077",
+            email="ledger_owner@example.com",
+            password="password123",
+            role=User.UserRoles.CompanyOwner,
+            company=self.company,
+            created_by=admin_user,
+        )
+
+    def add_transaction(self, amount, status, approved_at=None, is_incoming=True):
+        transaction = build_company_transaction(
+            company_id=self.company.id,
+            company_branch_id=self.branch.id,
+            amount=Decimal(amount),
+            status=status,
+            description="ledger test",
+            approved_at=approved_at,
+            created_by_id=self.owner.id,
+        )
+        transaction.is_incoming = is_incoming
+        transaction.save()
+        return transaction
+
+    def owner_client(self, api_client):
+        token = AccessToken.for_user(self.owner)
+        token["company_id"] = self.company.id
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return api_client
+
+    def test_only_approved_transactions_are_recorded_once(self):
+        pending = self.add_transaction(
+            "10.00", KhaznaTransaction.TransactionStatus.PENDING
+        )
+        approved = self.add_transaction(
+            "25.00", KhaznaTransaction.TransactionStatus.APPROVED
+        )
+        approved.description = "saved again"
+        approved.save()
+
+        entries = LedgerEntry.objects.filter(company=self.company)
+        assert list(entries.values_list("transaction_id", flat=True)) == [approved.id]
+        assert not LedgerEntry.objects.filter(transaction_id=pending.id).exists()
+        assert entries.get().company_branch_id == self.branch.id
+
+    def test_totals_add_snapshots_to_recent_entries(
+        self, api_client, django_capture_on_commit_callbacks
+    ):
+        approved = KhaznaTransaction.TransactionStatus.APPROVED
+        last_week = timezone.localtime() - timedelta(days=7)
+        self.add_transaction("100.00", approved, approved_at=last_week)
+        self.add_transaction(
+            "30.00", approved, approved_at=last_week, is_incoming=False
+        )
+        rebuild_snapshots()
+        assert LedgerSnapshot.objects.get(company=self.company).entries == 2
+
+        self.add_transaction("5.00", approved)
+        # a late entry of a snapshotted day updates its snapshot
+        with django_capture_on_commit_callbacks(execute=True):
+            self.add_transaction("1.00", approved, approved_at=last_week)
+
+        response = self.owner_client(api_client).get(reverse("ledger-entries-totals"))
+
+        assert response.status_code == 200
+        assert response.data == {
+            "incoming": "106.00",
+            "outgoing": "30.00",
+            "undirected": "0.00",
+            "entries": 4,
+        }
+
+    def test_list_is_scoped_to_the_company(self, api_client, admin_user, geo_data):
+        other_company = Company.objects.create(
+            name="Other Company",
+            district=geo_data["district"],
+            created_by=admin_user,
+        )
+        own = self.add_transaction(
+            "10.00", KhaznaTransaction.TransactionStatus.APPROVED
+        )
+        build_company_transaction(
+            company_id=other_company.id,
+            company_branch_id=None,
+            amount=Decimal("20.00"),
+            status=KhaznaTransaction.TransactionStatus.APPROVED,
+            description="other company",
+            created_by_id=admin_user.id,
+        ).save()
+
+        response = self.owner_client(api_client).get(reverse("ledger-entries-list"))
+
+        assert response.status_code == 200
+        assert [entry["transaction"] for entry in response.data["results"]] == [own.id]
+
+    @pytest.mark.skipif(
+        connection.vendor != "postgresql", reason="partitions need postgres"
+    )
+    def test_backfill_moves_history_out_of_the_default_partition(self):
+        long_ago = timezone.localtime() - timedelta(days=400)
+        old = self.add_transaction(
+            "10.00", KhaznaTransaction.TransactionStatus.APPROVED, approved_at=long_ago
+        )
+
+        backfill_entries()
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT tableoid::regclass::text FROM accounting_ledgerentry "
+                "WHERE transaction_id = %s",
+                [old.id],
+            )
+            assert cursor.fetchall() == [
+                (
+                    partition_name(
+                        "accounting_ledgerentry", timezone.localdate(long_ago)
+                    ),
+                )
+            ]
@@ -8,9 +8,12 @@ from django.urls import path, reverse
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 
+from apps.companies import print_sheets, qr_assets
 from apps.companies.models.operation_model import CarOperation
+from apps.companies.tasks import print_car_codes_task, render_qr_assets_task
 from apps.geo.models import District
-from apps.shared.generate_code import generate_unique_code
+from apps.shared.filters import timestamp_range
+from apps.shared.generate_code import CAR_CODES
 from apps.stations.models.service_models import Service
 
 from .models.company_cash_models import CompanyCashRequest
@@ -345,7 +348,7 @@ class CarCodeAdmin(admin.ModelAdmin):
         "car__branch__company__name",
     )
     list_filter = ("car__branch__company", "created")
-    actions = ["print_qr_codes"]
+    actions = ["print_qr_codes", "print_qr_sheet"]
     list_select_related = ("car__branch__company",)
     list_per_page = 10
     page_size = 10
@@ -357,14 +360,7 @@ class CarCodeAdmin(admin.ModelAdmin):
         if generate_count > 1:
             # Generate multiple codes
             with transaction.atomic():
-                code_list = []
-                for i in range(generate_count):
-                    code_list.append(generate_unique_code(CarCode))
-                code_list = list(set(code_list))
-                if len(code_list) < generate_count:
-                    for i in range(generate_count - len(code_list)):
-                        code_list.append(generate_unique_code(CarCode))
-                code_list = list(set(code_list))
+                code_list = CAR_CODES.next_codes(CarCode, generate_count)
                 CarCode.objects.bulk_create(
                     [
                         CarCode(
@@ -376,13 +372,14 @@ class CarCodeAdmin(admin.ModelAdmin):
                         for code in code_list
                     ]
                 )
+                transaction.on_commit(lambda: render_qr_assets_task.delay(code_list))
             messages.success(
                 request, f"Successfully generated {len(code_list)} car codes."
             )
             return
         else:
             if not obj.code:
-                obj.code = generate_unique_code(CarCode)
+                obj.code = CAR_CODES.next_code(CarCode)
 
         if not obj.pk:
             obj.created_by = request.user
@@ -397,7 +394,16 @@ class CarCodeAdmin(admin.ModelAdmin):
         from django.http import HttpResponse
         from django.template.loader import render_to_string
 
-        html = render_to_string("admin/carcode/qr_print.html", {"car_codes": queryset})
+        codes = list(queryset.values_list("code", flat=True))
+        urls = qr_assets.qr_asset_urls(codes)
+        html = render_to_string(
+            "admin/carcode/qr_print.html",
+            {
+                "qr_codes": [(code, urls[code]) for code in codes],
+                "has_logo": qr_assets.logo_base64() is not None,
+                "logo_path": qr_assets.LOGO_PATH,
+            },
+        )
 
         response = HttpResponse(html)
         response["Content-Disposition"] = 'inline; filename="qr_codes.html"'
@@ -405,6 +411,20 @@ class CarCodeAdmin(admin.ModelAdmin):
 
     print_qr_codes.short_description = "Print QR Codes"
 
+    def print_qr_sheet(self, request, queryset):
+        filename = print_sheets.sheet_filename()
+        download_url = request.build_absolute_uri(print_sheets.sheet_url(filename))
+        code_ids = list(queryset.values_list("id", flat=True))
+        print_car_codes_task.delay(request.user.id, code_ids, filename, download_url)
+        # the link is sent in a notification once the file is written
+        messages.success(
+            request,
+            f"The PDF of {len(code_ids)} codes is being prepared, "
+            "you will be notified when it can be downloaded.",
+        )
+
+    print_qr_sheet.short_description = "Print QR Codes (PDF)"
+
     def get_urls(self):
         urls = super().get_urls()
         custom_urls = [
@@ -578,14 +598,16 @@ class CreatedDateRangeFilter(admin.SimpleListFilter):
         if start_date:
             try:
                 start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
-                queryset = queryset.filter(created__date__gte=start_date)
+                queryset = queryset.filter(
+                    timestamp_range("created", date_from=start_date)
+                )
             except ValueError:
                 pass
 
         if end_date:
             try:
                 end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
-                queryset = queryset.filter(created__date__lte=end_date)
+                queryset = queryset.filter(timestamp_range("created", date_to=end_date))
             except ValueError:
                 pass
 
@@ -1,11 +1,12 @@
 from django_filters import rest_framework as filters
 
 from apps.companies.models.company_cash_models import CompanyCashRequest
+from apps.shared.filters import TimestampDateFilter
 
 
 class CashRequestFilter(filters.FilterSet):
-    approved_from = filters.DateFilter(field_name="modified__date", lookup_expr="gte")
-    approved_to = filters.DateFilter(field_name="modified__date", lookup_expr="lte")
+    approved_from = TimestampDateFilter(field_name="modified", lookup_expr="gte")
+    approved_to = TimestampDateFilter(field_name="modified", lookup_expr="lte")
     station_branch = filters.NumberFilter(field_name="approved_by__branch_id")
     company_branch = filters.NumberFilter(field_name="driver__branch_id")
     driver_code = filters.CharFilter(field_name="driver__code")
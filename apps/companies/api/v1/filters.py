@@ -3,6 +3,7 @@ from django_filters import rest_framework as django_filters
 from apps.companies.models.company_models import Car, Company, CompanyBranch, Driver
 from apps.companies.models.operation_model import CarOperation
 from apps.geo.models import City
+from apps.shared.filters import TimestampDateFilter
 
 
 class CompanyBranchFilter(django_filters.FilterSet):
@@ -16,14 +17,14 @@ class CompanyBranchFilter(django_filters.FilterSet):
 
 
 class CarOperationFilter(django_filters.FilterSet):
-    start_date = django_filters.DateFilter(
-        field_name="start_time__date",
+    start_date = TimestampDateFilter(
+        field_name="start_time",
         lookup_expr="gte",
         label="start_date_from",
         help_text="Filter by start date from example start_date_from=YYYY-MM-DD",
     )
-    end_date = django_filters.DateFilter(
-        field_name="end_time__date",
+    end_date = TimestampDateFilter(
+        field_name="end_time",
         lookup_expr="lte",
         label="end_date_to",
         help_text="Filter by end date to example end_date_to=YYYY-MM-DD",
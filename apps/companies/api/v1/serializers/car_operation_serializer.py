@@ -4,9 +4,10 @@ from decimal import Decimal
 from django.db import transaction
 from rest_framework import serializers
 
+from apps.accounting import ledger
 from apps.accounting.helpers import (
+    build_station_transaction,
     generate_company_transaction,
-    generate_station_transaction,
 )
 from apps.accounting.models import KhaznaTransaction
 from apps.companies.api.v1.serializers.car_serializer import CarWithPlateInfoSerializer
@@ -57,6 +58,8 @@ class ListCarOperationSerializer(serializers.ModelSerializer):
             "car_meter",
             "motor_image",
             "fuel_image",
+            "motor_thumbnail",
+            "fuel_thumbnail",
             "fuel_consumption_rate",
             "service_category",
         ]
@@ -101,6 +104,8 @@ class ListCompanyCarOperationSerializer(ListCarOperationSerializer):
             "car_meter",
             "motor_image",
             "fuel_image",
+            "motor_thumbnail",
+            "fuel_thumbnail",
             "fuel_consumption_rate",
             "service_category",
         ]
@@ -173,6 +178,8 @@ class ListStationCarOperationSerializer(serializers.ModelSerializer):
             "company_name",
             "motor_image",
             "fuel_image",
+            "motor_thumbnail",
+            "fuel_thumbnail",
         ]
 
     def to_representation(self, instance):
@@ -302,28 +309,32 @@ class CreateCarOperationSerializer(CarOperationSerializer):
         )
 
         car.last_meter = validated_data["car_meter"]
-        car.balance = car.balance - validated_data["company_cost"]
-        car.save()
+        ledger.debit(
+            car,
+            validated_data["company_cost"],
+            error_message="السيارة لا تمتلك كافٍ من المال",
+        )
+        car.save(update_fields=["last_meter", "fuel_consumption_rate"])
         request = self.context["request"]
         station_id = worker.station_branch.station_id
         if (
             "status" in validated_data
             and validated_data["status"] == CarOperation.OperationStatus.COMPLETED
         ):
-            generate_station_transaction(
-                station_id=station_id,
-                station_branch_id=worker.station_branch_id,
-                amount=validated_data["station_cost"],
-                status=KhaznaTransaction.TransactionStatus.APPROVED,
-                description=f"تم تفويل سيارة رقم {car.plate} بعدد {validated_data['amount']} لتر",  # noqa
-                created_by_id=worker.id,
-                is_internal=False,
-            )
-            station_branch = worker.station_branch
-            station_branch.balance = (
-                station_branch.balance - validated_data["station_cost"]
+            ledger.debit(
+                worker.station_branch,
+                validated_data["station_cost"],
+                allow_overdraft=True,
+                record=build_station_transaction(
+                    station_id=station_id,
+                    station_branch_id=worker.station_branch_id,
+                    amount=validated_data["station_cost"],
+                    status=KhaznaTransaction.TransactionStatus.APPROVED,
+                    description=f"تم تفويل سيارة رقم {car.plate} بعدد {validated_data['amount']} لتر",  # noqa
+                    created_by_id=worker.id,
+                    is_internal=False,
+                ),
             )
-            station_branch.save()
 
             # send notifications for station users
             message = f"تم تفويل سيارة رقم {car.plate} بعدد {validated_data['amount']} لتر"  # noqa
@@ -346,13 +357,12 @@ class CreateCarOperationSerializer(CarOperationSerializer):
             )
             notification_users.append(worker.id)
 
-            for user_id in notification_users:
-                Notification.objects.create(
-                    user_id=user_id,
-                    title=message,
-                    description=message,
-                    type=Notification.NotificationType.MONEY,
-                )
+            Notification.objects.fan_out(
+                notification_users,
+                title=message,
+                description=message,
+                type=Notification.NotificationType.MONEY,
+            )
 
             # send notfication for company user
             company_id = car.branch.company_id
@@ -384,13 +394,12 @@ class CreateCarOperationSerializer(CarOperationSerializer):
                 )
             )
 
-            for user_id in notification_users:
-                Notification.objects.create(
-                    user_id=user_id,
-                    title=message,
-                    description=message,
-                    type=Notification.NotificationType.MONEY,
-                )
+            Notification.objects.fan_out(
+                notification_users,
+                title=message,
+                description=message,
+                type=Notification.NotificationType.MONEY,
+            )
 
         return super().create(validated_data)
 
@@ -411,21 +420,20 @@ class UpdateCarOperationSerializer(CarOperationSerializer):
                 car = car_operation.car
                 station_id = car_operation.station_branch.station_id
                 request = self.context["request"]
-                generate_station_transaction(
-                    station_id=station_id,
-                    station_branch_id=car_operation.station_branch_id,
-                    amount=car_operation.station_cost,
-                    status=KhaznaTransaction.TransactionStatus.APPROVED,
-                    description=f"تم تفويل سيارة رقم {car.plate} بعدد {car_operation.amount} لتر",  # noqa
-                    created_by_id=request.user.id,
-                    is_internal=False,
-                )
-
-                station_branch = worker.station_branch
-                station_branch.balance = (
-                    station_branch.balance - car_operation.station_cost
+                ledger.debit(
+                    worker.station_branch,
+                    car_operation.station_cost,
+                    allow_overdraft=True,
+                    record=build_station_transaction(
+                        station_id=station_id,
+                        station_branch_id=car_operation.station_branch_id,
+                        amount=car_operation.station_cost,
+                        status=KhaznaTransaction.TransactionStatus.APPROVED,
+                        description=f"تم تفويل سيارة رقم {car.plate} بعدد {car_operation.amount} لتر",  # noqa
+                        created_by_id=request.user.id,
+                        is_internal=False,
+                    ),
                 )
-                station_branch.save()
 
                 # send notifications for station users
                 message = f"تم تفويل سيارة رقم {car.plate} بعدد {car_operation.amount} لتر"  # noqa
@@ -449,13 +457,12 @@ class UpdateCarOperationSerializer(CarOperationSerializer):
                 )
                 notification_users.append(worker.id)
 
-                for user_id in notification_users:
-                    Notification.objects.create(
-                        user_id=user_id,
-                        title=message,
-                        description=message,
-                        type=Notification.NotificationType.MONEY,
-                    )
+                Notification.objects.fan_out(
+                    notification_users,
+                    title=message,
+                    description=message,
+                    type=Notification.NotificationType.MONEY,
+                )
 
                 # send notfication for company user
                 company_id = car.branch.company_id
@@ -486,11 +493,10 @@ class UpdateCarOperationSerializer(CarOperationSerializer):
                     )
                 )
                 notification_users.append(request.user.id)
-                for user_id in notification_users:
-                    Notification.objects.create(
-                        user_id=user_id,
-                        title=message,
-                        description=message,
-                        type=Notification.NotificationType.MONEY,
-                    )
+                Notification.objects.fan_out(
+                    notification_users,
+                    title=message,
+                    description=message,
+                    type=Notification.NotificationType.MONEY,
+                )
         return car_operation
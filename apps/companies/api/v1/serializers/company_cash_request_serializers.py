@@ -7,6 +7,7 @@ from apps.shared.base_exception_class import CustomValidationError
 from apps.shared.constants import COMPANY_ROLES, STATION_ROLES
 from apps.stations.api.v1.serializers import StationBranchWithDistrictSerializer
 from apps.users.models import User
+from apps.users.scope import get_scope
 from apps.users.v1.serializers.user_serializers import SingleUserSerializer
 
 
@@ -79,7 +80,9 @@ class CompanyCashRequestSerializer(serializers.ModelSerializer):
             if request.user.role == User.UserRoles.CompanyOwner:
                 queryset = queryset.filter(branch__company_id=request.company_id)
             if request.user.role == User.UserRoles.CompanyBranchManager:
-                queryset = queryset.filter(branch__managers__user=request.user)
+                queryset = queryset.filter(
+                    branch_id__in=get_scope(request).company_branch_ids
+                )
 
         self.fields["driver"].queryset = queryset
 
@@ -11,7 +11,6 @@ from drf_spectacular.utils import (
 )
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.filters import SearchFilter
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
@@ -23,10 +22,11 @@ from apps.companies.api.v1.serializers.car_operation_serializer import (
     SingleCarOperationSerializer,
     UpdateCarOperationSerializer,
 )
-from apps.companies.helper import export_car_operations, get_car_operations_data
+from apps.companies.helper import export_filename, get_car_operations_data
 from apps.companies.models.company_models import CompanyBranch
 from apps.companies.models.operation_model import CarOperation
-from apps.notifications.models import Notification
+from apps.companies.search_index import SEARCH_PATHS
+from apps.companies.tasks import export_car_operations_task
 from apps.shared.base_exception_class import CustomValidationError
 from apps.shared.constants import COMPANY_ROLES, DASHBOARD_ROLES
 from apps.shared.mixins.inject_user_mixins import InjectUserMixin
@@ -36,8 +36,10 @@ from apps.shared.permissions import (
     EitherPermission,
     StationPermission,
 )
+from apps.shared.search import SearchTextFilter
 from apps.stations.models.service_models import Service
 from apps.users.models import User
+from apps.users.scope import get_scope
 
 
 class CarOperationViewSet(InjectUserMixin, viewsets.ModelViewSet):
@@ -48,16 +50,10 @@ class CarOperationViewSet(InjectUserMixin, viewsets.ModelViewSet):
         "worker__station_branch__district__city",
         "service",
     ).order_by("-id")
-    filter_backends = [DjangoFilterBackend, SearchFilter]
+    filter_backends = [DjangoFilterBackend, SearchTextFilter]
     filterset_class = CarOperationFilter
     serializer_class = ListCarOperationSerializer
-    search_fields = [
-        "code",
-        "car__code",
-        "driver__name",
-        "station_branch__name",
-        "worker__name",
-    ]
+    search_fields = SEARCH_PATHS[CarOperation]
 
     def get_permissions(self):
         if self.action == "export":
@@ -114,7 +110,7 @@ class CarOperationViewSet(InjectUserMixin, viewsets.ModelViewSet):
             )
         if self.request.user.role == User.UserRoles.CompanyBranchManager:
             return self.queryset.filter(
-                car__branch__managers__user=self.request.user,
+                car__branch_id__in=get_scope(self.request).company_branch_ids,
                 service__type__in=[
                     Service.ServiceType.PETROL,
                     Service.ServiceType.DIESEL,
@@ -164,22 +160,22 @@ class CarOperationViewSet(InjectUserMixin, viewsets.ModelViewSet):
         date_from = request.query_params.get("date_from")
         date_to = request.query_params.get("date_to")
 
-        branches = []
+        branches = CompanyBranch.objects.none()
         if request.user.role == User.UserRoles.CompanyOwner:
             branches = CompanyBranch.objects.filter(company_id=request.company_id)
         elif request.user.role == User.UserRoles.CompanyBranchManager:
             branches = CompanyBranch.objects.filter(
-                managers__user=request.user, company_id=request.company_id
+                id__in=get_scope(request).company_branch_ids,
+                company_id=request.company_id,
             )
-        branches = branches.values_list("id", flat=True)
-        branches = set(branches)
-        queryset = get_car_operations_data(
-            company_id=request.company_id,
-            branches=branches,
-            car=request.query_params.get("car"),
-            date_from=date_from,
-            date_to=date_to,
-        )
+        filters = {
+            "company_id": request.company_id,
+            "branches": list(branches.values_list("id", flat=True)),
+            "car": request.query_params.get("car"),
+            "date_from": date_from,
+            "date_to": date_to,
+        }
+        queryset = get_car_operations_data(**filters)
 
         error_message = "لا توجد بيانات للاستخراج"
         if date_from:
@@ -187,25 +183,23 @@ class CarOperationViewSet(InjectUserMixin, viewsets.ModelViewSet):
         if date_to:
             error_message = "لا توجد بيانات للاستخراج ل {}".format(date_to)
 
-        if not queryset:
+        if not queryset.exists():
             raise CustomValidationError(
                 message=error_message, status_code=status.HTTP_400_BAD_REQUEST
             )
 
-        filename = export_car_operations(
-            company_id=request.company_id, branches=branches
-        )
+        filename = export_filename()
 
         # Create download URL
         base_url = request.build_absolute_uri("/")[:-1]
         download_url = f"{base_url}/api/v1/companies/car-operations/download-excel/?file={filename}"
 
-        Notification.objects.create(
-            user=request.user,
-            title="يتم الان استخراج العمليات",
-            description="يتم الان استخراج العمليات وسوف يتم ارسال اليك اشعار لك لتحميل الملف بعد الانتهاء",
-            type=Notification.NotificationType.GENERAL,
-            url=download_url,  # Store the download URL
+        # the user is notified with the same url once the file is written
+        export_car_operations_task.delay(
+            user_id=request.user.id,
+            filename=filename,
+            download_url=download_url,
+            **filters,
         )
 
         # Return both message and download URL
@@ -1,7 +1,4 @@
-import math
-
 from django.db import transaction
-from django.utils import timezone
 from drf_spectacular.utils import (
     OpenApiExample,
     OpenApiParameter,
@@ -14,7 +11,8 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from apps.accounting.helpers import generate_company_transaction
+from apps.accounting import ledger
+from apps.accounting.helpers import build_company_transaction
 from apps.accounting.models import CompanyKhaznaTransaction, KhaznaTransaction
 from apps.companies.api.v1.filters import CarFilter, DriverFilter
 from apps.companies.api.v1.serializers.car_serializer import (
@@ -24,21 +22,21 @@ from apps.companies.api.v1.serializers.car_serializer import (
     CarUpdateWithCompanySerializer,
     ListCarSerializer,
 )
-from django.db.models import F
-
 from apps.companies.api.v1.serializers.driver_serializer import (
     DriverSerializer,
     ListDriverSerializer,
 )
 from apps.companies.models.company_models import Car, Driver
-from apps.companies.models.operation_model import CarOperation
+from apps.companies.search_index import SEARCH_PATHS
+from apps.companies.verification import open_operation
 from apps.notifications.models import Notification
 from apps.shared.base_exception_class import CustomValidationError
 from apps.shared.constants import COMPANY_ROLES, DASHBOARD_ROLES
+from apps.shared.idempotency import idempotent
 from apps.shared.mixins.inject_user_mixins import InjectUserMixin
 from apps.shared.permissions import StationWorkerPermission
-from apps.stations.models.service_models import Service
 from apps.users.models import User
+from apps.users.scope import get_scope
 
 
 class DriverViewSet(InjectUserMixin, viewsets.ModelViewSet):
@@ -46,11 +44,7 @@ class DriverViewSet(InjectUserMixin, viewsets.ModelViewSet):
     queryset = Driver.objects.select_related(
         "branch__district", "branch__company"
     ).order_by("-id")
-    search_fields = [
-        "name",
-        "branch__name",
-        "branch__district__name",
-    ]
+    search_fields = SEARCH_PATHS[Driver]
 
     def get_serializer_class(self):
         if self.request.method == "GET":
@@ -61,7 +55,9 @@ class DriverViewSet(InjectUserMixin, viewsets.ModelViewSet):
         if self.request.user.role == User.UserRoles.CompanyOwner:
             return self.queryset.filter(branch__company=self.request.company_id)
         if self.request.user.role == User.UserRoles.CompanyBranchManager:
-            return self.queryset.filter(branch__managers__user=self.request.user)
+            return self.queryset.filter(
+                branch_id__in=get_scope(self.request).company_branch_ids
+            )
         return self.queryset
 
 
@@ -70,13 +66,7 @@ class CarViewSet(InjectUserMixin, viewsets.ModelViewSet):
         "branch__district", "branch__company", "service", "backup_service"
     ).order_by("-id")
     filterset_class = CarFilter
-    search_fields = [
-        "code",
-        "plate_number",
-        "plate_character",
-        "branch__name",
-        "branch__district__name",
-    ]
+    search_fields = SEARCH_PATHS[Car]
 
     def get_serializer_class(self):
         if self.request.method == "GET":
@@ -94,7 +84,9 @@ class CarViewSet(InjectUserMixin, viewsets.ModelViewSet):
         if self.request.user.role == User.UserRoles.CompanyOwner:
             return self.queryset.filter(branch__company=self.request.company_id)
         if self.request.user.role == User.UserRoles.CompanyBranchManager:
-            return self.queryset.filter(branch__managers__user=self.request.user)
+            return self.queryset.filter(
+                branch_id__in=get_scope(self.request).company_branch_ids
+            )
         return self.queryset
 
     @extend_schema(
@@ -130,6 +122,7 @@ class CarViewSet(InjectUserMixin, viewsets.ModelViewSet):
         url_path="update-balance",
         url_name="update_balance",
     )
+    @idempotent
     def update_balance(self, request, *args, **kwargs):
         car = self.get_object()
         if car.is_blocked_balance_update:
@@ -157,79 +150,40 @@ class CarViewSet(InjectUserMixin, viewsets.ModelViewSet):
                 car.branch.company.owners.values_list("id", flat=True)
             )
 
+        amount = serializer.validated_data["amount"]
         with transaction.atomic():
             if serializer.validated_data["type"] == "add":
-                car.refresh_from_db()
-                if parent_object.balance >= serializer.validated_data["amount"]:
-                    car.balance = F("balance") + serializer.validated_data["amount"]
-                    car.save()
-
-                    parent_object.refresh_from_db()
-                    parent_object.balance = F("balance") - serializer.validated_data["amount"]
-                    parent_object.save()
-                    message = f"تم شحن رصيد السيارة ({car.plate}) برصيد {serializer.validated_data['amount']} التابعة لفرع {car.branch.name}"
-                    generate_company_transaction(
-                        company_id=self.request.company_id,
-                        company_branch_id=car.branch_id,
-                        amount=serializer.validated_data["amount"],
-                        status=KhaznaTransaction.TransactionStatus.APPROVED,
-                        description=message,
-                        is_internal=True,
-                        for_what=CompanyKhaznaTransaction.ForWhat.CAR,
-                        created_by_id=request.user.id,
-                    )
-                    for user_id in notification_users:
-                        Notification.objects.create(
-                            user_id=user_id,
-                            title=message,
-                            description=message,
-                            type=Notification.NotificationType.MONEY,
-                        )
-
-                else:
-                    raise CustomValidationError(
-                        message="الرصيد غير كافٍ",
-                        code="not_enough_balance",
-                        errors=[],
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                    )
-            elif serializer.validated_data["type"] == "subtract":
-                car.refresh_from_db()
-                if car.balance >= serializer.validated_data["amount"]:
-                    car.balance = F("balance") - serializer.validated_data["amount"]
-                    car.save()
-
-                    parent_object.refresh_from_db()
-                    parent_object.balance = F("balance") + serializer.validated_data["amount"]
-                    parent_object.save()
-                    message = f"تم سحب رصيد السيارة ({car.plate}) برصيد {serializer.validated_data['amount']} التابعة لفرع {car.branch.name}"
-                    generate_company_transaction(
-                        company_id=self.request.company_id,
-                        company_branch_id=car.branch_id,
-                        amount=serializer.validated_data["amount"],
-                        status=KhaznaTransaction.TransactionStatus.APPROVED,
-                        description=message,
-                        is_internal=True,
-                        for_what=CompanyKhaznaTransaction.ForWhat.CAR,
-                        created_by_id=request.user.id,
-                    )
-                    for user_id in notification_users:
-                        Notification.objects.create(
-                            user_id=user_id,
-                            title=message,
-                            description=message,
-                            type=Notification.NotificationType.MONEY,
-                        )
-                else:
-                    raise CustomValidationError(
-                        message="السيارة لا تمتلك كافٍ من المال",
-                        code="not_enough_balance",
-                        errors=[],
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                    )
+                message = f"تم شحن رصيد السيارة ({car.plate}) برصيد {amount} التابعة لفرع {car.branch.name}"
+                source, destination = parent_object, car
+                error_message = "الرصيد غير كافٍ"
+            else:
+                message = f"تم سحب رصيد السيارة ({car.plate}) برصيد {amount} التابعة لفرع {car.branch.name}"
+                source, destination = car, parent_object
+                error_message = "السيارة لا تمتلك كافٍ من المال"
+            ledger.transfer(
+                source,
+                destination,
+                amount,
+                error_message=error_message,
+                record=build_company_transaction(
+                    company_id=self.request.company_id,
+                    company_branch_id=car.branch_id,
+                    amount=amount,
+                    status=KhaznaTransaction.TransactionStatus.APPROVED,
+                    description=message,
+                    is_internal=True,
+                    for_what=CompanyKhaznaTransaction.ForWhat.CAR,
+                    created_by_id=request.user.id,
+                ),
+            )
+            Notification.objects.fan_out(
+                notification_users,
+                title=message,
+                description=message,
+                type=Notification.NotificationType.MONEY,
+            )
 
-        # Refresh from DB to evaluate F() expressions and get actual balance for response
-        car.refresh_from_db()
+        car.refresh_from_db(fields=["balance"])
         return Response({"balance": car.balance}, status=status.HTTP_200_OK)
 
     def perform_destroy(self, instance):
@@ -240,6 +194,7 @@ class CarViewSet(InjectUserMixin, viewsets.ModelViewSet):
             )
         instance.delete()
 
+
 class VerifyDriverView(APIView):
     permission_classes = [IsAuthenticated, StationWorkerPermission]
 
@@ -291,125 +246,8 @@ class VerifyDriverView(APIView):
     )
     @transaction.atomic
     def post(self, request, driver_code, car_code, service_type):
-        car = (
-            Car.objects.filter(code=car_code.strip())
-            .select_related("branch__company")
-            .first()
-        )
-        if not car:
-            raise CustomValidationError(
-                message="كود السيارة هذا لا يعمل او غير مفعل الان.",
-                code="car_code_not_found",
-                errors=[],
-                status_code=status.HTTP_404_NOT_FOUND,
-            )
-
-        company_branch = car.branch
-        if not company_branch.company.is_active:
-            raise CustomValidationError(
-                message="حساب الشركه معلق مؤقتا",
-                code="company_not_active",
-                errors=[],
-                status_code=status.HTTP_404_NOT_FOUND,
-            )
-
-        driver = Driver.objects.filter(code=driver_code.strip()).first()
-        if not driver:
-            raise CustomValidationError(
-                message="كود السائق هذا لا يعمل او غير مفعل الان.",
-                code="driver_code_not_found",
-                errors=[],
-                status_code=status.HTTP_404_NOT_FOUND,
-            )
-
-        if driver.branch.company_id != company_branch.company_id:
-            raise CustomValidationError(
-                message="السائق لا ينتمي للشركة",
-                code="driver_not_belongs_to_company",
-                errors=[],
-                status_code=status.HTTP_404_NOT_FOUND,
-            )
-
-        if CarOperation.objects.filter(
-            status__in=[
-                CarOperation.OperationStatus.PENDING,
-                CarOperation.OperationStatus.IN_PROGRESS,
-            ],
-            car=car,
-        ).exists():
-            raise CustomValidationError(
-                message="السيارة قيد عمليه اخرى",
-                code="car_in_progress",
-                errors=[],
-                status_code=status.HTTP_400_BAD_REQUEST,
-            )
-
-        if not car.is_available_today():
-            raise CustomValidationError(
-                message="السيبارة غير مصرح لها هذا اليوم",
-                code="car_not_active",
-                errors=[],
-                status_code=status.HTTP_404_NOT_FOUND,
-            )
-
-        if service_type == "petrol":
-            car_service = car.service
-            liter_cost = (
-                car_service.cost * company_branch.fees / 100
-            ) + car_service.cost
-            if car.balance < liter_cost:
-                raise CustomValidationError(
-                    message="السيارة لا تمتلك كافٍ من المال",
-                    code="not_enough_balance",
-                    errors=[],
-                    status_code=status.HTTP_404_NOT_FOUND,
-                )
-
-            liters_count = (
-                car.permitted_fuel_amount
-                if car.permitted_fuel_amount
-                else car.tank_capacity
-            )
-            available_liters = math.floor(car.balance / liter_cost)
-            available_liters = min(liters_count, available_liters)
-            available_cost = available_liters * liter_cost
-            if (
-                CarOperation.objects.filter(
-                    status=CarOperation.OperationStatus.COMPLETED,
-                    car=car,
-                    created__date=timezone.localtime().date(),
-                    service__type__in=[
-                        Service.ServiceType.PETROL,
-                        Service.ServiceType.DIESEL,
-                    ],
-                ).count()
-                >= car.number_of_fuelings_per_day
-            ):
-                raise CustomValidationError(
-                    message="السيارة تجاوزت عدد عمليات البترولية اليومية المسموح بها",
-                    code="car_in_progress",
-                    errors=[],
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                )
-        else:
-            car_service = None
-            available_liters = 0
-            liter_cost = 0
-            available_cost = car.balance
-
-        station_branch = request.user.worker.station_branch
-        car_operation = CarOperation.objects.create(
-            car=car,
-            driver=driver,
-            service=car_service,
-            worker_id=request.user.id,
-            station_branch_id=station_branch.id,
-            status=CarOperation.OperationStatus.PENDING,
-            created_by_id=request.user.id,
-        )
-
-        car.is_blocked_balance_update = True
-        car.save()
+        verified = open_operation(request, driver_code, car_code, service_type)
+        car, car_service = verified.car, verified.service
 
         return Response(
             {
@@ -419,14 +257,14 @@ class VerifyDriverView(APIView):
                     "plate_character": car.plate_character,
                     "plate_color": car.plate_color,
                     "fuel_type": car.fuel_type,
-                    "liter_count": available_liters,
-                    "cost": available_cost,
+                    "liter_count": verified.available_liters,
+                    "cost": verified.available_cost,
                     "code": car.code,
                     "service": {
                         "name": car_service.name if car_service else "-",
                     },
                 },
-                "operation_id": car_operation.id,
+                "operation_id": verified.operation.id,
             },
             status=status.HTTP_200_OK,
         )
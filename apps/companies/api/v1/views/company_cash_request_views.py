@@ -1,5 +1,4 @@
 from django.db import transaction
-from django.db.models import F
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import (
     OpenApiParameter,
@@ -8,13 +7,13 @@ from drf_spectacular.utils import (
     extend_schema,
 )
 from rest_framework import viewsets
-from rest_framework.filters import SearchFilter
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import Response, status
 
+from apps.accounting import ledger
 from apps.accounting.helpers import (
+    build_station_transaction,
     generate_company_transaction,
-    generate_station_transaction,
 )
 from apps.accounting.models import CompanyKhaznaTransaction, KhaznaTransaction
 from apps.companies.api.filters.cash_request_filter import CashRequestFilter
@@ -25,11 +24,12 @@ from apps.companies.api.v1.serializers.company_cash_request_serializers import (
     ListCompanyCashRequestSerializer,
 )
 from apps.companies.models.company_cash_models import CompanyCashRequest
-from apps.companies.models.company_models import Company, CompanyBranch
+from apps.companies.search_index import SEARCH_PATHS
 from apps.notifications.models import Notification
 from apps.shared.base_exception_class import CustomValidationError
+from apps.shared.idempotency import idempotent
 from apps.shared.mixins.inject_user_mixins import InjectCompanyUserMixin
-from apps.stations.models.stations_models import StationBranch
+from apps.shared.search import SearchTextFilter
 from apps.users.models import (
     CompanyBranchManager,
     CompanyUser,
@@ -37,15 +37,16 @@ from apps.users.models import (
     StationOwner,
     User,
 )
+from apps.users.scope import get_scope
 
 
 class CompanyCashRequestViewSet(InjectCompanyUserMixin, viewsets.ModelViewSet):
     queryset = CompanyCashRequest.objects.select_related(
         "driver", "station", "station_branch__district__city", "approved_by"
     ).order_by("-id")
-    filter_backends = [DjangoFilterBackend, SearchFilter]
+    filter_backends = [DjangoFilterBackend, SearchTextFilter]
     filterset_class = CashRequestFilter
-    search_fields = ["driver__code", "driver__name", "driver__phone_number"]
+    search_fields = SEARCH_PATHS[CompanyCashRequest]
     http_method_names = ["get", "post", "patch", "delete"]
 
     def get_permissions(self):
@@ -72,7 +73,7 @@ class CompanyCashRequestViewSet(InjectCompanyUserMixin, viewsets.ModelViewSet):
             )
         if self.request.user.role == User.UserRoles.StationBranchManager:
             return self.queryset.filter(
-                station_branch__station__branches__managers__user=self.request.user
+                station_branch__station_id__in=get_scope(self.request).station_ids
             )
         if self.request.user.role == User.UserRoles.StationWorker:
             if self.request.query_params.get("driver_code") or self.action == "PATCH":
@@ -129,6 +130,7 @@ class CompanyCashRequestViewSet(InjectCompanyUserMixin, viewsets.ModelViewSet):
             )
         },
     )
+    @idempotent
     @transaction.atomic
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(
@@ -152,20 +154,16 @@ class CompanyCashRequestViewSet(InjectCompanyUserMixin, viewsets.ModelViewSet):
         company_owner_id = None
         if request.user.role == User.UserRoles.CompanyOwner:
             company_owner_id = request.user.id
-            Company.objects.select_for_update().filter(id=request.company_id).update(
-                balance=F("balance") - company_cost
-            )
+            ledger.debit(company_branch.company, company_cost)
         else:
-            CompanyBranch.objects.select_for_update().filter(
-                drivers__id=request.data["driver"]
-            ).update(balance=F("balance") - company_cost)
+            ledger.debit(company_branch, company_cost)
 
         cash_request.company_cost = company_cost
         cash_request.save()
 
         if company_owner_id:
-            Notification.objects.create(
-                user_id=company_owner_id,
+            Notification.objects.fan_out(
+                [company_owner_id],
                 title=f"تم ارسال طلب نقدي الي السائق {cash_request.driver.name} ورمز التفعيل {cash_request.otp}",
                 description=f"تم ارسال طلب نقدي الي السائق {cash_request.driver.name} ورمز التفعيل {cash_request.otp}",
                 type=Notification.NotificationType.GENERAL,
@@ -179,19 +177,16 @@ class CompanyCashRequestViewSet(InjectCompanyUserMixin, viewsets.ModelViewSet):
             item.status = CompanyCashRequest.Status.REJECTED
             item.save()
             if request.user.role == User.UserRoles.CompanyOwner:
-                Company.objects.filter(id=request.company_id).update(
-                    balance=F("balance") + item.company_cost
-                )
+                ledger.credit(item.driver.branch.company, item.company_cost)
             else:
-                CompanyBranch.objects.select_for_update().filter(
-                    drivers__id=item.driver_id
-                ).update(balance=F("balance") + item.company_cost)
+                ledger.credit(item.driver.branch, item.company_cost)
             return Response(status=status.HTTP_204_NO_CONTENT)
         raise CustomValidationError(
             message="لا يمكنك الغاء العمليه وهيا بالحالة " + item.status,
             status_code=status.HTTP_400_BAD_REQUEST,
         )
 
+    @idempotent
     @transaction.atomic
     def partial_update(self, request, *args, **kwargs):
         cash_request = CompanyCashRequest.objects.filter(id=kwargs["pk"]).first()
@@ -234,27 +229,31 @@ class CompanyCashRequestViewSet(InjectCompanyUserMixin, viewsets.ModelViewSet):
             company_id=company_branch.company_id
         ).first()
         notification_users.append(company_owner.id)
-        for user_id in notification_users:
-            Notification.objects.create(
-                user_id=user_id,
-                title=message,
-                description=message,
-                type=Notification.NotificationType.MONEY,
-            )
+        Notification.objects.fan_out(
+            notification_users,
+            title=message,
+            description=message,
+            type=Notification.NotificationType.MONEY,
+        )
 
         # station
         station_cost = (
             cash_request.amount * station_branch.cash_request_fees / 100
         ) + cash_request.amount
         message = f"تم تسليم طلب نقدي بقيمة {station_cost:.2f} للسائق {cash_request.driver.name}"  # noqa
-        generate_station_transaction(
-            station_id=station_branch.station_id,
-            station_branch_id=station_branch.id,
-            amount=station_cost,
-            status=KhaznaTransaction.TransactionStatus.APPROVED,
-            description=message,
-            created_by_id=request.user.id,
-            is_internal=False,
+        ledger.debit(
+            station_branch,
+            station_cost,
+            allow_overdraft=True,
+            record=build_station_transaction(
+                station_id=station_branch.station_id,
+                station_branch_id=station_branch.id,
+                amount=station_cost,
+                status=KhaznaTransaction.TransactionStatus.APPROVED,
+                description=message,
+                created_by_id=request.user.id,
+                is_internal=False,
+            ),
         )
         notification_users = list(
             StationBranchManager.objects.filter(
@@ -266,17 +265,12 @@ class CompanyCashRequestViewSet(InjectCompanyUserMixin, viewsets.ModelViewSet):
         ).first()
         notification_users.append(station_owner.id)
         notification_users.append(request.user.id)
-        notification_users = list(set(notification_users))
-        for user_id in notification_users:
-            Notification.objects.create(
-                user_id=user_id,
-                title=message,
-                description=message,
-                type=Notification.NotificationType.MONEY,
-            )
-        StationBranch.objects.select_for_update().filter(
-            id=cash_request.station_branch_id
-        ).update(balance=F("balance") - station_cost)
+        Notification.objects.fan_out(
+            notification_users,
+            title=message,
+            description=message,
+            type=Notification.NotificationType.MONEY,
+        )
 
         cash_request.station_cost = station_cost
         cash_request.save(update_fields=["station_cost"])
@@ -1,8 +1,5 @@
-from datetime import timedelta
-
 from django.db import transaction
-from django.db.models import Count, Q, Sum
-from django.utils import timezone
+from django.db.models import Count, Sum
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import (
@@ -16,10 +13,11 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView, Response, status
 
+from apps.accounting import ledger
 from apps.accounting.api.v1.serializers.company_transaction_serializer import (
     ListCompanyKhaznaTransactionSerializer,
 )
-from apps.accounting.helpers import generate_company_transaction
+from apps.accounting.helpers import build_company_transaction
 from apps.accounting.models import CompanyKhaznaTransaction
 from apps.companies.api.v1.filters import CompanyBranchFilter, CompanyFilter
 from apps.companies.api.v1.serializers.branch_serializers import (
@@ -41,11 +39,13 @@ from apps.companies.api.v1.serializers.company_serializer import (
     ListCompanySerializer,
 )
 from apps.companies.models.company_cash_models import CompanyCashRequest
-from apps.companies.models.company_models import Car, Company, CompanyBranch
+from apps.companies.models.company_models import Company, CompanyBranch
 from apps.companies.models.operation_model import CarOperation
+from apps.companies.rollups import get_company_rollup
 from apps.notifications.models import Notification
-from apps.shared.base_exception_class import CustomValidationError
+from apps.shared.idempotency import idempotent
 from apps.shared.mixins.inject_user_mixins import InjectUserMixin
+from apps.shared.mixins.name_list_mixins import StreamingNameListMixin
 from apps.shared.permissions import (
     CompanyOwnerPermission,
     CompanyPermission,
@@ -53,9 +53,10 @@ from apps.shared.permissions import (
     EitherPermission,
 )
 from apps.users.models import CompanyBranchManager, User
+from apps.users.scope import get_scope, invalidate_scope
 
 
-class CompanyViewSet(InjectUserMixin, viewsets.ModelViewSet):
+class CompanyViewSet(StreamingNameListMixin, InjectUserMixin, viewsets.ModelViewSet):
     queryset = (
         Company.objects.select_related("district")
         .annotate(
@@ -67,6 +68,11 @@ class CompanyViewSet(InjectUserMixin, viewsets.ModelViewSet):
         .order_by("-id")
     )
 
+    def get_queryset(self):
+        if self.action == "list" and self.is_name_list():
+            return Company.objects.order_by("-id")
+        return super().get_queryset()
+
     def get_serializer_class(self):
         if self.request.method == "GET":
             if self.request.query_params.get("no_paginate", "").lower() == "true":
@@ -80,7 +86,9 @@ class CompanyViewSet(InjectUserMixin, viewsets.ModelViewSet):
     search_fields = ["name", "phone_number"]
 
 
-class CompanyBranchViewSet(InjectUserMixin, viewsets.ModelViewSet):
+class CompanyBranchViewSet(
+    StreamingNameListMixin, InjectUserMixin, viewsets.ModelViewSet
+):
     queryset = CompanyBranch.objects.order_by("-id")
     filter_backends = [DjangoFilterBackend]
     filterset_class = CompanyBranchFilter
@@ -100,7 +108,7 @@ class CompanyBranchViewSet(InjectUserMixin, viewsets.ModelViewSet):
         return super().get_permissions()
 
     def get_queryset(self):
-        if self.request.query_params.get("no_paginate", "").lower() != "true":
+        if not self.is_name_list():
             self.queryset = (
                 self.queryset.select_related("district__city", "company")
                 .prefetch_related("managers")
@@ -113,8 +121,10 @@ class CompanyBranchViewSet(InjectUserMixin, viewsets.ModelViewSet):
         if self.request.user.role == User.UserRoles.CompanyOwner:
             self.queryset = self.queryset.filter(company=self.request.company_id)
         if self.request.user.role == User.UserRoles.CompanyBranchManager:
-            self.queryset = self.queryset.filter(managers__user=self.request.user)
-        return self.queryset.distinct()
+            self.queryset = self.queryset.filter(
+                id__in=get_scope(self.request).company_branch_ids
+            )
+        return self.queryset
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -179,6 +189,7 @@ class CompanyBranchViewSet(InjectUserMixin, viewsets.ModelViewSet):
                     for user_id in managers
                 ]
             )
+            invalidate_scope(*managers)
 
         return Response(
             {"message": "تم تعيين المديرين بنجاح"}, status=status.HTTP_200_OK
@@ -217,88 +228,51 @@ class CompanyBranchViewSet(InjectUserMixin, viewsets.ModelViewSet):
         url_path="update-balance",
         url_name="update_balance",
     )
+    @idempotent
     def update_balance(self, request, *args, **kwargs):
         company_branch = self.get_object()
         company = company_branch.company
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
+        amount = serializer.validated_data["amount"]
         with transaction.atomic():
             if serializer.validated_data["type"] == "add":
-                company.refresh_from_db()
-                if company.balance >= serializer.validated_data["amount"]:
-                    company.balance -= serializer.validated_data["amount"]
-                    company.save()
-                    company_branch.refresh_from_db()
-                    company_branch.balance += serializer.validated_data["amount"]
-                    company_branch.save()
-                    message = f"تم شحن رصيد فرع {company_branch.name} برصيد {serializer.validated_data['amount']}"
-                    generate_company_transaction(
-                        company_id=self.request.company_id,
-                        company_branch_id=company_branch.id,
-                        amount=serializer.validated_data["amount"],
-                        status=CompanyKhaznaTransaction.TransactionStatus.APPROVED,
-                        description=message,
-                        is_internal=True,
-                        for_what=CompanyKhaznaTransaction.ForWhat.CAR,
-                        created_by_id=request.user.id,
-                    )
-                    notification_users = list(
-                        company_branch.managers.values_list("user_id", flat=True)
-                    )
-                    notification_users.append(request.user.id)
-                    for user_id in notification_users:
-                        Notification.objects.create(
-                            user_id=user_id,
-                            title=message,
-                            description=message,
-                            type=Notification.NotificationType.MONEY,
-                        )
-                else:
-                    raise CustomValidationError(
-                        message="الشركة لا تمتلك كافٍ من المال",
-                        code="not_enough_balance",
-                        errors=[],
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                    )
-            elif serializer.validated_data["type"] == "subtract":
-                company_branch.refresh_from_db()
-                if company_branch.balance >= serializer.validated_data["amount"]:
-                    company_branch.balance -= serializer.validated_data["amount"]
-                    company_branch.save()
-                    company.refresh_from_db()
-                    company.balance += serializer.validated_data["amount"]
-                    company.save()
-                    notification_users = list(
-                        company_branch.managers.values_list("user_id", flat=True)
-                    )
-                    notification_users.append(request.user.id)
-                    message = f"تم خصم مبلغ {serializer.validated_data['amount']} من رصيد فرع {company_branch.name}"
-                    generate_company_transaction(
-                        company_id=self.request.company_id,
-                        company_branch_id=company_branch.id,
-                        amount=serializer.validated_data["amount"],
-                        status=CompanyKhaznaTransaction.TransactionStatus.APPROVED,
-                        description=message,
-                        is_internal=True,
-                        for_what=CompanyKhaznaTransaction.ForWhat.CAR,
-                        created_by_id=request.user.id,
-                    )
-                    for user_id in notification_users:
-                        Notification.objects.create(
-                            user_id=user_id,
-                            title=message,
-                            description=message,
-                            type=Notification.NotificationType.MONEY,
-                        )
-                else:
-                    raise CustomValidationError(
-                        message="الفرع لا تمتلك كافٍ من المال",
-                        code="not_enough_balance",
-                        errors=[],
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                    )
+                message = f"تم شحن رصيد فرع {company_branch.name} برصيد {amount}"
+                source, destination = company, company_branch
+                error_message = "الشركة لا تمتلك كافٍ من المال"
+            else:
+                message = f"تم خصم مبلغ {amount} من رصيد فرع {company_branch.name}"
+                source, destination = company_branch, company
+                error_message = "الفرع لا تمتلك كافٍ من المال"
+            ledger.transfer(
+                source,
+                destination,
+                amount,
+                error_message=error_message,
+                record=build_company_transaction(
+                    company_id=self.request.company_id,
+                    company_branch_id=company_branch.id,
+                    amount=amount,
+                    status=CompanyKhaznaTransaction.TransactionStatus.APPROVED,
+                    description=message,
+                    is_internal=True,
+                    for_what=CompanyKhaznaTransaction.ForWhat.CAR,
+                    created_by_id=request.user.id,
+                ),
+            )
+            notification_users = list(
+                company_branch.managers.values_list("user_id", flat=True)
+            )
+            notification_users.append(request.user.id)
+            Notification.objects.fan_out(
+                notification_users,
+                title=message,
+                description=message,
+                type=Notification.NotificationType.MONEY,
+            )
 
+        company_branch.refresh_from_db(fields=["balance"])
         return Response({"balance": company_branch.balance}, status=status.HTTP_200_OK)
 
 
@@ -310,67 +284,12 @@ class CompanyHomeView(APIView):
             branches_id = CompanyBranch.objects.filter(
                 company_id=request.company_id
             ).values_list("id", flat=True)
+            rollup = get_company_rollup(request.company_id)
+            company = rollup.company if rollup else None
         elif self.request.user.role == User.UserRoles.CompanyBranchManager:
-            branches_id = CompanyBranch.objects.filter(
-                managers__user_id=request.user.id
-            ).values_list("id", flat=True)
-
-        branches_filter = Q(branches__id__in=set(branches_id))
-
-        diesel_car_filter = Q(
-            branches__cars__fuel_type=Car.FuelType.DIESEL, branches__id__in=branches_id
-        )
-        gasoline_car_filter = Q(
-            branches__cars__fuel_type=Car.FuelType.GASOLINE,
-            branches__id__in=branches_id,
-        )
-        drivers_lincense_expiration_date_filter = Q(
-            branches__drivers__lincense_expiration_date__lt=timezone.localtime().date(),
-            branches__id__in=branches_id,
-        )
-        drivers_lincense_expiration_date_filter_30_days = Q(
-            branches__drivers__lincense_expiration_date__lt=timezone.localtime().date()
-            - timedelta(days=30),
-            branches__id__in=branches_id,
-        )
-
-        company = (
-            Company.objects.filter(id=request.company_id)
-            .annotate(
-                total_cars_count=Count(
-                    "branches__cars", distinct=True, filter=branches_filter
-                ),
-                diesel_cars_count=Count(
-                    "branches__cars", filter=diesel_car_filter, distinct=True
-                ),
-                gasoline_cars_count=Count(
-                    "branches__cars", filter=gasoline_car_filter, distinct=True
-                ),
-                total_drivers_count=Count(
-                    "branches__drivers", distinct=True, filter=branches_filter
-                ),
-                total_drivers_with_lincense_expiration_date=Count(
-                    "branches__drivers",
-                    filter=drivers_lincense_expiration_date_filter,
-                    distinct=True,
-                ),
-                total_drivers_with_lincense_expiration_date_30_days=Count(
-                    "branches__drivers",
-                    filter=drivers_lincense_expiration_date_filter_30_days,
-                    distinct=True,
-                ),
-                total_branches_count=Count(
-                    "branches", distinct=True, filter=branches_filter
-                ),
-                cars_balance=Sum(
-                    "branches__cars__balance", filter=branches_filter, distinct=True
-                ),
-                branches_balance=Sum(
-                    "branches__balance", filter=branches_filter, distinct=True
-                ),
-            )
-            .first()
-        )
+            branches_id = list(get_scope(request).company_branch_ids)
+            rollup = get_company_rollup(request.company_id, branches_id)
+            company = Company.objects.filter(id=request.company_id).first()
         if not company:
             return Response(
                 {"message": "Company not found"}, status=status.HTTP_404_NOT_FOUND
@@ -382,40 +301,34 @@ class CompanyHomeView(APIView):
             ).aggregate(Sum("amount"))["amount__sum"]
             or 0
         )
-        company.cars_balance = company.cars_balance if company.cars_balance else 0
-        company.branches_balance = (
-            company.branches_balance if company.branches_balance else 0
-        )
 
         if self.request.user.role == User.UserRoles.CompanyOwner:
-            base_balance = company.balance if company.balance else 0
+            base_balance = company.balance
             total_balance = (
                 company.balance
-                + company.cars_balance
-                + company.branches_balance
+                + rollup.cars_balance
+                + rollup.branches_balance
                 + cash_requests_balance
             )
         elif self.request.user.role == User.UserRoles.CompanyBranchManager:
-            base_balance = company.branches_balance if company.branches_balance else 0
-            total_balance = base_balance + company.cars_balance + cash_requests_balance
+            base_balance = rollup.branches_balance
+            total_balance = base_balance + rollup.cars_balance + cash_requests_balance
 
         response_data = {
             "name": company.name,
-            "total_cars_count": company.total_cars_count,
-            "diesel_cars_count": company.diesel_cars_count,
-            "gasoline_cars_count": company.gasoline_cars_count,
-            "total_drivers_count": company.total_drivers_count,
-            "total_drivers_with_lincense_expiration_date": company.total_drivers_with_lincense_expiration_date,
-            "total_drivers_with_lincense_expiration_date_30_days": company.total_drivers_with_lincense_expiration_date_30_days,
-            "total_branches_count": company.total_branches_count,
-            "total_branch_count": company.total_branches_count,
+            "total_cars_count": rollup.cars_count,
+            "diesel_cars_count": rollup.diesel_cars_count,
+            "gasoline_cars_count": rollup.gasoline_cars_count,
+            "total_drivers_count": rollup.drivers_count,
+            "total_drivers_with_lincense_expiration_date": rollup.expired_license_drivers_count,
+            "total_drivers_with_lincense_expiration_date_30_days": rollup.expired_license_30_days_drivers_count,
+            "total_branches_count": rollup.branches_count,
+            "total_branch_count": rollup.branches_count,
             "balance": base_balance,
-            "cars_balance": company.cars_balance if company.cars_balance else 0,
-            "branches_balance": (
-                company.branches_balance if company.branches_balance else 0
-            ),
+            "cars_balance": rollup.cars_balance,
+            "branches_balance": rollup.branches_balance,
             "cash_requests_balance": cash_requests_balance,
-            "total_balance": total_balance if total_balance else 0,
+            "total_balance": total_balance,
         }
 
         response_data["car_operations"] = ListCompanyHomeCarOperationSerializer(
@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class CompaniesConfig(AppConfig):
@@ -7,3 +8,6 @@ class CompaniesConfig(AppConfig):
 
     def ready(self):
         import apps.companies.signals  # noqa
+        from apps.shared.generate_code import check_code_permutation_key
+
+        checks.register(check_code_permutation_key)
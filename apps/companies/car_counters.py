@@ -0,0 +1,137 @@
+"""
+Per-car state that driver verification reads on every scan, kept in the cache.
+
+`fuelings_key` holds the number of completed petrol/diesel operations of a
+car created on a day, `open_key` the id of its pending or in-progress
+operation (0 when there is none). A missing key is read from the database and
+cached again. An operation changing status drops the keys right away, so the
+rest of its transaction reads the database, and writes the committed values
+after the commit, since the cache can't take part in the transaction.
+rebuild_car_counters rewrites the keys of every car.
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from apps.companies.models.company_models import Car
+from apps.companies.models.operation_model import CarOperation
+from apps.shared.helpers import day_range
+from apps.stations.models.service_models import Service
+
+COUNTER_TIMEOUT = 60 * 60
+REBUILD_BATCH_SIZE = 1000
+FUEL_SERVICE_TYPES = [Service.ServiceType.PETROL, Service.ServiceType.DIESEL]
+OPEN_STATUSES = [
+    CarOperation.OperationStatus.PENDING,
+    CarOperation.OperationStatus.IN_PROGRESS,
+]
+
+
+def fuelings_key(car_id, day):
+    return f"car_fuelings:{car_id}:{day.isoformat()}"
+
+
+def open_key(car_id):
+    return f"car_open_operation:{car_id}"
+
+
+def fuelings_queryset(day):
+    start, end = day_range(day)
+    return CarOperation.objects.filter(
+        status=CarOperation.OperationStatus.COMPLETED,
+        created__gte=start,
+        created__lt=end,
+        service__type__in=FUEL_SERVICE_TYPES,
+    )
+
+
+def count_fuelings(car_id, day):
+    return fuelings_queryset(day).filter(car_id=car_id).count()
+
+
+def find_open_operation(car_id):
+    return (
+        CarOperation.objects.filter(car_id=car_id, status__in=OPEN_STATUSES)
+        .values_list("id", flat=True)
+        .first()
+        or 0
+    )
+
+
+def get_car_counters(car_id):
+    """Today's fuelings and the open operation id (or 0) of a car."""
+    day = timezone.localdate()
+    fuelings_cache_key, open_cache_key = fuelings_key(car_id, day), open_key(car_id)
+    cached = cache.get_many([fuelings_cache_key, open_cache_key])
+
+    fuelings = cached.get(fuelings_cache_key)
+    if fuelings is None:
+        fuelings = count_fuelings(car_id, day)
+        cache.add(fuelings_cache_key, fuelings, COUNTER_TIMEOUT)
+    open_operation = cached.get(open_cache_key)
+    if open_operation is None:
+        open_operation = find_open_operation(car_id)
+        cache.add(open_cache_key, open_operation, COUNTER_TIMEOUT)
+    return fuelings, open_operation
+
+
+def remember_status(instance):
+    instance._counter_status = instance.__dict__.get("status")
+
+
+def track_status_change(instance, created=False, deleted=False):
+    old_status = None if created else getattr(instance, "_counter_status", None)
+    new_status = None if deleted else instance.status
+    if not created and not deleted and old_status == new_status:
+        return
+    remember_status(instance)
+
+    car_id, operation_id = instance.car_id, instance.id
+    day = timezone.localtime(instance.created).date()
+    completed = new_status == CarOperation.OperationStatus.COMPLETED
+    keys = [open_key(car_id)]
+    if completed:
+        keys.append(fuelings_key(car_id, day))
+    cache.delete_many(keys)
+
+    def write_counters():
+        counters = {
+            open_key(car_id): operation_id if new_status in OPEN_STATUSES else 0
+        }
+        if completed:
+            counters[fuelings_key(car_id, day)] = count_fuelings(car_id, day)
+        cache.set_many(counters, COUNTER_TIMEOUT)
+
+    transaction.on_commit(write_counters)
+
+
+def rebuild_car_counters():
+    """Write today's counters of every car, returns the number of cars."""
+    day = timezone.localdate()
+    fuelings = dict(
+        fuelings_queryset(day)
+        .values("car_id")
+        .annotate(count=Count("id"))
+        .values_list("car_id", "count")
+    )
+    open_operations = dict(
+        CarOperation.objects.filter(status__in=OPEN_STATUSES).values_list(
+            "car_id", "id"
+        )
+    )
+    counters = {}
+    cars = 0
+    for car_id in Car.objects.values_list("id", flat=True).iterator(
+        chunk_size=REBUILD_BATCH_SIZE
+    ):
+        counters[fuelings_key(car_id, day)] = fuelings.get(car_id, 0)
+        counters[open_key(car_id)] = open_operations.get(car_id, 0)
+        cars += 1
+        if len(counters) >= REBUILD_BATCH_SIZE:
+            cache.set_many(counters, COUNTER_TIMEOUT)
+            counters = {}
+    if counters:
+        cache.set_many(counters, COUNTER_TIMEOUT)
+    return cars
@@ -1,14 +1,17 @@
 import os
+import uuid
 
 from django.conf import settings
 from django.utils import timezone
 from openpyxl import Workbook
-from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
 from openpyxl.utils import get_column_letter
 from rest_framework import status
 
-from apps.companies.models.operation_model import Car, CarOperation
+from apps.companies.models.operation_model import CarOperation
 from apps.shared.base_exception_class import CustomValidationError
+from apps.shared.filters import timestamp_bounds
 from apps.shared.send_sms import send_sms
 
 
@@ -27,14 +30,15 @@ def get_car_operations_data(*args, **kwargs):
         )
         .select_related("car", "driver", "station_branch", "worker", "service")
         .order_by("id")
-    ).distinct()
+    )
     if kwargs.get("car"):
         queryset = queryset.filter(car_id=kwargs.get("car"))
     date_from = kwargs.get("date_from")
     if date_from:
         try:
             date_from = timezone.localtime().strptime(date_from, "%Y-%m-%d").date()
-            queryset = queryset.filter(start_time__date__gte=date_from)
+            start, _ = timestamp_bounds(date_from=date_from)
+            queryset = queryset.filter(start_time__gte=start)
         except ValueError:
             raise CustomValidationError(
                 message="Invalid date from format",
@@ -44,7 +48,8 @@ def get_car_operations_data(*args, **kwargs):
     if date_to:
         try:
             date_to = timezone.localtime().strptime(date_to, "%Y-%m-%d").date()
-            queryset = queryset.filter(start_time__date__lte=date_to)
+            _, end = timestamp_bounds(date_to=date_to)
+            queryset = queryset.filter(start_time__lt=end)
         except ValueError:
             raise CustomValidationError(
                 message="Invalid date to format",
@@ -60,161 +65,173 @@ def send_cash_request_otp(instance):
     send_sms(message, instance.driver.phone_number)
 
 
-def export_car_operations(*args, **kwargs):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Data Export"
+EXPORT_COLUMN_WIDTHS = (18, 18, 16, 24, 14, 14, 14)
+EXPORT_HEADER = (
+    "التكلفة",
+    "rate of fuel cons",
+    "الوقود المستهلك",
+    "عدد كيلو مترات المطروحة",
+    "آخر عداد",
+    "أول عداد",
+    "التاريخ",
+)
+EXPORT_CHUNK_SIZE = 2000
+
+
+def export_filename():
+    timestamp = timezone.localtime().strftime("%Y%m%d_%H%M%S")
+    return f"export_{timestamp}_{uuid.uuid4().hex[:8]}.xlsx"
+
+
+def export_car_operations(filename, **kwargs):
+    """
+    Write the completed operations matching `kwargs` (see
+    get_car_operations_data) to MEDIA_ROOT/excel_exports/`filename`, one block
+    per car with its header and total rows.
+
+    Rows are streamed from one query ordered by car into a write-only
+    workbook, so memory stays flat whatever the number of operations.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Data Export")
+    # write-only sheets can't be measured afterwards, widths are fixed upfront
+    for col, width in enumerate(EXPORT_COLUMN_WIDTHS, start=1):
+        ws.column_dimensions[get_column_letter(col)].width = width
+
     center_alignment = Alignment(horizontal="center", vertical="center")
-    cars = Car.objects.filter(
-        branch__company=kwargs.get("company_id"),
-        operations__status=CarOperation.OperationStatus.COMPLETED,
-    ).distinct()
-    if kwargs.get("car"):
-        cars = cars.filter(id=kwargs.get("car"))
-    is_first_car = True
-
-    for car in cars:
-        if not is_first_car:
-            empty_row = ["", "", "", "", "", "", ""]
-            ws.append(empty_row)
-            ws.append(empty_row)
-        is_first_car = False
-
-        # Row with car number + "العربية"
-        car_number_row = ["", "", "", "", "", str(car), "العربية"]
-        ws.append(car_number_row)
-
-        # Style car row: black text + gray background
-        bold_font = Font(bold=True, color="000000")  # black text
-        car_fill = PatternFill(
-            start_color="D9D9D9", end_color="D9D9D9", fill_type="solid"
-        )  # gray
-        row_index = ws.max_row
-        for col in range(1, ws.max_column + 1):
-            cell = ws.cell(row=row_index, column=col)
-            cell.font = bold_font
-            cell.fill = car_fill
-            cell.alignment = center_alignment
-
-        # Header row
-        operation_export_header = [
-            "التكلفة",
-            "rate of fuel cons",
-            "الوقود المستهلك",
-            "عدد كيلو مترات المطروحة",
-            "آخر عداد",
-            "أول عداد",
-            "التاريخ",
-        ]
-        ws.append(operation_export_header)
-
-        # Style header row (blue background + white bold text)
-        header_fill = PatternFill(
-            start_color="527993", end_color="527993", fill_type="solid"
-        )  # blue
-        header_font = Font(bold=True, color="FFFFFF")  # white text
-        row_index = ws.max_row
-        for col in range(1, ws.max_column + 1):
-            cell = ws.cell(row=row_index, column=col)
-            cell.font = header_font
-            cell.fill = header_fill
-
-        # Data rows (alternate colors)
-        kwargs["car"] = car.id
-        car_operations = get_car_operations_data(*args, **kwargs)
-
-        light_fill1 = PatternFill(
-            start_color="E5E4E0", end_color="E5E4E0", fill_type="solid"
-        )  # white
-        light_fill2 = PatternFill(
-            start_color="FFFDE7", end_color="FFFDE7", fill_type="solid"
-        )  # light yellow
-        tota_amount = 0
-        total_rate = 0
-        total_cost = 0
-        for idx, row in enumerate(car_operations):
-            cleaned_row = [
-                f"{row.company_cost} جنيه",
-                row.fuel_consumption_rate or 0,
-                row.amount,
-                (row.car_meter - row.car_first_meter) or 0,
-                row.car_meter,
-                row.car_first_meter,
-                row.created.date(),
-            ]
-            ws.append(cleaned_row)
-            tota_amount += row.amount
-            if row.fuel_consumption_rate:
-                total_rate += row.fuel_consumption_rate
-            total_cost += row.company_cost
-            # Apply alternating colors
-            row_index = ws.max_row
-            fill = light_fill1 if idx % 2 == 0 else light_fill2
-            for col in range(1, ws.max_column + 1):
-                cell = ws.cell(row=row_index, column=col)
-                cell.fill = fill
-                cell.alignment = center_alignment
-                col_letter = get_column_letter(col)
-                current_width = ws.column_dimensions[col_letter].width or 0
-
-                # Check length of current cell value
-                if cell.value:
-                    length = len(str(cell.value)) + 2  # Add small padding
-                    if length > current_width:
-                        ws.column_dimensions[col_letter].width = length
-
-        # total row
-        total_row = [
-            f"{total_cost} جنيه",
-            total_rate,
-            tota_amount,
-            "",
-            "",
-            "",
-            "الاجمالي",
-        ]
-        ws.append(total_row)
-        row_index = ws.max_row
-        fill = light_fill1
-        for col in range(1, ws.max_column + 1):
-            cell = ws.cell(row=row_index, column=col)
-            cell.fill = fill
-            cell.font = bold_font
-            cell.alignment = center_alignment
-            cell.border = Border(
-                left=Side(border_style="thin", color="000000"),
-                right=Side(border_style="thin", color="000000"),
-                top=Side(border_style="thin", color="000000"),
-                bottom=Side(border_style="thin", color="000000"),
+    bold_font = Font(bold=True, color="000000")  # black text
+    thin_side = Side(border_style="thin", color="000000")
+
+    def solid_fill(color):
+        return PatternFill(start_color=color, end_color=color, fill_type="solid")
+
+    # registered once, cells only point at them (much cheaper than per cell styling)
+    for style in (
+        NamedStyle(
+            name="export_car",
+            font=bold_font,
+            fill=solid_fill("D9D9D9"),  # gray
+            alignment=center_alignment,
+        ),
+        NamedStyle(
+            name="export_header",
+            font=Font(bold=True, color="FFFFFF"),  # white text
+            fill=solid_fill("527993"),  # blue
+        ),
+        NamedStyle(
+            name="export_row_0", fill=solid_fill("E5E4E0"), alignment=center_alignment
+        ),
+        NamedStyle(
+            name="export_row_1",
+            fill=solid_fill("FFFDE7"),  # light yellow
+            alignment=center_alignment,
+        ),
+        NamedStyle(
+            name="export_total",
+            font=bold_font,
+            fill=solid_fill("E5E4E0"),
+            alignment=center_alignment,
+            border=Border(
+                left=thin_side, right=thin_side, top=thin_side, bottom=thin_side
+            ),
+        ),
+    ):
+        wb.add_named_style(style)
+
+    def styled_row(values, style):
+        row = []
+        for value in values:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.style = style
+            row.append(cell)
+        return row
+
+    def write_total(totals):
+        total_cost, total_rate, total_amount = totals
+        ws.append(
+            styled_row(
+                [
+                    f"{total_cost} جنيه",
+                    total_rate,
+                    total_amount,
+                    "",
+                    "",
+                    "",
+                    "الاجمالي",
+                ],
+                "export_total",
             )
-            col_letter = get_column_letter(col)
-            current_width = ws.column_dimensions[col_letter].width or 0
-
-            # Check length of current cell value
-            if cell.value:
-                length = len(str(cell.value)) + 2  # Add small padding
-                if length > current_width:
-                    ws.column_dimensions[col_letter].width = length
-            cell = ws.cell(row=row_index, column=col)
-            cell.fill = fill
-            cell.font = bold_font
-            cell.alignment = center_alignment
-            col_letter = get_column_letter(col)
-            current_width = ws.column_dimensions[col_letter].width or 0
-
-            # Check length of current cell value
-            if cell.value:
-                length = len(str(cell.value)) + 2  # Add small padding
-                if length > current_width:
-                    ws.column_dimensions[col_letter].width = length
-
-    # Generate filename with timestamp
-    timestamp = timezone.localtime().strftime("%Y%m%d_%H%M%S")
-    filename = f"export_{timestamp}.xlsx"
+        )
+
+    operations = (
+        get_car_operations_data(**kwargs)
+        .select_related(None)
+        .order_by("car_id", "id")
+        .values_list(
+            "car_id",
+            "car__code",
+            "car__plate_number",
+            "car__plate_character",
+            "company_cost",
+            "fuel_consumption_rate",
+            "amount",
+            "car_meter",
+            "car_first_meter",
+            "created",
+        )
+    )
+    current_car, totals, idx = None, None, 0
+    for (
+        car_id,
+        car_code,
+        plate_number,
+        plate_character,
+        company_cost,
+        fuel_consumption_rate,
+        amount,
+        car_meter,
+        car_first_meter,
+        created,
+    ) in operations.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        if car_id != current_car:
+            if current_car is not None:
+                write_total(totals)
+                ws.append([""] * 7)
+                ws.append([""] * 7)
+            current_car, totals, idx = car_id, [0, 0, 0], 0
+            car_name = (
+                plate_character + " - " + plate_number if plate_number else car_code
+            )
+            ws.append(
+                styled_row(["", "", "", "", "", car_name, "العربية"], "export_car")
+            )
+            ws.append(styled_row(EXPORT_HEADER, "export_header"))
+
+        ws.append(
+            styled_row(
+                [
+                    f"{company_cost} جنيه",
+                    fuel_consumption_rate or 0,
+                    amount,
+                    (car_meter - car_first_meter) or 0,
+                    car_meter,
+                    car_first_meter,
+                    timezone.localtime(created).date(),
+                ],
+                f"export_row_{idx % 2}",
+            )
+        )
+        idx += 1
+        totals[0] += company_cost
+        totals[1] += fuel_consumption_rate or 0
+        totals[2] += amount
+    if current_car is not None:
+        write_total(totals)
+
     excel_dir = os.path.join(settings.MEDIA_ROOT, "excel_exports")
     os.makedirs(excel_dir, exist_ok=True)
     filepath = os.path.join(excel_dir, filename)
-
-    # Save workbook
-    wb.save(filepath)
+    # write next to the target and rename, a download never sees half a file
+    wb.save(filepath + ".part")
+    os.replace(filepath + ".part", filepath)
     return filename
@@ -0,0 +1,107 @@
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from apps.shared.helpers import day_range, start_of
+from apps.shared.partitions import add_months, month_start
+
+PLAIN_TABLE = "operation_benchmark_plain"
+PARTITIONED_TABLE = "operation_benchmark_partitioned"
+EXECUTION_TIME = re.compile(r"Execution Time: ([\d.]+) ms")
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare a day and a month of operations on a plain table with the same "
+        "rows in monthly partitions, --rows rows over --months months "
+        "(postgres only)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=50_000_000)
+        parser.add_argument("--months", type=int, default=24)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("The benchmark needs a postgres database.")
+        rows, months = options["rows"], options["months"]
+        last_month = month_start(timezone.localdate())
+        first_month = add_months(last_month, -months + 1)
+        first, last = start_of(first_month), start_of(add_months(last_month, 1))
+        day_start, day_end = day_range(
+            add_months(last_month, -(months // 2)) + timedelta(days=14)
+        )
+        month_from = start_of(add_months(last_month, -(months // 2)))
+        month_to = start_of(add_months(last_month, -(months // 2) + 1))
+        columns = (
+            "(id bigint NOT NULL, car_id bigint NOT NULL, "
+            "station_branch_id bigint NOT NULL, status varchar(20) NOT NULL, "
+            "cost numeric(10, 2) NOT NULL, created timestamptz NOT NULL)"
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"CREATE TEMP TABLE {PLAIN_TABLE} {columns}")
+            cursor.execute(
+                f"CREATE TEMP TABLE {PARTITIONED_TABLE} {columns} "
+                "PARTITION BY RANGE (created)"
+            )
+            month = first_month
+            while month <= last_month:
+                cursor.execute(
+                    f"CREATE TEMP TABLE {PARTITIONED_TABLE}_{month:%Y_%m} "
+                    f"PARTITION OF {PARTITIONED_TABLE} FOR VALUES FROM (%s) TO (%s)",
+                    [start_of(month), start_of(add_months(month, 1))],
+                )
+                month = add_months(month, 1)
+
+            self.stdout.write(f"Filling {rows} rows...")
+            cursor.execute(
+                f"INSERT INTO {PLAIN_TABLE} "
+                "SELECT i, i %% 20000, i %% 500, "
+                "(ARRAY['completed', 'cancelled'])[1 + i %% 2], "
+                "random() * 1000, %s + random() * (%s - %s) "
+                "FROM generate_series(1, %s) i",
+                [first, last, first, rows],
+            )
+            cursor.execute(
+                f"INSERT INTO {PARTITIONED_TABLE} SELECT * FROM {PLAIN_TABLE}"
+            )
+            for table in (PLAIN_TABLE, PARTITIONED_TABLE):
+                cursor.execute(f"ALTER TABLE {table} ADD PRIMARY KEY (id, created)")
+                cursor.execute(
+                    f"CREATE INDEX ON {table} (station_branch_id, status, created)"
+                )
+                cursor.execute(f"CREATE INDEX ON {table} (status, created)")
+                cursor.execute(f"ANALYZE {table}")
+
+            # a station report of one day and the company export of one month
+            for name, sql, params in (
+                (
+                    "one day of a branch",
+                    "SELECT count(*), sum(cost) FROM {table} "
+                    "WHERE station_branch_id = 7 AND status = 'completed' "
+                    "AND created >= %s AND created < %s",
+                    [day_start, day_end],
+                ),
+                (
+                    "one month",
+                    "SELECT count(*), sum(cost) FROM {table} "
+                    "WHERE status = 'completed' AND created >= %s AND created < %s",
+                    [month_from, month_to],
+                ),
+            ):
+                for table in (PLAIN_TABLE, PARTITIONED_TABLE):
+                    self.explain(
+                        cursor, f"{name}, {table}", sql.format(table=table), params
+                    )
+            cursor.execute(f"DROP TABLE {PARTITIONED_TABLE}, {PLAIN_TABLE}")
+
+    def explain(self, cursor, name, sql, params):
+        cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {sql}", params)
+        plan = "\n".join(row[0] for row in cursor.fetchall())
+        elapsed = EXECUTION_TIME.search(plan).group(1)
+        self.stdout.write(self.style.SUCCESS(f"{name}: {elapsed}ms"))
+        self.stdout.write(plan)
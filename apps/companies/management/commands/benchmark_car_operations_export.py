@@ -0,0 +1,130 @@
+import os
+import resource
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.companies.helper import export_car_operations, export_filename
+from apps.companies.models.company_models import Car, Company, CompanyBranch, Driver
+from apps.companies.models.operation_model import CarOperation
+from apps.stations.models.service_models import Service
+from apps.users.models import Worker
+
+INSERT_BATCH_SIZE = 10_000
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Export --cars x --operations completed car operations of a throwaway "
+        "company and report the time and memory growth. The data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cars", type=int, default=500)
+        parser.add_argument("--operations", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        worker = Worker.objects.select_related("station_branch").first()
+        service = Service.objects.first()
+        if worker is None or service is None:
+            raise CommandError("The benchmark needs a station worker and a service.")
+        try:
+            with transaction.atomic():
+                branch = self.fill(
+                    worker, service, options["cars"], options["operations"]
+                )
+                self.run_export(branch)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def fill(self, worker, service, cars_count, operations_count):
+        self.stdout.write(
+            f"Filling {cars_count} cars x {operations_count} operations..."
+        )
+        company = Company.objects.create(
+            name="Export benchmark", address="-", created_by=worker
+        )
+        branch = CompanyBranch.objects.create(
+            name="Export benchmark", company=company, created_by=worker
+        )
+        driver = Driver.objects.create(
+            name="Export benchmark",
+            phone_number="01000000000",
+            lincense_number="-",
+            lincense_expiration_date=timezone.localdate(),
+            branch=branch,
+            created_by=worker,
+        )
+        cars = Car.objects.bulk_create(
+            [
+                Car(
+                    code=f"bench-{index}",
+                    plate_number=str(index),
+                    plate_character="BEN",
+                    model_year=2020,
+                    is_with_odometer=True,
+                    tank_capacity=60,
+                    permitted_fuel_amount=50,
+                    number_of_fuelings_per_day=3,
+                    number_of_washes_per_month=3,
+                    branch=branch,
+                    created_by=worker,
+                )
+                for index in range(cars_count)
+            ]
+        )
+        now = timezone.now()
+        for car in cars:
+            CarOperation.objects.bulk_create(
+                (
+                    CarOperation(
+                        code=f"bench-{car.id}-{index}",
+                        car=car,
+                        driver=driver,
+                        service=service,
+                        worker=worker,
+                        station_branch=worker.station_branch,
+                        status=CarOperation.OperationStatus.COMPLETED,
+                        start_time=now,
+                        amount=Decimal("20.00"),
+                        company_cost=Decimal("220.00"),
+                        car_first_meter=Decimal(index),
+                        car_meter=Decimal(index + 100),
+                        fuel_consumption_rate=Decimal("5.00"),
+                        created_by=worker,
+                    )
+                    for index in range(operations_count)
+                ),
+                batch_size=INSERT_BATCH_SIZE,
+            )
+        return branch
+
+    def run_export(self, branch):
+        filename = export_filename()
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        started = time.perf_counter()
+        export_car_operations(
+            filename, company_id=branch.company_id, branches=[branch.id]
+        )
+        elapsed = time.perf_counter() - started
+        # kilobytes on linux, how much the export raised the peak resident size
+        peak_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+
+        filepath = os.path.join(settings.MEDIA_ROOT, "excel_exports", filename)
+        size = os.path.getsize(filepath)
+        os.remove(filepath)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"export: {elapsed:.1f}s, peak memory growth {peak_growth / 2**10:.1f}MiB, "
+                f"file {size / 2**20:.1f}MiB"
+            )
+        )
@@ -0,0 +1,89 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.shared.generate_code import CODE_BLOCK_SIZE, CodeSequence
+
+BENCHMARK_TABLE = "code_benchmark"
+BENCHMARK_SEQUENCE = "code_benchmark_seq"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare random probing with the code sequence on a table that already "
+        "holds --rows codes (postgres only)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10_000_000)
+        parser.add_argument("--samples", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("The benchmark needs a postgres database.")
+        rows, samples = options["rows"], options["samples"]
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMP TABLE {BENCHMARK_TABLE} (code varchar(20) PRIMARY KEY)"
+            )
+            cursor.execute(
+                f"CREATE TEMP SEQUENCE {BENCHMARK_SEQUENCE} "
+                f"INCREMENT BY {CODE_BLOCK_SIZE} MINVALUE 0 START WITH 0"
+            )
+            self.stdout.write(f"Filling {rows} rows...")
+            # legacy style 9 digit codes spread over the whole range
+            cursor.execute(
+                f"INSERT INTO {BENCHMARK_TABLE} "
+                "SELECT (100000000 + n * (899999999 / %s))::text "
+                "FROM generate_series(0, %s - 1) n",
+                [rows, rows],
+            )
+            cursor.execute(f"ANALYZE {BENCHMARK_TABLE}")
+
+            probe_timings, probes = [], 0
+            for _ in range(samples):
+                started = time.perf_counter()
+                while True:
+                    probes += 1
+                    code = str(random.randint(10**8, 10**9 - 1))
+                    cursor.execute(
+                        f"SELECT EXISTS(SELECT 1 FROM {BENCHMARK_TABLE} WHERE code = %s)",
+                        [code],
+                    )
+                    if not cursor.fetchone()[0]:
+                        break
+                probe_timings.append(time.perf_counter() - started)
+                cursor.execute(
+                    f"INSERT INTO {BENCHMARK_TABLE} VALUES (%s)",
+                    [code],
+                )
+
+            sequence = CodeSequence(BENCHMARK_SEQUENCE, 10**9, 10**10 - 1)
+            sequence_timings = []
+            for _ in range(samples):
+                started = time.perf_counter()
+                code = sequence.next_code(model=None)
+                sequence_timings.append(time.perf_counter() - started)
+                # a duplicate code would fail on the primary key
+                cursor.execute(f"INSERT INTO {BENCHMARK_TABLE} VALUES (%s)", [code])
+
+            cursor.execute(f"DROP TABLE {BENCHMARK_TABLE}")
+            cursor.execute(f"DROP SEQUENCE {BENCHMARK_SEQUENCE}")
+
+        self.report("random probing", probe_timings)
+        self.stdout.write(f"  probes per code: {probes / samples:.3f}")
+        self.report("code sequence", sequence_timings)
+
+    def report(self, name, timings):
+        timings = sorted(timings)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{name}: mean {statistics.mean(timings) * 1e6:.1f}us, "
+                f"p50 {timings[len(timings) // 2] * 1e6:.1f}us, "
+                f"p99 {timings[int(len(timings) * 0.99)] * 1e6:.1f}us"
+            )
+        )
@@ -0,0 +1,70 @@
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from apps.shared.helpers import day_range
+
+BENCHMARK_TABLE = "date_filter_benchmark"
+EXECUTION_TIME = re.compile(r"Execution Time: ([\d.]+) ms")
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare a created__date filter with the equivalent timestamp range on "
+        "an indexed table of --rows rows spread over --days days (postgres only)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10_000_000)
+        parser.add_argument("--days", type=int, default=365)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("The benchmark needs a postgres database.")
+        rows, days = options["rows"], options["days"]
+        day = timezone.localdate() - timedelta(days=days // 2)
+        start, end = day_range(day)
+        zone = timezone.get_current_timezone_name()
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMP TABLE {BENCHMARK_TABLE} "
+                "(id bigserial PRIMARY KEY, created timestamptz NOT NULL)"
+            )
+            self.stdout.write(f"Filling {rows} rows...")
+            cursor.execute(
+                f"INSERT INTO {BENCHMARK_TABLE} (created) "
+                "SELECT now() - random() * %s * interval '1 day' "
+                "FROM generate_series(1, %s)",
+                [days, rows],
+            )
+            cursor.execute(f"CREATE INDEX ON {BENCHMARK_TABLE} (created)")
+            cursor.execute(f"ANALYZE {BENCHMARK_TABLE}")
+
+            # the SQL Django emits for created__date=day and for day_range(day)
+            self.explain(
+                cursor,
+                "created__date",
+                f"SELECT count(*) FROM {BENCHMARK_TABLE} "
+                "WHERE (created AT TIME ZONE %s)::date = %s",
+                [zone, day],
+            )
+            self.explain(
+                cursor,
+                "timestamp range",
+                f"SELECT count(*) FROM {BENCHMARK_TABLE} "
+                "WHERE created >= %s AND created < %s",
+                [start, end],
+            )
+            cursor.execute(f"DROP TABLE {BENCHMARK_TABLE}")
+
+    def explain(self, cursor, name, sql, params):
+        cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {sql}", params)
+        plan = "\n".join(row[0] for row in cursor.fetchall())
+        scan = "index scan" if "Index" in plan else "sequential scan"
+        elapsed = EXECUTION_TIME.search(plan).group(1)
+        self.stdout.write(self.style.SUCCESS(f"{name}: {scan}, {elapsed}ms"))
+        self.stdout.write(plan)
@@ -0,0 +1,104 @@
+import re
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.accounting.models import CompanyKhaznaTransaction, KhaznaTransaction
+from apps.companies.models.company_cash_models import CompanyCashRequest
+from apps.companies.models.company_models import Car, Company, CompanyBranch, Driver
+from apps.companies.models.operation_model import CarOperation
+from apps.notifications.models import Notification
+from apps.shared.helpers import day_range
+from apps.stations.models.service_models import Service
+from apps.stations.models.stations_models import StationBranch
+from apps.users.models import User, Worker
+
+OPEN_STATUSES = [
+    CarOperation.OperationStatus.PENDING,
+    CarOperation.OperationStatus.IN_PROGRESS,
+]
+# "Seq Scan on companies_caroperation" (postgres), "SCAN companies_caroperation" (sqlite)
+SEQ_SCAN = re.compile(r"(?:Seq Scan on|\bSCAN) (\w+)")
+
+
+def sample_id(model):
+    return model.objects.values_list("id", flat=True).first() or 0
+
+
+def hot_querysets():
+    """The lookups behind the busiest endpoints, with ids taken from the data."""
+    car, driver, user = sample_id(Car), sample_id(Driver), sample_id(User)
+    worker, station_branch = sample_id(Worker), sample_id(StationBranch)
+    branch = sample_id(CompanyBranch)
+    day_start, day_end = day_range(timezone.localdate())
+    return {
+        "open operation of a car": CarOperation.objects.filter(
+            car_id=car, status__in=OPEN_STATUSES
+        ),
+        "daily fuelings of a car": CarOperation.objects.filter(
+            car_id=car,
+            status=CarOperation.OperationStatus.COMPLETED,
+            created__gte=day_start,
+            created__lt=day_end,
+            service__type__in=[Service.ServiceType.PETROL, Service.ServiceType.DIESEL],
+        ),
+        "station branch operations": CarOperation.objects.filter(
+            station_branch_id=station_branch
+        ).order_by("-id")[:20],
+        "open operations of a worker": CarOperation.objects.filter(
+            worker_id=worker, status__in=OPEN_STATUSES
+        ),
+        "latest operations of a company": CarOperation.objects.filter(
+            car__branch__in=[branch]
+        ).order_by("-id")[:3],
+        "completed operations today": CarOperation.objects.filter(
+            status=CarOperation.OperationStatus.COMPLETED,
+            created__gte=day_start,
+            created__lt=day_end,
+        ),
+        "driver cash request in progress": CompanyCashRequest.objects.filter(
+            driver_id=driver, status=CompanyCashRequest.Status.IN_PROGRESS
+        ),
+        "user notifications": Notification.objects.filter(user_id=user).order_by("-id")[
+            :20
+        ],
+        "unread notifications": Notification.objects.filter(
+            user_id=user, is_read=False
+        ),
+        "transactions today": KhaznaTransaction.objects.filter(
+            created__gte=day_start, created__lt=day_end
+        ),
+        "company transactions": CompanyKhaznaTransaction.objects.filter(
+            company_id=sample_id(Company)
+        ).order_by("-id")[:20],
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN the querysets behind the hot API lookups and report the ones "
+        "that still scan a whole table."
+    )
+
+    def handle(self, *args, **options):
+        scanning = 0
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                # small tables are always cheaper to scan, only report the
+                # lookups that have no usable index at all
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+            for name, queryset in hot_querysets().items():
+                plan = queryset.explain()
+                tables = sorted(set(SEQ_SCAN.findall(plan)))
+                if tables:
+                    scanning += 1
+                    self.stdout.write(
+                        self.style.WARNING(f"{name}: scans {', '.join(tables)}")
+                    )
+                    self.stdout.write(plan)
+                else:
+                    self.stdout.write(self.style.SUCCESS(f"{name}: indexed"))
+        if scanning:
+            self.stdout.write(self.style.WARNING(f"{scanning} lookups still scan"))
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils.dateparse import parse_date
+
+from apps.companies.partitions import (
+    TABLE,
+    convert_to_partitioned,
+    create_car_operation_partitions,
+)
+from apps.shared.partitions import (
+    PARTITION_MONTHS_AHEAD,
+    detach_partitions,
+    is_partitioned,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Partition the car operations table by month (postgres only). --convert "
+        "rebuilds the table as a partitioned one once, every run creates the "
+        "partitions of the next --months-ahead months and --detach-before "
+        "detaches the partitions of older months."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--convert", action="store_true")
+        parser.add_argument("--months-ahead", type=int, default=PARTITION_MONTHS_AHEAD)
+        parser.add_argument(
+            "--detach-before",
+            type=parse_date,
+            help="YYYY-MM-DD, partitions of the months before it are detached",
+        )
+        parser.add_argument(
+            "--archive-schema",
+            help="schema the detached partitions are moved into",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Partitioning needs a postgres database.")
+        months_ahead = options["months_ahead"]
+
+        with connection.cursor() as cursor:
+            partitioned = is_partitioned(cursor, TABLE)
+        if options["convert"]:
+            if partitioned:
+                raise CommandError("The table is already partitioned.")
+            partitions = convert_to_partitioned(months_ahead)
+            self.stdout.write(
+                self.style.SUCCESS(f"Converted into {len(partitions)} partitions")
+            )
+        elif not partitioned:
+            raise CommandError("The table isn't partitioned, run with --convert.")
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            created = create_car_operation_partitions(cursor, months_ahead)
+            self.stdout.write(f"Partitions up to {created[-1]} exist")
+            if options["detach_before"]:
+                detached = detach_partitions(
+                    cursor, TABLE, options["detach_before"], options["archive_schema"]
+                )
+                self.stdout.write(
+                    self.style.SUCCESS(f"Detached {', '.join(detached) or 'nothing'}")
+                )
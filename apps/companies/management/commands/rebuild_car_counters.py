@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.companies.car_counters import rebuild_car_counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrite the cached daily fueling count and open operation of every car "
+        "from the database, e.g. after the cache was flushed."
+    )
+
+    def handle(self, *args, **options):
+        cars = rebuild_car_counters()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the counters of {cars} cars"))
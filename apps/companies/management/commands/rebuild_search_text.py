@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.companies.search_index import SEARCH_PATHS, refresh_search_text
+
+
+class Command(BaseCommand):
+    help = "Rewrite the search text of every car, driver, operation and cash request."
+
+    def handle(self, *args, **options):
+        for model in SEARCH_PATHS:
+            updated = refresh_search_text(model)
+            self.stdout.write(
+                self.style.SUCCESS(f"{model._meta.verbose_name_plural}: {updated} rows")
+            )
@@ -0,0 +1,59 @@
+# Generated by Django 4.2 on 2026-10-18 15:06
+
+from django.db import migrations
+from django.db.models import Count
+
+# must match CODE_BLOCK_SIZE in apps.shared.generate_code
+CODE_BLOCK_SIZE = 100
+SEQUENCES = (
+    "shared_car_code_seq",
+    "shared_driver_code_seq",
+    "shared_cash_request_code_seq",
+    "shared_car_operation_code_seq",
+)
+
+
+def create_sequences(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in SEQUENCES:
+        schema_editor.execute(
+            f"CREATE SEQUENCE IF NOT EXISTS {name} "
+            f"INCREMENT BY {CODE_BLOCK_SIZE} MINVALUE 0 START WITH 0"
+        )
+
+
+def drop_sequences(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in SEQUENCES:
+        schema_editor.execute(f"DROP SEQUENCE IF EXISTS {name}")
+
+
+def recode_duplicate_operations(apps, schema_editor):
+    """Keep the oldest operation's code and suffix the others with their id."""
+    CarOperation = apps.get_model("companies", "CarOperation")
+    duplicated_codes = list(
+        CarOperation.objects.values("code")
+        .annotate(total=Count("id"))
+        .filter(total__gt=1)
+        .values_list("code", flat=True)
+    )
+    for code in duplicated_codes:
+        operations = CarOperation.objects.filter(code=code).order_by("id")[1:]
+        for operation in operations:
+            CarOperation.objects.filter(id=operation.id).update(
+                code=f"{code}-{operation.id}"
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0014_alter_caroperation_car_alter_caroperation_driver_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_sequences, drop_sequences),
+        migrations.RunPython(recode_duplicate_operations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 15:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0015_code_sequences"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="caroperation",
+            name="code",
+            field=models.CharField(max_length=50, unique=True),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 4.2 on 2026-10-18 15:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0016_alter_caroperation_code"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CompanyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "cars_balance",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "branches_balance",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("branches_count", models.IntegerField(default=0)),
+                ("cars_count", models.IntegerField(default=0)),
+                ("diesel_cars_count", models.IntegerField(default=0)),
+                ("gasoline_cars_count", models.IntegerField(default=0)),
+                ("drivers_count", models.IntegerField(default=0)),
+                ("expired_license_drivers_count", models.IntegerField(default=0)),
+                (
+                    "expired_license_30_days_drivers_count",
+                    models.IntegerField(default=0),
+                ),
+                ("refreshed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "branch",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rollups",
+                        to="companies.companybranch",
+                    ),
+                ),
+                (
+                    "company",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rollups",
+                        to="companies.company",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="companyrollup",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("branch__isnull", True)),
+                fields=("company",),
+                name="unique_company_rollup",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="companyrollup",
+            constraint=models.UniqueConstraint(
+                fields=("branch",), name="unique_company_branch_rollup"
+            ),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 4.2 on 2026-10-18 15:30
+
+from django.db import migrations, models
+from django.db.models import Count
+
+OPEN_STATUSES = ["pending", "in_progress"]
+
+
+def cancel_duplicate_open_operations(apps, schema_editor):
+    """Keep each car's newest open operation and cancel the older ones."""
+    CarOperation = apps.get_model("companies", "CarOperation")
+    car_ids = list(
+        CarOperation.objects.filter(status__in=OPEN_STATUSES)
+        .values("car_id")
+        .annotate(total=Count("id"))
+        .filter(total__gt=1)
+        .values_list("car_id", flat=True)
+    )
+    for car_id in car_ids:
+        open_operations = CarOperation.objects.filter(
+            car_id=car_id, status__in=OPEN_STATUSES
+        ).order_by("-id")
+        CarOperation.objects.filter(
+            id__in=list(open_operations.values_list("id", flat=True)[1:])
+        ).update(status="cancelled")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0017_rollups"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="caroperation",
+            index=models.Index(
+                fields=["car", "status", "created"], name="car_operation_car_status"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="caroperation",
+            index=models.Index(
+                fields=["station_branch", "status", "-id"],
+                name="car_operation_branch_status",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="caroperation",
+            index=models.Index(
+                fields=["worker", "status"], name="car_operation_worker"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="caroperation",
+            index=models.Index(
+                fields=["status", "created"], name="car_operation_created"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="companycashrequest",
+            index=models.Index(
+                fields=["driver", "status"], name="cash_request_driver_status"
+            ),
+        ),
+        migrations.RunPython(
+            cancel_duplicate_open_operations, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name="caroperation",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("status__in", OPEN_STATUSES)),
+                fields=("car",),
+                name="unique_open_car_operation",
+            ),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2 on 2026-10-18 16:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0019_operation_client_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="caroperation",
+            name="car_thumbnail",
+            field=models.ImageField(
+                blank=True,
+                editable=False,
+                null=True,
+                upload_to="thumbnails/car_images/",
+            ),
+        ),
+        migrations.AddField(
+            model_name="caroperation",
+            name="fuel_thumbnail",
+            field=models.ImageField(
+                blank=True,
+                editable=False,
+                null=True,
+                upload_to="thumbnails/fuel_images/",
+            ),
+        ),
+        migrations.AddField(
+            model_name="caroperation",
+            name="motor_thumbnail",
+            field=models.ImageField(
+                blank=True,
+                editable=False,
+                null=True,
+                upload_to="thumbnails/motor_images/",
+            ),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2 on 2026-10-18 16:14
+
+from django.db import migrations, models
+
+import apps.shared.validators
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0020_operation_thumbnails"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="caroperation",
+            name="car_image",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                upload_to="car_images/",
+                validators=[apps.shared.validators.validate_image],
+            ),
+        ),
+        migrations.AlterField(
+            model_name="caroperation",
+            name="fuel_image",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                upload_to="fuel_images/",
+                validators=[apps.shared.validators.validate_image],
+            ),
+        ),
+        migrations.AlterField(
+            model_name="caroperation",
+            name="motor_image",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                upload_to="motor_images/",
+                validators=[apps.shared.validators.validate_image],
+            ),
+        ),
+    ]
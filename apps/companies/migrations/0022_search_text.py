@@ -0,0 +1,69 @@
+# Generated by Django 4.2 on 2026-10-18 16:17
+
+from django.db import migrations, models
+
+from apps.companies.search_index import refresh_search_text
+
+SEARCH_TABLES = [
+    "companies_car",
+    "companies_caroperation",
+    "companies_companycashrequest",
+    "companies_driver",
+]
+
+
+def fill_search_text(apps, schema_editor):
+    for model_name in ("Car", "Driver", "CarOperation", "CompanyCashRequest"):
+        refresh_search_text(apps.get_model("companies", model_name))
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for table in SEARCH_TABLES:
+            cursor.execute(
+                f"CREATE INDEX {table}_search_trgm "
+                f"ON {table} USING gin (search_text gin_trgm_ops)"
+            )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in SEARCH_TABLES:
+            cursor.execute(f"DROP INDEX IF EXISTS {table}_search_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0021_upload_validators"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="car",
+            name="search_text",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.AddField(
+            model_name="caroperation",
+            name="search_text",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.AddField(
+            model_name="companycashrequest",
+            name="search_text",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.AddField(
+            model_name="driver",
+            name="search_text",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -2,7 +2,7 @@ from django.core.validators import MinValueValidator
 from django.db import models
 
 from apps.companies.models.company_models import Company, Driver
-from apps.shared.generate_code import generate_unique_code
+from apps.shared.generate_code import CASH_REQUEST_CODES, generate_otp
 from apps.stations.models.stations_models import Station, StationBranch
 from apps.users.models import User
 from apps.utilities.models.abstract_base_model import AbstractBaseModel
@@ -36,6 +36,7 @@ class CompanyCashRequest(AbstractBaseModel):
     status = models.CharField(
         max_length=20, choices=Status.choices, default=Status.IN_PROGRESS
     )
+    search_text = models.TextField(default="", blank=True, editable=False)
     company = models.ForeignKey(
         Company, on_delete=models.CASCADE, related_name="cash_requests"
     )
@@ -52,11 +53,16 @@ class CompanyCashRequest(AbstractBaseModel):
 
     def save(self, *args, **kwargs):
         if not self.code:
-            self.code = generate_unique_code(model=self.__class__)
+            self.code = CASH_REQUEST_CODES.next_code(self.__class__)
         if not self.otp:
-            self.otp = generate_unique_code(model=self.__class__)
+            self.otp = generate_otp()
         super().save(*args, **kwargs)
 
     class Meta:
         verbose_name = "Company Cash Request"
         verbose_name_plural = "6. Company Cash Requests"
+        indexes = [
+            models.Index(
+                fields=["driver", "status"], name="cash_request_driver_status"
+            ),
+        ]
@@ -1,14 +1,11 @@
 import base64
-import os
-from io import BytesIO
 
-import qrcode
 from django.core.exceptions import ValidationError
 from django.db import models
-from django.db.utils import settings
 from django.utils import timezone
 
-from apps.shared.generate_code import generate_unique_code
+from apps.companies import qr_assets
+from apps.shared.generate_code import CAR_CODES, DRIVER_CODES
 from apps.utilities.models.abstract_base_model import AbstractBaseModel
 
 
@@ -130,6 +127,7 @@ class Car(AbstractBaseModel):
     fuel_allowed_days = models.JSONField(default=list, blank=True)
     balance = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     is_blocked_balance_update = models.BooleanField(default=False)
+    search_text = models.TextField(default="", blank=True, editable=False)
     city = models.ForeignKey(
         "geo.City", on_delete=models.SET_NULL, null=True, blank=True
     )
@@ -146,7 +144,7 @@ class Car(AbstractBaseModel):
 
     def save(self, *args, **kwargs):
         if not self.code:
-            self.code = generate_unique_code(Car)
+            self.code = CAR_CODES.next_code(Car)
         if self.permitted_fuel_amount > self.tank_capacity:
             raise ValidationError("الكمية المسموح بها أكبر من حجم المخزون")
 
@@ -173,27 +171,11 @@ class CarCode(AbstractBaseModel):
 
     @property
     def qr_code_base64(self):
-        qr = qrcode.QRCode(
-            version=1,
-            box_size=12,  # Increased from 10 to make QR bigger
-            border=4,  # Increased border
-        )
-        qr.add_data(self.code)
-        qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white")
-
-        buffer = BytesIO()
-        img.save(buffer, format="PNG")
-        return base64.b64encode(buffer.getvalue()).decode()
+        return base64.b64encode(qr_assets.read_qr_png(self.code)).decode()
 
     @property
     def logo_base64(self):
-        logo_path = os.path.join(settings.STATIC_ROOT, "admin/img/logo.png")
-        try:
-            with open(logo_path, "rb") as logo_file:
-                return base64.b64encode(logo_file.read()).decode()
-        except Exception:
-            return None
+        return qr_assets.logo_base64()
 
 
 class Driver(AbstractBaseModel):
@@ -204,6 +186,7 @@ class Driver(AbstractBaseModel):
         max_length=20, unique=True, verbose_name="driver license number"
     )
     lincense_expiration_date = models.DateField()
+    search_text = models.TextField(default="", blank=True, editable=False)
     branch = models.ForeignKey(
         CompanyBranch, on_delete=models.CASCADE, related_name="drivers"
     )
@@ -213,7 +196,7 @@ class Driver(AbstractBaseModel):
 
     def save(self, *args, **kwargs):
         if not self.code:
-            self.code = generate_unique_code(Driver)
+            self.code = DRIVER_CODES.next_code(Driver)
         super().save(*args, **kwargs)
 
     class Meta:
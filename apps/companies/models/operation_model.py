@@ -1,7 +1,8 @@
 from django.db import models
 
 from apps.companies.models.company_models import Car, Driver
-from apps.shared.generate_code import generate_unique_code
+from apps.shared.generate_code import CAR_OPERATION_CODES
+from apps.shared.validators import validate_image
 from apps.stations.models.service_models import Service
 from apps.stations.models.stations_models import StationBranch
 from apps.users.models import Worker
@@ -21,7 +22,7 @@ class CarOperation(AbstractBaseModel):
     status = models.CharField(
         max_length=20, choices=OperationStatus.choices, default=OperationStatus.PENDING
     )
-    code = models.CharField(max_length=50)
+    code = models.CharField(max_length=50, unique=True)
     cost = models.DecimalField(max_digits=10, decimal_places=2, null=True)
     company_cost = models.DecimalField(max_digits=10, decimal_places=2, null=True)
     station_cost = models.DecimalField(max_digits=10, decimal_places=2, null=True)
@@ -46,9 +47,29 @@ class CarOperation(AbstractBaseModel):
     fuel_consumption_rate = models.DecimalField(
         max_digits=10, decimal_places=2, null=True, blank=True
     )
-    motor_image = models.ImageField(upload_to="motor_images/", null=True, blank=True)
-    fuel_image = models.ImageField(upload_to="fuel_images/", null=True, blank=True)
-    car_image = models.ImageField(upload_to="car_images/", null=True, blank=True)
+    motor_image = models.ImageField(
+        upload_to="motor_images/", null=True, blank=True, validators=[validate_image]
+    )
+    fuel_image = models.ImageField(
+        upload_to="fuel_images/", null=True, blank=True, validators=[validate_image]
+    )
+    car_image = models.ImageField(
+        upload_to="car_images/", null=True, blank=True, validators=[validate_image]
+    )
+    # list-size copies of the images, written after the upload (operation_images)
+    motor_thumbnail = models.ImageField(
+        upload_to="thumbnails/motor_images/", null=True, blank=True, editable=False
+    )
+    fuel_thumbnail = models.ImageField(
+        upload_to="thumbnails/fuel_images/", null=True, blank=True, editable=False
+    )
+    car_thumbnail = models.ImageField(
+        upload_to="thumbnails/car_images/", null=True, blank=True, editable=False
+    )
+    # idempotency key of an operation synced from a station device
+    client_key = models.CharField(max_length=64, null=True, blank=True)
+    # what the list views search, normalized, see apps.companies.search_index
+    search_text = models.TextField(default="", blank=True, editable=False)
 
     car = models.ForeignKey(Car, on_delete=models.PROTECT, related_name="operations")
     driver = models.ForeignKey(
@@ -71,6 +92,32 @@ class CarOperation(AbstractBaseModel):
     class Meta:
         verbose_name = "Car Operation"
         verbose_name_plural = "5. Car Operations"
+        constraints = [
+            # a car can only have one pending or in progress operation
+            models.UniqueConstraint(
+                fields=["car"],
+                condition=models.Q(status__in=["pending", "in_progress"]),
+                name="unique_open_car_operation",
+            ),
+            models.UniqueConstraint(
+                fields=["worker", "client_key"],
+                condition=models.Q(client_key__isnull=False),
+                name="unique_operation_client_key",
+            ),
+        ]
+        indexes = [
+            # daily fueling limit and the car's operation history
+            models.Index(
+                fields=["car", "status", "created"], name="car_operation_car_status"
+            ),
+            models.Index(
+                fields=["station_branch", "status", "-id"],
+                name="car_operation_branch_status",
+            ),
+            models.Index(fields=["worker", "status"], name="car_operation_worker"),
+            # today's totals on the dashboards
+            models.Index(fields=["status", "created"], name="car_operation_created"),
+        ]
 
     def __str__(self):
         return f"{self.car} - {self.service} - {self.code}"
@@ -84,5 +131,5 @@ class CarOperation(AbstractBaseModel):
 
     def save(self, *args, **kwargs):
         if not self.code:
-            self.code = generate_unique_code(self.__class__)
+            self.code = CAR_OPERATION_CODES.next_code(self.__class__)
         super().save(*args, **kwargs)
@@ -0,0 +1,50 @@
+from django.db import models
+from django.db.models import Q
+
+from apps.companies.models.company_models import Company, CompanyBranch
+
+
+class CompanyRollup(models.Model):
+    """
+    Running totals behind the company home screen.
+
+    Each company has one row with `branch` empty and one row per branch. The
+    ledger and the car, driver and branch signals keep them up to date, the
+    nightly refresh recomputes them and moves the license expiry counters.
+    """
+
+    company = models.ForeignKey(
+        Company, on_delete=models.CASCADE, related_name="rollups"
+    )
+    branch = models.ForeignKey(
+        CompanyBranch,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="rollups",
+    )
+    cars_balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    branches_balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    branches_count = models.IntegerField(default=0)
+    cars_count = models.IntegerField(default=0)
+    diesel_cars_count = models.IntegerField(default=0)
+    gasoline_cars_count = models.IntegerField(default=0)
+    drivers_count = models.IntegerField(default=0)
+    expired_license_drivers_count = models.IntegerField(default=0)
+    expired_license_30_days_drivers_count = models.IntegerField(default=0)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["company"],
+                condition=Q(branch__isnull=True),
+                name="unique_company_rollup",
+            ),
+            models.UniqueConstraint(
+                fields=["branch"], name="unique_company_branch_rollup"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.company_id} - {self.branch_id or 'all'}"
@@ -0,0 +1,107 @@
+"""
+Re-encoding of the photos attached to car operations.
+
+Phones upload photos of several megabytes. Once an operation with a new
+image is committed, `process_operation_images` (run by a celery task)
+rewrites the image as a JPEG of at most IMAGE_MAX_SIZE pixels per side
+without its EXIF data, after applying its orientation, and writes a
+THUMBNAIL_SIZE copy for the lists. The new files are set with an UPDATE, so
+saving them doesn't start the processing again.
+"""
+
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from apps.companies.models.operation_model import CarOperation
+
+IMAGE_MAX_SIZE = 1600
+IMAGE_QUALITY = 80
+THUMBNAIL_SIZE = 320
+THUMBNAIL_QUALITY = 70
+THUMBNAIL_FIELDS = {
+    "motor_image": "motor_thumbnail",
+    "fuel_image": "fuel_thumbnail",
+    "car_image": "car_thumbnail",
+}
+
+
+def remember_images(instance):
+    instance._image_names = {
+        field: str(instance.__dict__.get(field) or "")
+        for field in [*THUMBNAIL_FIELDS, *THUMBNAIL_FIELDS.values()]
+    }
+
+
+def changed_images(instance):
+    """
+    Image fields set to a new file since the last save. An image that changed
+    with its thumbnail was processed, e.g. read back with refresh_from_db.
+    """
+    old_names = getattr(instance, "_image_names", {})
+    remember_images(instance)
+    names = instance._image_names
+    return [
+        field
+        for field, thumbnail_field in THUMBNAIL_FIELDS.items()
+        if names[field]
+        and names[field] != old_names.get(field)
+        and names[thumbnail_field] == old_names.get(thumbnail_field, "")
+    ]
+
+
+def encode_jpeg(image, size, quality):
+    image = image.copy()
+    image.thumbnail((size, size))
+    buffer = BytesIO()
+    # saved without the `exif` argument, so no metadata is written
+    image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def delete_files(storage, names):
+    for name in names:
+        if name:
+            storage.delete(name)
+
+
+def process_operation_images(operation_id, fields):
+    operation = CarOperation.objects.filter(id=operation_id).first()
+    if operation is None:
+        return
+    original, update, stale = {}, {}, []
+    storage = None
+    for field in fields:
+        image_file = getattr(operation, field)
+        if not image_file:
+            continue
+        storage = image_file.storage
+        with image_file.open("rb"):
+            image = ImageOps.exif_transpose(Image.open(image_file)).convert("RGB")
+        base_name = os.path.splitext(os.path.basename(image_file.name))[0]
+        thumbnail_field = THUMBNAIL_FIELDS[field]
+
+        original[field] = image_file.name
+        update[field] = storage.save(
+            f"{os.path.dirname(image_file.name)}/{base_name}.jpg",
+            ContentFile(encode_jpeg(image, IMAGE_MAX_SIZE, IMAGE_QUALITY)),
+        )
+        update[thumbnail_field] = storage.save(
+            operation._meta.get_field(thumbnail_field).generate_filename(
+                operation, f"{base_name}.jpg"
+            ),
+            ContentFile(encode_jpeg(image, THUMBNAIL_SIZE, THUMBNAIL_QUALITY)),
+        )
+        stale += [image_file.name, getattr(operation, thumbnail_field).name]
+    if not update:
+        return
+
+    with transaction.atomic():
+        # an image uploaded again meanwhile is processed by its own task
+        if CarOperation.objects.filter(id=operation_id, **original).update(**update):
+            transaction.on_commit(lambda: delete_files(storage, stale))
+        else:
+            delete_files(storage, update.values())
@@ -0,0 +1,74 @@
+"""
+Monthly range partitions of the car operations table on postgres.
+
+`convert_to_partitioned` turns the table into a parent partitioned by
+`created` with one partition per month and a default partition, the shared
+helpers in apps.shared.partitions keep the coming months ready. Postgres only
+allows unique indexes on a partitioned table when they include the partition
+key, so the `code`, open operation and client key unique constraints become
+unique indexes of each partition: `code` and (worker, client_key) are then
+only unique within a month. Codes come from a sequence and the sync looks
+client keys up before inserting, and `lock_car_operations` keeps two
+operations of a car from opening in different months.
+
+Queries prune partitions when they bound `created`. Nothing keeps
+`start_time` or `modified` close to `created`, an admin edit or an old
+offline sync can set them far apart, so a bound on them only implies one on
+`created` where it provably does, e.g. `modified` is never before `created`.
+"""
+
+from django.db import connection, transaction
+
+from apps.companies.models.operation_model import CarOperation
+from apps.shared import partitions
+from apps.shared.partitions import PARTITION_MONTHS_AHEAD
+
+TABLE = CarOperation._meta.db_table
+# advisory lock namespace of `lock_car_operations`
+CAR_OPERATIONS_LOCK = 7301
+
+
+def lock_car_operations(car_id):
+    """Serialize opening operations of a car until the transaction ends."""
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_advisory_xact_lock(%s, %s)", [CAR_OPERATIONS_LOCK, car_id]
+        )
+
+
+def create_unique_indexes(cursor, partition):
+    open_statuses = ", ".join(
+        f"'{status}'"
+        for status in (
+            CarOperation.OperationStatus.PENDING,
+            CarOperation.OperationStatus.IN_PROGRESS,
+        )
+    )
+    cursor.execute(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {partition}_code_key "
+        f"ON {partition} (code)"
+    )
+    cursor.execute(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {partition}_open_car "
+        f"ON {partition} (car_id) WHERE status IN ({open_statuses})"
+    )
+    cursor.execute(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {partition}_client_key "
+        f"ON {partition} (worker_id, client_key) WHERE client_key IS NOT NULL"
+    )
+
+
+def convert_to_partitioned(months_ahead=PARTITION_MONTHS_AHEAD):
+    """Rebuild the table as a partitioned one with the same rows."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        return partitions.convert_to_partitioned(
+            cursor, TABLE, "created", months_ahead, create_unique_indexes
+        )
+
+
+def create_car_operation_partitions(cursor, months_ahead=PARTITION_MONTHS_AHEAD):
+    return partitions.create_partitions(
+        cursor, TABLE, months_ahead=months_ahead, on_create=create_unique_indexes
+    )
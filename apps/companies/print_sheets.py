@@ -0,0 +1,180 @@
+"""
+PDF print sheets of car codes, one A4 page per code.
+
+The QR modules are drawn as vector rectangles, so the sheet prints sharp at
+any size and a page costs a few hundred bytes. Pages are written to the file
+as they are drawn and only their offsets are kept, so memory stays flat
+whatever the number of codes. The logo is embedded once and every page
+refers to it. The sheet is written by a celery worker, whose prefork
+processes can't start children, so the QR matrices are built in-process.
+"""
+
+import os
+import uuid
+import zlib
+
+import qrcode
+from django.conf import settings
+from PIL import Image
+
+from apps.companies.qr_assets import LOGO_PATH, QR_BORDER
+
+SHEETS_DIRECTORY = "qr_sheets"
+PAGE_WIDTH, PAGE_HEIGHT = 595.28, 841.89  # A4 in points
+QR_SIZE = 240
+CODE_FONT_SIZE = 36
+LOGO_HEIGHT = 75
+# Courier glyphs are 0.6em wide, codes are centered without font metrics
+CODE_CHAR_WIDTH = 0.6 * CODE_FONT_SIZE
+
+
+def sheet_filename():
+    return f"car_codes_{uuid.uuid4().hex}.pdf"
+
+
+def sheet_path(filename):
+    return os.path.join(settings.MEDIA_ROOT, SHEETS_DIRECTORY, filename)
+
+
+def sheet_url(filename):
+    return f"{settings.MEDIA_URL}{SHEETS_DIRECTORY}/{filename}"
+
+
+def qr_matrix(code):
+    qr = qrcode.QRCode(version=1, border=QR_BORDER)
+    qr.add_data(code)
+    qr.make(fit=True)
+    return qr.get_matrix()
+
+
+def qr_operators(matrix, left, bottom):
+    """Fill operators of the dark modules, one rectangle per horizontal run."""
+    module = QR_SIZE / len(matrix)
+    operators = []
+    for row_index, row in enumerate(matrix):
+        y = bottom + (len(matrix) - 1 - row_index) * module
+        column = 0
+        while column < len(row):
+            if not row[column]:
+                column += 1
+                continue
+            start = column
+            while column < len(row) and row[column]:
+                column += 1
+            operators.append(
+                f"{left + start * module:.2f} {y:.2f} "
+                f"{(column - start) * module:.2f} {module:.2f} re"
+            )
+    operators.append("f")
+    return operators
+
+
+def escape_text(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def load_logo():
+    """The logo as (width, height, compressed RGB bytes), None when missing."""
+    try:
+        image = Image.open(os.path.join(settings.STATIC_ROOT, LOGO_PATH))
+    except OSError:
+        return None
+    image = image.convert("RGBA")
+    background = Image.new("RGBA", image.size, "white")
+    image = Image.alpha_composite(background, image).convert("RGB")
+    return image.width, image.height, zlib.compress(image.tobytes())
+
+
+class PdfWriter:
+    """Appends numbered objects to a binary file and writes the xref at the end."""
+
+    def __init__(self, file):
+        self.file = file
+        self.offsets = {}
+        self.file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def write_object(self, number, body, stream=None):
+        self.offsets[number] = self.file.tell()
+        self.file.write(f"{number} 0 obj\n".encode())
+        if stream is None:
+            self.file.write(f"{body}\nendobj\n".encode())
+            return
+        self.file.write(f"{body[:-2]} /Length {len(stream)} >>\nstream\n".encode())
+        self.file.write(stream)
+        self.file.write(b"\nendstream\nendobj\n")
+
+    def close(self, root):
+        xref = self.file.tell()
+        size = max(self.offsets) + 1
+        self.file.write(f"xref\n0 {size}\n0000000000 65535 f \n".encode())
+        for number in range(1, size):
+            self.file.write(f"{self.offsets[number]:010d} 00000 n \n".encode())
+        self.file.write(
+            f"trailer\n<< /Size {size} /Root {root} 0 R >>\n"
+            f"startxref\n{xref}\n%%EOF\n".encode()
+        )
+
+
+def write_qr_sheet(path, codes):
+    """Write a page per code of the `codes` iterable to `path`, returns the count."""
+    catalog, pages, font = 1, 2, 3
+    logo = load_logo()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # write next to the target and rename, a download never sees half a file
+    with open(path + ".part", "wb") as file:
+        writer = PdfWriter(file)
+        writer.write_object(catalog, f"<< /Type /Catalog /Pages {pages} 0 R >>")
+        writer.write_object(
+            font, "<< /Type /Font /Subtype /Type1 /BaseFont /Courier-Bold >>"
+        )
+        resources = f"/Font << /F1 {font} 0 R >>"
+        number = font + 1
+        if logo:
+            logo_image, number = number, number + 1
+            width, height, pixels = logo
+            writer.write_object(
+                logo_image,
+                f"<< /Type /XObject /Subtype /Image /Width {width} "
+                f"/Height {height} /ColorSpace /DeviceRGB /BitsPerComponent 8 "
+                "/Filter /FlateDecode >>",
+                pixels,
+            )
+            resources += f" /XObject << /Logo {logo_image} 0 R >>"
+
+        left = (PAGE_WIDTH - QR_SIZE) / 2
+        bottom = (PAGE_HEIGHT - QR_SIZE) / 2
+        kids = []
+        for code in codes:
+            matrix = qr_matrix(code)
+            operators = ["q 0 g", *qr_operators(matrix, left, bottom), "Q"]
+            text_left = (PAGE_WIDTH - len(code) * CODE_CHAR_WIDTH) / 2
+            operators.append(
+                f"BT /F1 {CODE_FONT_SIZE} Tf {text_left:.2f} {bottom - 45:.2f} Td "
+                f"({escape_text(code)}) Tj ET"
+            )
+            if logo:
+                logo_width = LOGO_HEIGHT * logo[0] / logo[1]
+                operators.append(
+                    f"q {logo_width:.2f} 0 0 {LOGO_HEIGHT} "
+                    f"{(PAGE_WIDTH - logo_width) / 2:.2f} "
+                    f"{bottom + QR_SIZE + 20:.2f} cm /Logo Do Q"
+                )
+            content = zlib.compress("\n".join(operators).encode())
+            writer.write_object(number, "<< /Filter /FlateDecode >>", content)
+            writer.write_object(
+                number + 1,
+                f"<< /Type /Page /Parent {pages} 0 R "
+                f"/MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                f"/Resources << {resources} >> /Contents {number} 0 R >>",
+            )
+            kids.append(number + 1)
+            number += 2
+
+        writer.write_object(
+            pages,
+            f"<< /Type /Pages /Count {len(kids)} "
+            f"/Kids [{' '.join(f'{kid} 0 R' for kid in kids)}] >>",
+        )
+        writer.close(catalog)
+    os.replace(path + ".part", path)
+    return len(kids)
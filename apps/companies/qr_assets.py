@@ -0,0 +1,76 @@
+"""
+Printed QR codes of car codes, rendered once and kept in the media storage.
+
+A code's PNG is stored under a name derived from the code and the render
+settings (QR_RENDER_VERSION), so a code is rendered the first time it is
+printed or when the settings change, and the print page links the stored
+files instead of inlining base64 images. Codes are rendered in the calling
+process, celery's prefork workers and the web workers can't host a process
+pool. Large batches are spread over celery tasks of QR_TASK_CHUNK_SIZE codes
+instead, see render_qr_assets_task.
+"""
+
+import base64
+import functools
+import hashlib
+import os
+from io import BytesIO
+
+import qrcode
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+QR_DIRECTORY = "car_code_qr"
+# bump when the rendering below changes, so stored images are rendered again
+QR_RENDER_VERSION = 1
+QR_BOX_SIZE = 12
+QR_BORDER = 4
+QR_TASK_CHUNK_SIZE = 200
+LOGO_PATH = "admin/img/logo.png"
+
+
+def render_qr_png(code):
+    qr = qrcode.QRCode(version=1, box_size=QR_BOX_SIZE, border=QR_BORDER)
+    qr.add_data(code)
+    qr.make(fit=True)
+    buffer = BytesIO()
+    qr.make_image(fill_color="black", back_color="white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def qr_asset_name(code):
+    digest = hashlib.sha256(f"{QR_RENDER_VERSION}:{code}".encode()).hexdigest()
+    return f"{QR_DIRECTORY}/{digest[:2]}/{digest}.png"
+
+
+def render_qr_assets(codes):
+    """Render and store the images of `codes` that aren't stored yet."""
+    missing = [
+        code for code in codes if not default_storage.exists(qr_asset_name(code))
+    ]
+    for code in missing:
+        default_storage.save(qr_asset_name(code), ContentFile(render_qr_png(code)))
+    return len(missing)
+
+
+def qr_asset_urls(codes):
+    """Storage URL of the image of each code, rendering the missing ones."""
+    render_qr_assets(codes)
+    return {code: default_storage.url(qr_asset_name(code)) for code in codes}
+
+
+def read_qr_png(code):
+    render_qr_assets([code])
+    with default_storage.open(qr_asset_name(code), "rb") as image:
+        return image.read()
+
+
+@functools.lru_cache(maxsize=1)
+def logo_base64():
+    """The print logo, read and encoded once per process, None when it is missing."""
+    try:
+        with open(os.path.join(settings.STATIC_ROOT, LOGO_PATH), "rb") as logo_file:
+            return base64.b64encode(logo_file.read()).decode()
+    except OSError:
+        return None
@@ -0,0 +1,259 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from apps.companies.models.company_models import Car, Company, CompanyBranch, Driver
+from apps.companies.models.rollup_models import CompanyRollup
+
+# fields whose old value is remembered on load so a save can apply the difference
+TRACKED_FIELDS = {
+    Car: ("branch_id", "fuel_type", "balance"),
+    Driver: ("branch_id", "lincense_expiration_date"),
+    CompanyBranch: ("company_id", "balance"),
+}
+TOTAL_FIELDS = (
+    "cars_balance",
+    "branches_balance",
+    "branches_count",
+    "cars_count",
+    "diesel_cars_count",
+    "gasoline_cars_count",
+    "drivers_count",
+    "expired_license_drivers_count",
+    "expired_license_30_days_drivers_count",
+)
+
+
+def remember_state(instance):
+    fields = TRACKED_FIELDS[type(instance)]
+    if all(field in instance.__dict__ for field in fields):
+        instance._rollup_state = tuple(instance.__dict__[field] for field in fields)
+    else:
+        # deferred fields, the difference can't be known
+        instance._rollup_state = None
+
+
+def car_totals(branch_id, fuel_type, balance, sign=1):
+    return {
+        "cars_count": sign,
+        "cars_balance": sign * (balance or 0),
+        "diesel_cars_count": sign if fuel_type == Car.FuelType.DIESEL else 0,
+        "gasoline_cars_count": sign if fuel_type == Car.FuelType.GASOLINE else 0,
+    }
+
+
+def driver_totals(branch_id, lincense_expiration_date, sign=1):
+    today = timezone.localtime().date()
+    if isinstance(lincense_expiration_date, str):
+        lincense_expiration_date = parse_date(lincense_expiration_date)
+    return {
+        "drivers_count": sign,
+        "expired_license_drivers_count": (
+            sign if lincense_expiration_date < today else 0
+        ),
+        "expired_license_30_days_drivers_count": (
+            sign if lincense_expiration_date < today - timedelta(days=30) else 0
+        ),
+    }
+
+
+def add_to_branch_rollups(branch_id, totals):
+    """Add `totals` to the branch row and its company row with one statement."""
+    totals = {field: value for field, value in totals.items() if value}
+    if not totals:
+        return
+    CompanyRollup.objects.filter(
+        Q(branch_id=branch_id) | Q(branch__isnull=True, company__branches=branch_id)
+    ).update(**{field: F(field) + value for field, value in totals.items()})
+
+
+def add_to_company_rollup(company_id, totals):
+    totals = {field: value for field, value in totals.items() if value}
+    if totals:
+        CompanyRollup.objects.filter(company_id=company_id, branch__isnull=True).update(
+            **{field: F(field) + value for field, value in totals.items()}
+        )
+
+
+def track_change(instance, created=False, deleted=False):
+    """Apply the difference between the remembered and the current state."""
+    model = type(instance)
+    old_state = getattr(instance, "_rollup_state", None)
+    if not created and old_state is None:
+        refresh_company_rollups([company_id_of(instance)])
+        return
+    new_state = tuple(getattr(instance, field) for field in TRACKED_FIELDS[model])
+    changes = []
+    if not created:
+        changes.append((old_state, -1))
+    if not deleted:
+        changes.append((new_state, 1))
+    if len(changes) == 2 and old_state == new_state:
+        return
+    if model is CompanyBranch and len(changes) == 2 and old_state[0] == new_state[0]:
+        add_to_branch_rollups(
+            instance.pk, {"branches_balance": (new_state[1] or 0) - (old_state[1] or 0)}
+        )
+        changes = []
+    for state, sign in changes:
+        if model is Car:
+            add_to_branch_rollups(state[0], car_totals(*state, sign=sign))
+        elif model is Driver:
+            add_to_branch_rollups(state[0], driver_totals(*state, sign=sign))
+        else:
+            add_to_company_rollup(
+                state[0],
+                {"branches_count": sign, "branches_balance": sign * (state[1] or 0)},
+            )
+    remember_state(instance)
+
+
+def company_id_of(instance):
+    if isinstance(instance, CompanyBranch):
+        return instance.company_id
+    return CompanyBranch.objects.values_list("company_id", flat=True).get(
+        id=instance.branch_id
+    )
+
+
+def move_balances(movements):
+    """Mirror ledger movements of cars and company branches in the rollups."""
+    totals = {}
+    for account, amount in movements:
+        if isinstance(account, Car):
+            branch_totals = totals.setdefault(account.branch_id, {})
+            field = "cars_balance"
+        elif isinstance(account, CompanyBranch):
+            branch_totals = totals.setdefault(account.pk, {})
+            field = "branches_balance"
+        else:
+            continue
+        branch_totals[field] = branch_totals.get(field, 0) + amount
+        shift_remembered_balance(account, amount)
+    for branch_id in sorted(totals):
+        add_to_branch_rollups(branch_id, totals[branch_id])
+
+
+def shift_remembered_balance(account, amount):
+    state = getattr(account, "_rollup_state", None)
+    if state is not None:
+        balance_index = TRACKED_FIELDS[type(account)].index("balance")
+        account._rollup_state = (
+            state[:balance_index]
+            + (state[balance_index] + amount,)
+            + state[balance_index + 1 :]
+        )
+
+
+def refresh_company_rollups(company_ids=None):
+    """
+    Recompute the rollups of the given companies (all when None) from the
+    source tables, one grouped query per table.
+
+    The rows are locked before aggregating so a ledger transaction running
+    at the same time either lands before the recount or on top of it.
+    """
+    companies = Company.objects.all()
+    if company_ids is not None:
+        companies = companies.filter(id__in=company_ids)
+    branches = list(
+        CompanyBranch.objects.filter(company__in=companies).values_list(
+            "id", "company_id", "balance"
+        )
+    )
+    today = timezone.localtime().date()
+    with transaction.atomic():
+        CompanyRollup.objects.bulk_create(
+            [
+                CompanyRollup(company_id=company_id)
+                for company_id in companies.values_list("id", flat=True)
+            ]
+            + [
+                CompanyRollup(company_id=company_id, branch_id=branch_id)
+                for branch_id, company_id, _ in branches
+            ],
+            ignore_conflicts=True,
+        )
+        rollups = list(
+            CompanyRollup.objects.select_for_update()
+            .filter(company__in=companies)
+            .order_by("id")
+        )
+        branch_totals = {branch_id: {} for branch_id, _, _ in branches}
+        for row in (
+            Car.objects.filter(branch__company__in=companies)
+            .values("branch_id")
+            .annotate(
+                cars_count=Count("id"),
+                cars_balance=Sum("balance"),
+                diesel_cars_count=Count("id", filter=Q(fuel_type=Car.FuelType.DIESEL)),
+                gasoline_cars_count=Count(
+                    "id", filter=Q(fuel_type=Car.FuelType.GASOLINE)
+                ),
+            )
+        ):
+            branch_totals[row.pop("branch_id")].update(row)
+        for row in (
+            Driver.objects.filter(branch__company__in=companies)
+            .values("branch_id")
+            .annotate(
+                drivers_count=Count("id"),
+                expired_license_drivers_count=Count(
+                    "id", filter=Q(lincense_expiration_date__lt=today)
+                ),
+                expired_license_30_days_drivers_count=Count(
+                    "id",
+                    filter=Q(lincense_expiration_date__lt=today - timedelta(days=30)),
+                ),
+            )
+        ):
+            branch_totals[row.pop("branch_id")].update(row)
+
+        company_totals = {}
+        for branch_id, company_id, balance in branches:
+            branch_totals[branch_id]["branches_balance"] = balance
+            branch_totals[branch_id]["branches_count"] = 1
+            totals = company_totals.setdefault(company_id, {})
+            for field, value in branch_totals[branch_id].items():
+                totals[field] = totals.get(field, 0) + (value or 0)
+
+        now = timezone.now()
+        for rollup in rollups:
+            if rollup.branch_id:
+                totals = branch_totals.get(rollup.branch_id, {})
+            else:
+                totals = company_totals.get(rollup.company_id, {})
+            for field in TOTAL_FIELDS:
+                setattr(rollup, field, totals.get(field) or 0)
+            rollup.refreshed_at = now
+        CompanyRollup.objects.bulk_update(
+            rollups, [*TOTAL_FIELDS, "refreshed_at"], batch_size=500
+        )
+
+
+def get_company_rollup(company_id, branch_ids=None):
+    """
+    Return the company row, or the managed branches' rows summed up when
+    `branch_ids` is given. Missing rows are built on the fly.
+    """
+    for _ in range(2):
+        if branch_ids is None:
+            rollup = (
+                CompanyRollup.objects.select_related("company")
+                .filter(company_id=company_id, branch__isnull=True)
+                .first()
+            )
+            if rollup:
+                return rollup
+        else:
+            rollups = list(CompanyRollup.objects.filter(branch_id__in=branch_ids))
+            if len(rollups) == len(branch_ids):
+                rollup = CompanyRollup(company_id=company_id)
+                for field in TOTAL_FIELDS:
+                    setattr(rollup, field, sum(getattr(row, field) for row in rollups))
+                return rollup
+        refresh_company_rollups([company_id])
+    return None
@@ -0,0 +1,174 @@
+"""
+The `search_text` column of cars, drivers, operations and cash requests.
+
+SEARCH_PATHS lists what a model's list view searches, its `search_text` is
+those values normalized and joined. A save that changes one of them rewrites
+it, e.g. a car's plate or branch, and a rename reached through a relation,
+e.g. of a district or a worker, rewrites the rows reaching it in a celery
+task. Migration 0022 and rebuild_search_text fill in every row.
+"""
+
+from django.apps import apps
+
+from apps.companies.models.company_cash_models import CompanyCashRequest
+from apps.companies.models.company_models import Car, Driver
+from apps.companies.models.operation_model import CarOperation
+from apps.shared.search import normalize_search
+
+REFRESH_BATCH_SIZE = 1000
+SEARCH_PATHS = {
+    Car: (
+        "code",
+        "plate_number",
+        "plate_character",
+        "branch__name",
+        "branch__district__name",
+    ),
+    Driver: ("name", "branch__name", "branch__district__name"),
+    CarOperation: (
+        "code",
+        "car__code",
+        "driver__name",
+        "station_branch__name",
+        "worker__name",
+    ),
+    CompanyCashRequest: ("driver__code", "driver__name", "driver__phone_number"),
+}
+
+
+def search_paths(model):
+    # by label, so that the historical models of a migration find theirs too
+    return next(
+        paths
+        for searched, paths in SEARCH_PATHS.items()
+        if searched._meta.label == model._meta.label
+    )
+
+
+def path_steps(model, path):
+    """(model, lookup from the searched model, field) of each step of `path`."""
+    parts = path.split("__")
+    for index, part in enumerate(parts):
+        field = model._meta.get_field(part)
+        yield model, "__".join(parts[:index]), field
+        model = field.related_model
+
+
+def tracked_fields():
+    """
+    Per model, the fields whose change rewrites the search text of the rows
+    reaching the model through a lookup, keyed by (searched model, lookup).
+    An inherited field is tracked on the parent model as well.
+    """
+    tracked = {}
+    for searched, paths in SEARCH_PATHS.items():
+        for path in paths:
+            for model, lookup, field in path_steps(searched, path):
+                for sender in {model, field.model}:
+                    fields = tracked.setdefault(sender, {}).setdefault(
+                        (searched, lookup), set()
+                    )
+                    fields.add(field.attname)
+    return tracked
+
+
+TRACKED_FIELDS = tracked_fields()
+
+
+def build_search_text(instance):
+    values = []
+    for path in search_paths(type(instance)):
+        value = instance
+        for part in path.split("__"):
+            value = getattr(value, part, None)
+            if value is None:
+                break
+        if value:
+            values.append(str(value))
+    return normalize_search(" ".join(values))
+
+
+def watched_fields(model):
+    return set().union(*TRACKED_FIELDS[model].values())
+
+
+def remember_state(instance):
+    # deferred fields are left out, they count as changed once loaded or set
+    instance._search_state = {
+        field: instance.__dict__[field]
+        for field in watched_fields(type(instance))
+        if field in instance.__dict__
+    }
+
+
+def changed_fields(instance):
+    state = getattr(instance, "_search_state", {})
+    return {
+        field
+        for field in watched_fields(type(instance))
+        if field in instance.__dict__
+        and (field not in state or state[field] != instance.__dict__[field])
+    }
+
+
+def own_fields(model):
+    return TRACKED_FIELDS[model][(model, "")]
+
+
+def update_search_text(instance):
+    """Rewrite the search text of an instance about to be saved, if it changed."""
+    if instance._state.adding or changed_fields(instance) & own_fields(type(instance)):
+        instance.search_text = build_search_text(instance)
+
+
+def track_change(instance, created=False, update_fields=None):
+    """
+    Write a search text left out by `update_fields` and return the
+    (model label, lookup) of the rows to refresh for the fields that changed.
+    """
+    model = type(instance)
+    changed = changed_fields(instance)
+    remember_state(instance)
+    if model in SEARCH_PATHS and changed & own_fields(model):
+        if update_fields is not None and "search_text" not in update_fields:
+            model.objects.filter(pk=instance.pk).update(
+                search_text=instance.search_text
+            )
+    if created:
+        return []
+    return [
+        (searched._meta.label, lookup)
+        for (searched, lookup), fields in TRACKED_FIELDS[model].items()
+        if lookup and fields & changed
+    ]
+
+
+def select_paths(model):
+    return {path.rpartition("__")[0] for path in search_paths(model)} - {""}
+
+
+def refresh_search_text(model, **filters):
+    """
+    Rewrite the search text of the `model` rows matching `filters`, returns
+    how many changed. `model` may be a label or a migration's historical model.
+    """
+    if isinstance(model, str):
+        model = apps.get_model(model)
+    rows = (
+        model.objects.filter(**filters)
+        .select_related(*select_paths(model))
+        .order_by("pk")
+    )
+    batch, updated = [], 0
+    for row in rows.iterator(chunk_size=REFRESH_BATCH_SIZE):
+        search_text = build_search_text(row)
+        if search_text == row.search_text:
+            continue
+        row.search_text = search_text
+        batch.append(row)
+        if len(batch) >= REFRESH_BATCH_SIZE:
+            model.objects.bulk_update(batch, ["search_text"])
+            updated += len(batch)
+            batch = []
+    model.objects.bulk_update(batch, ["search_text"])
+    return updated + len(batch)
@@ -1,11 +1,124 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
 from django.dispatch import receiver
 
+from apps.companies import car_counters, operation_images, rollups, search_index
 from apps.companies.helper import send_cash_request_otp
 from apps.companies.models.company_cash_models import CompanyCashRequest
+from apps.companies.models.company_models import Car, Company, CompanyBranch, Driver
+from apps.companies.models.operation_model import CarOperation
+from apps.companies.models.rollup_models import CompanyRollup
+from apps.companies.tasks import (
+    process_operation_images_task,
+    refresh_search_text_task,
+)
+from apps.geo.models import District
+from apps.stations.models.stations_models import StationBranch
+from apps.users.models import User, Worker
 
 
 @receiver(post_save, sender=CompanyCashRequest)
 def send_fcm_message_after_notification_created(sender, instance, created, **kwargs):
     if created:
         send_cash_request_otp(instance)
+
+
+@receiver(post_save, sender=Company)
+def create_rollup_after_company_created(sender, instance, created, **kwargs):
+    if created:
+        CompanyRollup.objects.create(company=instance)
+
+
+@receiver(post_init, sender=Car)
+@receiver(post_init, sender=Driver)
+@receiver(post_init, sender=CompanyBranch)
+def remember_rollup_state(sender, instance, **kwargs):
+    rollups.remember_state(instance)
+
+
+@receiver(post_save, sender=Car)
+@receiver(post_save, sender=Driver)
+@receiver(post_save, sender=CompanyBranch)
+def update_rollups_after_save(sender, instance, created, update_fields, **kwargs):
+    if created and sender is CompanyBranch:
+        CompanyRollup.objects.create(
+            company_id=instance.company_id,
+            branch=instance,
+            branches_balance=instance.balance or 0,
+            branches_count=1,
+        )
+    tracked = {field.removesuffix("_id") for field in rollups.TRACKED_FIELDS[sender]}
+    if update_fields and not tracked.intersection(update_fields):
+        return
+    rollups.track_change(instance, created=created)
+
+
+@receiver(post_delete, sender=Car)
+@receiver(post_delete, sender=Driver)
+@receiver(post_delete, sender=CompanyBranch)
+def update_rollups_after_delete(sender, instance, **kwargs):
+    rollups.track_change(instance, deleted=True)
+
+
+@receiver(post_init, sender=CarOperation)
+def remember_operation_status(sender, instance, **kwargs):
+    car_counters.remember_status(instance)
+    operation_images.remember_images(instance)
+
+
+@receiver(post_save, sender=CarOperation)
+def update_car_counters_after_save(sender, instance, created, **kwargs):
+    car_counters.track_status_change(instance, created=created)
+
+
+@receiver(post_save, sender=CarOperation)
+def process_images_after_save(sender, instance, **kwargs):
+    fields = operation_images.changed_images(instance)
+    if fields:
+        transaction.on_commit(
+            lambda: process_operation_images_task.delay(instance.id, fields)
+        )
+
+
+@receiver(post_delete, sender=CarOperation)
+def update_car_counters_after_delete(sender, instance, **kwargs):
+    car_counters.track_status_change(instance, deleted=True)
+
+
+@receiver(post_init, sender=Car)
+@receiver(post_init, sender=Driver)
+@receiver(post_init, sender=CarOperation)
+@receiver(post_init, sender=CompanyCashRequest)
+@receiver(post_init, sender=CompanyBranch)
+@receiver(post_init, sender=District)
+@receiver(post_init, sender=StationBranch)
+@receiver(post_init, sender=Worker)
+@receiver(post_init, sender=User)
+def remember_search_state(sender, instance, **kwargs):
+    search_index.remember_state(instance)
+
+
+@receiver(pre_save, sender=Car)
+@receiver(pre_save, sender=Driver)
+@receiver(pre_save, sender=CarOperation)
+@receiver(pre_save, sender=CompanyCashRequest)
+def update_search_text_before_save(sender, instance, **kwargs):
+    search_index.update_search_text(instance)
+
+
+@receiver(post_save, sender=Car)
+@receiver(post_save, sender=Driver)
+@receiver(post_save, sender=CarOperation)
+@receiver(post_save, sender=CompanyCashRequest)
+@receiver(post_save, sender=CompanyBranch)
+@receiver(post_save, sender=District)
+@receiver(post_save, sender=StationBranch)
+@receiver(post_save, sender=Worker)
+@receiver(post_save, sender=User)
+def refresh_search_text_after_save(sender, instance, created, update_fields, **kwargs):
+    for label, lookup in search_index.track_change(instance, created, update_fields):
+        transaction.on_commit(
+            lambda label=label, lookup=lookup: refresh_search_text_task.delay(
+                label, lookup, instance.pk
+            )
+        )
@@ -0,0 +1,76 @@
+from celery import shared_task
+from django.db import connection, transaction
+
+from apps.companies import operation_images, partitions, qr_assets, search_index
+from apps.companies.helper import export_car_operations
+from apps.companies.models.company_models import CarCode
+from apps.companies.print_sheets import sheet_path, write_qr_sheet
+from apps.companies.rollups import refresh_company_rollups
+from apps.notifications.models import Notification
+from apps.shared.partitions import is_partitioned
+
+
+@shared_task(ignore_result=True)
+def refresh_rollups():
+    refresh_company_rollups()
+
+
+@shared_task(ignore_result=True)
+def render_qr_assets_task(codes):
+    # a large batch is rendered by several workers, a chunk per task
+    if len(codes) > qr_assets.QR_TASK_CHUNK_SIZE:
+        for start in range(0, len(codes), qr_assets.QR_TASK_CHUNK_SIZE):
+            render_qr_assets_task.delay(
+                codes[start : start + qr_assets.QR_TASK_CHUNK_SIZE]
+            )
+        return
+    qr_assets.render_qr_assets(codes)
+
+
+@shared_task(ignore_result=True)
+def process_operation_images_task(operation_id, fields):
+    operation_images.process_operation_images(operation_id, fields)
+
+
+@shared_task(ignore_result=True)
+def refresh_search_text_task(model_label, lookup, pk):
+    search_index.refresh_search_text(model_label, **{lookup: pk})
+
+
+@shared_task(ignore_result=True)
+def print_car_codes_task(user_id, code_ids, filename, download_url):
+    codes = (
+        CarCode.objects.filter(id__in=code_ids)
+        .order_by("-created")
+        .values_list("code", flat=True)
+    )
+    write_qr_sheet(sheet_path(filename), codes.iterator(chunk_size=2000))
+    Notification.objects.create(
+        user_id=user_id,
+        title="تم تجهيز ملف اكواد السيارات",
+        description="تم تجهيز ملف اكواد السيارات للطباعة ويمكنك تحميل الملف الان",
+        type=Notification.NotificationType.GENERAL,
+        url=download_url,
+    )
+
+
+@shared_task(ignore_result=True)
+def export_car_operations_task(user_id, filename, download_url, **filters):
+    export_car_operations(filename, **filters)
+    Notification.objects.create(
+        user_id=user_id,
+        title="تم استخراج العمليات",
+        description="تم استخراج العمليات ويمكنك تحميل الملف الان",
+        type=Notification.NotificationType.GENERAL,
+        url=download_url,
+    )
+
+
+@shared_task(ignore_result=True)
+def create_car_operation_partitions():
+    # a no-op until the table was converted with partition_car_operations
+    if connection.vendor != "postgresql":
+        return
+    with transaction.atomic(), connection.cursor() as cursor:
+        if is_partitioned(cursor, partitions.TABLE):
+            partitions.create_car_operation_partitions(cursor)
@@ -0,0 +1,112 @@
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.companies.car_counters import get_car_counters, rebuild_car_counters
+from apps.companies.models.company_models import Car, Company, CompanyBranch, Driver
+from apps.companies.models.operation_model import CarOperation
+from apps.stations.models.service_models import Service
+
+
+@pytest.mark.django_db
+class TestCarCounters:
+    @pytest.fixture(autouse=True)
+    def setup(self, admin_user, branch, station_worker):
+        self.station_branch = branch
+        self.worker = station_worker
+        company = Company.objects.create(
+            name="Company", address="Address", created_by=admin_user
+        )
+        company_branch = CompanyBranch.objects.create(
+            name="Company Branch",
+            company=company,
+            fees=Decimal("10.00"),
+            created_by=admin_user,
+        )
+        self.service = Service.objects.create(
+            name="Diesel",
+            type=Service.ServiceType.DIESEL,
+            unit=Service.ServiceUnit.LITRE,
+            cost=Decimal("10.00"),
+            created_by=admin_user,
+        )
+        self.car = Car.objects.create(
+            plate_number="123",
+            plate_character="ABC",
+            model_year=2020,
+            is_with_odometer=True,
+            tank_capacity=60,
+            permitted_fuel_amount=50,
+            number_of_fuelings_per_day=3,
+            number_of_washes_per_month=3,
+            balance=Decimal("1000.00"),
+            service=self.service,
+            fuel_allowed_days=[timezone.localdate().strftime("%A")],
+            branch=company_branch,
+            created_by=admin_user,
+        )
+        self.driver = Driver.objects.create(
+            name="Driver",
+            phone_number="01100000000",
+            lincense_number="L-1",
+            lincense_expiration_date=timezone.localdate(),
+            branch=company_branch,
+            created_by=admin_user,
+        )
+
+    def start_operation(self):
+        return CarOperation.objects.create(
+            car=self.car,
+            driver=self.driver,
+            service=self.service,
+            worker=self.worker,
+            station_branch=self.station_branch,
+            status=CarOperation.OperationStatus.IN_PROGRESS,
+            start_time=timezone.localtime(),
+            created_by=self.worker,
+        )
+
+    def test_car_counters_follow_the_operation_status(
+        self, django_capture_on_commit_callbacks
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            operation = self.start_operation()
+        assert get_car_counters(self.car.id) == (0, operation.id)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            operation.status = CarOperation.OperationStatus.COMPLETED
+            operation.save()
+        assert get_car_counters(self.car.id) == (1, 0)
+
+    def test_verification_reads_the_daily_limit_from_the_cache(self, auth_client):
+        client = auth_client(self.worker, station_id=self.station_branch.station_id)
+        for _ in range(self.car.number_of_fuelings_per_day):
+            self.start_operation()
+            CarOperation.objects.filter(car=self.car).update(
+                status=CarOperation.OperationStatus.COMPLETED
+            )
+        rebuild_car_counters()
+        url = reverse(
+            "verify-driver",
+            kwargs={
+                "driver_code": self.driver.code,
+                "car_code": self.car.code,
+                "service_type": "petrol",
+            },
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(url)
+
+        assert response.status_code == 400
+        assert response.data["message"] == (
+            "السيارة تجاوزت عدد عمليات البترولية اليومية المسموح بها"
+        )
+        assert not any(
+            "companies_caroperation" in query["sql"]
+            for query in context.captured_queries
+        )
@@ -0,0 +1,159 @@
+import os
+from datetime import time, timedelta
+from decimal import Decimal
+
+import pytest
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.companies.helper import get_car_operations_data
+from apps.companies.models.company_models import Car, Company, CompanyBranch, Driver
+from apps.companies.models.operation_model import CarOperation
+from apps.notifications.models import Notification
+from apps.shared.helpers import start_of
+from apps.stations.models.service_models import Service
+from apps.users.models import CompanyUser, User
+
+
+@pytest.mark.django_db
+class TestCarOperationExport:
+    @pytest.fixture(autouse=True)
+    def setup(self, settings, tmp_path, api_client, admin_user, branch, station_worker):
+        settings.MEDIA_ROOT = tmp_path
+        self.client = api_client
+        self.company = Company.objects.create(
+            name="Company", address="Address", created_by=admin_user
+        )
+        company_branch = CompanyBranch.objects.create(
+            name="Company Branch", company=self.company, created_by=admin_user
+        )
+        self.owner = CompanyUser.objects.create(
+            name="Owner",
+            phone_number="01200000000",
+            email="owner@example.com",
+            password="password123",
+            role=User.UserRoles.CompanyOwner,
+            company=self.company,
+            created_by=admin_user,
+        )
+        service = Service.objects.create(
+            name="Diesel",
+            type=Service.ServiceType.DIESEL,
+            unit=Service.ServiceUnit.LITRE,
+            cost=Decimal("10.00"),
+            created_by=admin_user,
+        )
+        driver = Driver.objects.create(
+            name="Driver",
+            phone_number="01100000000",
+            lincense_number="L-1",
+            lincense_expiration_date=timezone.localdate(),
+            branch=company_branch,
+            created_by=admin_user,
+        )
+        self.cars = [
+            Car.objects.create(
+                plate_number=str(100 + index),
+                plate_character="ABC",
+                model_year=2020,
+                is_with_odometer=True,
+                tank_capacity=60,
+                permitted_fuel_amount=50,
+                number_of_fuelings_per_day=3,
+                number_of_washes_per_month=3,
+                branch=company_branch,
+                created_by=admin_user,
+            )
+            for index in range(2)
+        ]
+        # three operations per car, the last one yesterday
+        for car in self.cars:
+            for day in (3, 2, 1):
+                operation = CarOperation.objects.create(
+                    car=car,
+                    driver=driver,
+                    service=service,
+                    worker=station_worker,
+                    station_branch=branch,
+                    status=CarOperation.OperationStatus.COMPLETED,
+                    start_time=timezone.localtime() - timedelta(days=day),
+                    amount=Decimal("10.00"),
+                    company_cost=Decimal("110.00"),
+                    car_first_meter=Decimal("1000"),
+                    car_meter=Decimal("1100"),
+                    fuel_consumption_rate=Decimal("10"),
+                    created_by=station_worker,
+                )
+                CarOperation.objects.filter(id=operation.id).update(
+                    created=operation.start_time
+                )
+
+    def export(self, **params):
+        token = AccessToken.for_user(self.owner)
+        token["company_id"] = self.company.id
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return self.client.get(reverse("car-operations-export"), params)
+
+    def read_rows(self, download_url):
+        path = os.path.join(
+            settings.MEDIA_ROOT, "excel_exports", download_url.split("file=")[1]
+        )
+        return [
+            list(row) for row in load_workbook(path).active.iter_rows(values_only=True)
+        ]
+
+    def test_export_writes_one_block_per_car_and_notifies(self):
+        response = self.export()
+
+        assert response.status_code == 200, response.data
+        rows = self.read_rows(response.data["download_url"])
+        # car row, header, 3 operations and total for each car, 2 blank rows between
+        assert len(rows) == 2 * 6 + 2
+        assert rows[0][5] == str(self.cars[0])
+        assert rows[5] == ["330.00 جنيه", 30, 30, None, None, None, "الاجمالي"]
+        assert rows[8][5] == str(self.cars[1])
+        notification = Notification.objects.get(user=self.owner)
+        assert notification.url == response.data["download_url"]
+
+    def test_export_respects_the_date_range(self):
+        date_to = (timezone.localdate() - timedelta(days=2)).isoformat()
+
+        response = self.export(car=self.cars[1].id, date_to=date_to)
+
+        assert response.status_code == 200, response.data
+        rows = self.read_rows(response.data["download_url"])
+        assert len(rows) == 5
+        assert rows[0][5] == str(self.cars[1])
+        assert rows[4][:3] == ["220.00 جنيه", 20, 20]
+
+    def test_date_range_bounds_are_local_days(self):
+        operation = CarOperation.objects.filter(car=self.cars[0]).first()
+        day = timezone.localdate() - timedelta(days=5)
+        CarOperation.objects.filter(id=operation.id).update(
+            start_time=start_of(day, time(23, 59, 59))
+        )
+        filters = {"branches": [self.cars[0].branch_id], "car": self.cars[0].id}
+
+        assert operation in get_car_operations_data(**filters, date_to=day.isoformat())
+        next_day = (day + timedelta(days=1)).isoformat()
+        assert operation not in get_car_operations_data(
+            **filters, date_to=(day - timedelta(days=1)).isoformat()
+        )
+        assert operation not in get_car_operations_data(**filters, date_from=next_day)
+
+    def test_an_operation_synced_long_after_it_started_is_exported(self):
+        operation = CarOperation.objects.filter(car=self.cars[0]).first()
+        day = timezone.localdate() - timedelta(days=30)
+        CarOperation.objects.filter(id=operation.id).update(
+            start_time=start_of(day, time(12)), created=timezone.localtime()
+        )
+        filters = {"branches": [self.cars[0].branch_id], "car": self.cars[0].id}
+
+        assert list(
+            get_car_operations_data(
+                **filters, date_from=day.isoformat(), date_to=day.isoformat()
+            )
+        ) == [operation]
@@ -94,8 +94,8 @@ class TestCarViewSetUpdateBalance:
         client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
         return client
     
-    @patch('apps.companies.api.v1.views.car_views.generate_company_transaction')
-    @patch('apps.notifications.models.Notification.objects.create')
+    @patch('apps.companies.api.v1.views.car_views.build_company_transaction')
+    @patch('apps.notifications.models.Notification.objects.fan_out')
     def test_add_balance_as_company_owner_success(self, mock_notification, mock_transaction):
         """Test adding balance to car as company owner"""
         client = self.get_client(self.company_owner)
@@ -121,11 +121,15 @@ class TestCarViewSetUpdateBalance:
         
         # Verify transaction was created
         mock_transaction.assert_called_once()
-        # Verify notification was created
-        assert mock_notification.call_count == 2  # Owner + manager
+        # Verify notification was fanned out
+        mock_notification.assert_called_once()
+        assert set(mock_notification.call_args.args[0]) == {
+            self.company_owner.id,
+            self.branch_manager.id,
+        }
     
-    @patch('apps.companies.api.v1.views.car_views.generate_company_transaction')
-    @patch('apps.notifications.models.Notification.objects.create')
+    @patch('apps.companies.api.v1.views.car_views.build_company_transaction')
+    @patch('apps.notifications.models.Notification.objects.fan_out')
     def test_add_balance_as_branch_manager_success(self, mock_notification, mock_transaction):
         """Test adding balance to car as branch manager"""
         client = self.get_client(self.branch_manager)
@@ -150,11 +154,15 @@ class TestCarViewSetUpdateBalance:
         
         # Verify transaction was created
         mock_transaction.assert_called_once()
-        # Verify notification was created
-        assert mock_notification.call_count == 2  # Manager + owner
+        # Verify notification was fanned out
+        mock_notification.assert_called_once()
+        assert set(mock_notification.call_args.args[0]) == {
+            self.branch_manager.id,
+            self.company_owner.id,
+        }
     
-    @patch('apps.companies.api.v1.views.car_views.generate_company_transaction')
-    @patch('apps.notifications.models.Notification.objects.create')
+    @patch('apps.companies.api.v1.views.car_views.build_company_transaction')
+    @patch('apps.notifications.models.Notification.objects.fan_out')
     def test_subtract_balance_as_company_owner_success(self, mock_notification, mock_transaction):
         """Test subtracting balance from car as company owner"""
         client = self.get_client(self.company_owner)
@@ -179,8 +187,9 @@ class TestCarViewSetUpdateBalance:
         
         # Verify transaction was created
         mock_transaction.assert_called_once()
-        # Verify notification was created
-        assert mock_notification.call_count == 2
+        # Verify notification was fanned out
+        mock_notification.assert_called_once()
+        assert len(mock_notification.call_args.args[0]) == 2
     
     def test_add_balance_insufficient_fails(self):
         """Test adding balance when company/branch has insufficient funds"""
@@ -1,8 +1,11 @@
+import json
+
 import pytest
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import AccessToken
 
+from apps.companies.models.company_models import Company
 from apps.geo.models import City, Country, District
 from apps.users.models import User
 
@@ -44,5 +47,25 @@ class TestCompany:
         response = client.get(url, {"district": district.id})
         assert response.status_code == 200
 
+    def test_no_paginate_streams_id_and_name(self, admin_user, auth_client):
+        companies = [
+            Company.objects.create(
+                name=f"شركة {index}", address="-", created_by=admin_user
+            )
+            for index in range(3)
+        ]
+        client = auth_client(admin_user)
+
+        response = client.get(reverse("companies-list"), {"no_paginate": "true"})
+
+        assert response.status_code == 200
+        assert response.streaming
+        assert json.loads(b"".join(response.streaming_content)) == {
+            "results": [
+                {"id": company.id, "name": company.name}
+                for company in reversed(companies)
+            ]
+        }
+
     def test_list_company_with_district_filter_falied(self):
         pass
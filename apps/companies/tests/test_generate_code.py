@@ -0,0 +1,60 @@
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+
+from apps.companies.models.company_models import Driver
+from apps.shared.generate_code import (
+    CodeSequence,
+    check_code_permutation_key,
+    generate_otp,
+)
+
+
+def test_code_sequence_permutation_is_a_bijection():
+    sequence = CodeSequence("test_code_seq", 1000, 4999)
+
+    codes = {sequence.permute(number) for number in range(sequence.size)}
+
+    assert codes == set(range(sequence.size))
+    assert [sequence.permute(number) for number in range(5)] != list(range(5))
+
+
+def test_code_sequence_keeps_codes_in_range():
+    sequence = CodeSequence("test_code_seq", 10**9, 10**10 - 1)
+
+    for number in (0, 1, 12345, sequence.size - 1):
+        assert 0 <= sequence.permute(number) < sequence.size
+
+
+def test_code_sequence_permutation_survives_a_secret_key_rotation(settings):
+    before = [CodeSequence("test_code_seq", 1000, 4999).permute(n) for n in range(20)]
+
+    settings.SECRET_KEY = "rotated"
+    after = [CodeSequence("test_code_seq", 1000, 4999).permute(n) for n in range(20)]
+
+    assert after == before
+
+
+def test_a_missing_permutation_key_is_reported_instead_of_used(settings):
+    settings.CODE_PERMUTATION_KEY = None
+
+    assert [error.id for error in check_code_permutation_key()] == ["shared.E001"]
+    with pytest.raises(ImproperlyConfigured, match="CODE_PERMUTATION_KEY"):
+        CodeSequence("test_code_seq", 1000, 4999).permute(1)
+
+
+@pytest.mark.skipif(
+    connection.vendor == "postgresql", reason="postgres draws from the sequence"
+)
+@pytest.mark.django_db
+def test_code_sequence_falls_back_to_probing_without_sequences():
+    sequence = CodeSequence("test_code_seq", 10**6, 10**7 - 1)
+
+    codes = sequence.next_codes(Driver, 3)
+
+    assert len(set(codes)) == 3
+    assert all(10**6 <= int(code) < 10**7 for code in codes)
+
+
+def test_generate_otp_has_fixed_length():
+    assert all(len(generate_otp()) == 6 for _ in range(100))
@@ -0,0 +1,97 @@
+import os
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+from PIL import Image
+
+from apps.companies.models.company_models import Car, Company, CompanyBranch, Driver
+from apps.companies.models.operation_model import CarOperation
+from apps.companies.operation_images import IMAGE_MAX_SIZE, THUMBNAIL_SIZE
+
+
+def phone_photo(name):
+    """A 4000x3000 JPEG taken sideways, the EXIF orientation rotates it upright."""
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotate 90 degrees clockwise when displayed
+    exif[0x010F] = "Phone"
+    buffer = BytesIO()
+    Image.new("RGB", (4000, 3000), "red").save(buffer, format="JPEG", exif=exif)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+
+@pytest.mark.django_db
+class TestOperationImages:
+    @pytest.fixture(autouse=True)
+    def setup(self, settings, tmp_path, admin_user, branch, station_worker):
+        settings.MEDIA_ROOT = tmp_path
+        self.media_root = tmp_path
+        company = Company.objects.create(
+            name="Company", address="Address", created_by=admin_user
+        )
+        company_branch = CompanyBranch.objects.create(
+            name="Company Branch", company=company, created_by=admin_user
+        )
+        self.operation_fields = {
+            "car": Car.objects.create(
+                plate_number="100",
+                plate_character="ABC",
+                model_year=2020,
+                is_with_odometer=True,
+                tank_capacity=60,
+                permitted_fuel_amount=50,
+                number_of_fuelings_per_day=3,
+                number_of_washes_per_month=3,
+                branch=company_branch,
+                created_by=admin_user,
+            ),
+            "driver": Driver.objects.create(
+                name="Driver",
+                phone_number="01100000000",
+                lincense_number="L-1",
+                lincense_expiration_date=timezone.localdate(),
+                branch=company_branch,
+                created_by=admin_user,
+            ),
+            "station_branch": branch,
+            "worker": station_worker,
+            "created_by": station_worker,
+        }
+
+    def test_uploaded_photo_is_resized_stripped_and_thumbnailed(
+        self, django_capture_on_commit_callbacks
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            operation = CarOperation.objects.create(
+                motor_image=phone_photo("meter.png"), **self.operation_fields
+            )
+        uploaded_name = operation.motor_image.name
+        operation.refresh_from_db()
+
+        assert operation.motor_image.name.endswith(".jpg")
+        assert not os.path.exists(self.media_root / uploaded_name)
+        with Image.open(operation.motor_image.path) as image:
+            assert image.format == "JPEG"
+            assert image.size == (1200, IMAGE_MAX_SIZE)
+            assert not image.getexif()
+        with Image.open(operation.motor_thumbnail.path) as thumbnail:
+            assert max(thumbnail.size) == THUMBNAIL_SIZE
+        assert not operation.fuel_thumbnail
+
+    def test_saving_without_a_new_image_does_not_process_it_again(
+        self, django_capture_on_commit_callbacks
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            operation = CarOperation.objects.create(
+                fuel_image=phone_photo("pump.jpg"), **self.operation_fields
+            )
+        operation.refresh_from_db()
+        processed_name = operation.fuel_image.name
+
+        with django_capture_on_commit_callbacks(execute=True):
+            operation.amount = 10
+            operation.save()
+        operation.refresh_from_db()
+
+        assert operation.fuel_image.name == processed_name
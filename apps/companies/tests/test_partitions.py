@@ -0,0 +1,125 @@
+from datetime import timedelta
+
+import pytest
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from apps.companies.models.company_models import Car, Company, CompanyBranch, Driver
+from apps.companies.models.operation_model import CarOperation
+from apps.companies.partitions import (
+    TABLE,
+    convert_to_partitioned,
+    create_car_operation_partitions,
+)
+from apps.shared.partitions import list_partitions, partition_name
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="partitions need postgres"
+)
+
+
+def foreign_keys():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f' ORDER BY conname",
+            [TABLE],
+        )
+        return cursor.fetchall()
+
+
+def index_names(table):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = %s", [table])
+        return {row[0] for row in cursor.fetchall()}
+
+
+@pytest.mark.django_db
+class TestCarOperationPartitions:
+    @pytest.fixture(autouse=True)
+    def setup(self, admin_user, geo_data, branch, station_worker):
+        company = Company.objects.create(name="Company", created_by=admin_user)
+        company_branch = CompanyBranch.objects.create(
+            name="Branch",
+            company=company,
+            district=geo_data["district"],
+            created_by=admin_user,
+        )
+        self.cars = [
+            Car.objects.create(
+                plate_number=str(number),
+                plate_character="أ ب ج",
+                model_year=2020,
+                is_with_odometer=True,
+                tank_capacity=60,
+                permitted_fuel_amount=50,
+                number_of_fuelings_per_day=3,
+                number_of_washes_per_month=3,
+                branch=company_branch,
+                created_by=admin_user,
+            )
+            for number in (1, 2)
+        ]
+        self.driver = Driver.objects.create(
+            name="Driver",
+            phone_number="01100000000",
+            lincense_number="L-1",
+            lincense_expiration_date=timezone.localdate(),
+            branch=company_branch,
+            created_by=admin_user,
+        )
+        self.branch = branch
+        self.worker = station_worker
+
+    def create_operation(self, car, **fields):
+        return CarOperation.objects.create(
+            car=car,
+            driver=self.driver,
+            station_branch=self.branch,
+            worker=self.worker,
+            created_by=self.worker,
+            **fields,
+        )
+
+    def test_conversion_keeps_rows_ids_and_foreign_keys(self):
+        two_months_ago = timezone.localtime() - timedelta(days=62)
+        old = self.create_operation(
+            self.cars[0], status=CarOperation.OperationStatus.COMPLETED
+        )
+        CarOperation.objects.filter(id=old.id).update(created=two_months_ago)
+        keys = foreign_keys()
+
+        convert_to_partitioned()
+
+        assert foreign_keys() == keys
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT tableoid::regclass::text FROM {TABLE} WHERE id = %s",
+                [old.id],
+            )
+            assert cursor.fetchone()[0] == partition_name(
+                TABLE, timezone.localdate(two_months_ago)
+            )
+            cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [TABLE])
+            assert cursor.fetchone()[0] == f"public.{TABLE}_partitioned_id_seq"
+        # the sequence of the new table carries on after the copied ids
+        assert self.create_operation(self.cars[1]).id == old.id + 1
+
+    def test_every_partition_gets_the_unique_indexes(self):
+        partitions = convert_to_partitioned()
+        with connection.cursor() as cursor:
+            partitions += create_car_operation_partitions(cursor, months_ahead=4)
+
+        assert set(partitions) | {f"{TABLE}_default"} <= set(
+            list_partitions(connection.cursor(), TABLE)
+        )
+        for partition in set(partitions) | {f"{TABLE}_default"}:
+            assert {
+                f"{partition}_code_key",
+                f"{partition}_open_car",
+                f"{partition}_client_key",
+            } <= index_names(partition)
+
+        self.create_operation(self.cars[0])
+        with pytest.raises(IntegrityError), transaction.atomic():
+            self.create_operation(self.cars[0])
@@ -0,0 +1,142 @@
+import multiprocessing
+import os
+import zlib
+from unittest.mock import patch
+
+import pytest
+from django.core.files.storage import default_storage
+
+from apps.companies import print_sheets, qr_assets
+from apps.companies.models.company_models import CarCode
+from apps.companies.tasks import render_qr_assets_task
+from apps.notifications.models import Notification
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    return tmp_path
+
+
+@pytest.mark.django_db
+class TestQrAssets:
+    def test_codes_are_rendered_once(self, media_root):
+        with patch.object(
+            qr_assets, "render_qr_png", wraps=qr_assets.render_qr_png
+        ) as render:
+            first = qr_assets.qr_asset_urls(["A1", "B2"])
+            second = qr_assets.qr_asset_urls(["A1", "B2", "C3"])
+
+        assert render.call_count == 3
+        assert second["A1"] == first["A1"]
+        assert default_storage.exists(qr_assets.qr_asset_name("C3"))
+
+    def test_a_large_batch_is_split_into_tasks_rendered_in_process(
+        self, media_root, monkeypatch
+    ):
+        # celery's prefork processes are daemonic and can't start children
+        monkeypatch.setitem(multiprocessing.current_process()._config, "daemon", True)
+        monkeypatch.setattr(os, "cpu_count", lambda: 4)
+        monkeypatch.setattr(qr_assets, "QR_TASK_CHUNK_SIZE", 2)
+        codes = [f"L{index}" for index in range(5)]
+
+        with patch.object(
+            render_qr_assets_task, "delay", wraps=render_qr_assets_task.delay
+        ) as delay:
+            render_qr_assets_task(codes)
+
+        assert [call.args[0] for call in delay.call_args_list] == [
+            codes[0:2],
+            codes[2:4],
+            codes[4:5],
+        ]
+        assert all(
+            default_storage.exists(qr_assets.qr_asset_name(code)) for code in codes
+        )
+
+    def test_print_page_links_the_stored_images(self, media_root, admin_user):
+        from django.contrib.admin.sites import site
+        from django.test import RequestFactory
+
+        codes = [
+            CarCode.objects.create(code=f"Q{index}", created_by=admin_user)
+            for index in range(3)
+        ]
+        request = RequestFactory().get("/")
+        request.user = admin_user
+
+        response = site._registry[CarCode].print_qr_codes(
+            request, CarCode.objects.filter(id__in=[code.id for code in codes])
+        )
+
+        html = response.content.decode()
+        assert "base64" not in html
+        for code in codes:
+            assert qr_assets.qr_asset_name(code.code) in html
+
+
+def read_xref(data):
+    start = int(data.rsplit(b"startxref\n", 1)[1].split(b"\n")[0])
+    lines = data[start:].split(b"\n")
+    size = int(lines[1].split()[1])
+    return [int(line.split()[0]) for line in lines[3 : 2 + size]]
+
+
+@pytest.mark.django_db
+class TestQrPrintSheet:
+    def test_sheet_has_a_vector_page_per_code(self, tmp_path):
+        path = tmp_path / "sheet.pdf"
+
+        pages = print_sheets.write_qr_sheet(str(path), iter(["A1", "B(2)"]))
+
+        data = path.read_bytes()
+        assert pages == 2
+        assert data.startswith(b"%PDF-1.4") and data.endswith(b"%%EOF\n")
+        assert b"/Count 2" in data
+        for number, offset in enumerate(read_xref(data), start=1):
+            assert data[offset:].startswith(f"{number} 0 obj".encode())
+        content = zlib.decompress(
+            data.split(b"stream\n", 1)[1].split(b"\nendstream", 1)[0]
+        )
+        assert b" re\n" in content and b"(A1) Tj" in content
+
+    def test_sheet_appears_only_once_it_is_complete(self, tmp_path):
+        path = tmp_path / "sheet.pdf"
+
+        def codes():
+            yield "A1"
+            assert not path.exists()
+            raise ConnectionError
+
+        with pytest.raises(ConnectionError):
+            print_sheets.write_qr_sheet(str(path), codes())
+
+        assert not path.exists()
+
+    def test_sheet_is_written_in_a_worker_on_several_cpus(self, tmp_path, monkeypatch):
+        # celery's prefork processes are daemonic and can't start children
+        monkeypatch.setitem(multiprocessing.current_process()._config, "daemon", True)
+        monkeypatch.setattr(os, "cpu_count", lambda: 4)
+        path = tmp_path / "sheet.pdf"
+
+        assert print_sheets.write_qr_sheet(str(path), iter(["A1", "B2"])) == 2
+
+    def test_admin_action_writes_the_sheet_and_notifies(self, media_root, admin_user):
+        from django.contrib.admin.sites import site
+        from django.contrib.messages.storage.fallback import FallbackStorage
+        from django.test import RequestFactory
+
+        for index in range(3):
+            CarCode.objects.create(code=f"P{index}", created_by=admin_user)
+        request = RequestFactory().post("/")
+        request.user = admin_user
+        request.session = {}
+        request._messages = FallbackStorage(request)
+
+        site._registry[CarCode].print_qr_sheet(request, CarCode.objects.all())
+
+        notification = Notification.objects.get(user=admin_user)
+        filename = notification.url.rsplit("/", 1)[1]
+        assert filename not in str(list(request._messages)[0])
+        data = open(print_sheets.sheet_path(filename), "rb").read()
+        assert b"/Count 3" in data
@@ -0,0 +1,139 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.accounting import ledger
+from apps.companies.models.company_models import Car, Company, CompanyBranch, Driver
+from apps.companies.models.rollup_models import CompanyRollup
+from apps.companies.rollups import TOTAL_FIELDS, refresh_company_rollups
+from apps.geo.models import City, Country, District
+from apps.users.models import CompanyUser, User
+
+
+def rollup_values(company):
+    return {
+        rollup.branch_id: {field: getattr(rollup, field) for field in TOTAL_FIELDS}
+        for rollup in CompanyRollup.objects.filter(company=company)
+    }
+
+
+@pytest.mark.django_db
+class TestCompanyRollups:
+    def setup_method(self, db):
+        country = Country.objects.create(name="Egypt", code="EGP")
+        city = City.objects.create(name="Cairo", country=country)
+        district = District.objects.create(name="Nasr City", city=city)
+        self.admin = User.objects.create(
+            role=User.UserRoles.Admin,
+            email="admin@test.com",
+            name="Admin",
+            phone_number="1111111111",
+        )
+        self.company = Company.objects.create(
+            name="Test Company",
+            balance=Decimal("1000.00"),
+            created_by=self.admin,
+        )
+        self.branch = CompanyBranch.objects.create(
+            name="Test Branch",
+            company=self.company,
+            district=district,
+            balance=Decimal("500.00"),
+            created_by=self.admin,
+        )
+        self.cars = [
+            self.create_car(fuel_type, balance)
+            for fuel_type, balance in (
+                (Car.FuelType.DIESEL, Decimal("100.00")),
+                (Car.FuelType.DIESEL, Decimal("100.00")),
+                (Car.FuelType.GASOLINE, Decimal("40.00")),
+            )
+        ]
+        today = timezone.localtime().date()
+        self.drivers = [
+            Driver.objects.create(
+                name=f"Driver {index}",
+                phone_number=f"0100000000{index}",
+                lincense_number=f"LN-{index}",
+                lincense_expiration_date=expiration_date,
+                branch=self.branch,
+                created_by=self.admin,
+            )
+            for index, expiration_date in enumerate(
+                (
+                    today + timedelta(days=10),
+                    today - timedelta(days=5),
+                    today - timedelta(days=40),
+                )
+            )
+        ]
+
+    def create_car(self, fuel_type, balance):
+        return Car.objects.create(
+            plate_number="1234",
+            plate_character="ABC",
+            fuel_type=fuel_type,
+            balance=balance,
+            branch=self.branch,
+            permitted_fuel_amount=50,
+            tank_capacity=60,
+            model_year=2020,
+            is_with_odometer=False,
+            number_of_fuelings_per_day=1,
+            number_of_washes_per_month=1,
+            created_by=self.admin,
+        )
+
+    def test_rollups_follow_writes(self):
+        company_rollup = rollup_values(self.company)[None]
+
+        # equal car balances must not be merged like Sum(distinct=True) did
+        assert company_rollup["cars_balance"] == Decimal("240.00")
+        assert company_rollup["branches_balance"] == Decimal("500.00")
+        assert company_rollup["cars_count"] == 3
+        assert company_rollup["diesel_cars_count"] == 2
+        assert company_rollup["gasoline_cars_count"] == 1
+        assert company_rollup["drivers_count"] == 3
+        assert company_rollup["expired_license_drivers_count"] == 2
+        assert company_rollup["expired_license_30_days_drivers_count"] == 1
+
+    def test_incremental_updates_match_a_full_refresh(self):
+        ledger.transfer(self.branch, self.cars[0], Decimal("25.00"))
+        ledger.debit(self.cars[1], Decimal("10.00"))
+        self.cars[2].fuel_type = Car.FuelType.DIESEL
+        self.cars[2].save()
+        self.cars[1].delete()
+        self.drivers[2].lincense_expiration_date = timezone.localtime().date()
+        self.drivers[2].save()
+        self.drivers[0].delete()
+
+        incremental = rollup_values(self.company)
+        refresh_company_rollups([self.company.id])
+
+        assert incremental == rollup_values(self.company)
+        assert incremental[None]["cars_balance"] == Decimal("165.00")
+
+    def test_home_reads_the_rollup(self):
+        owner = CompanyUser.objects.create(
+            role=User.UserRoles.CompanyOwner,
+            email="owner@test.com",
+            name="Owner",
+            phone_number="1234567890",
+            company=self.company,
+        )
+        token = AccessToken.for_user(owner)
+        token["company_id"] = self.company.id
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        response = client.get(reverse("company-home"))
+
+        assert response.status_code == 200
+        assert response.data["total_cars_count"] == 3
+        assert response.data["cars_balance"] == Decimal("240.00")
+        assert response.data["total_balance"] == Decimal("1740.00")
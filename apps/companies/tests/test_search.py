@@ -0,0 +1,135 @@
+from importlib import import_module
+
+import pytest
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.companies.models.company_models import Car, Company, CompanyBranch, Driver
+from apps.companies.models.operation_model import CarOperation
+from apps.companies.search_index import refresh_search_text
+from apps.shared.search import normalize_search
+from apps.users.models import CompanyUser, User
+
+
+def test_normalize_search_folds_arabic_spellings():
+    assert normalize_search("الإسكندرية  ") == normalize_search("الاسكندريه")
+    assert normalize_search("مُصطفى") == "مصطفي"
+    assert normalize_search("أ ب ج ١٢٣ ABC") == "ا ب ج 123 abc"
+
+
+@pytest.mark.django_db
+class TestSearchText:
+    @pytest.fixture(autouse=True)
+    def setup(self, api_client, admin_user, geo_data, branch, station_worker):
+        self.client = api_client
+        self.district = geo_data["district"]
+        self.district.name = "الإسكندرية"
+        self.district.save()
+        self.company = Company.objects.create(
+            name="Company", address="Address", created_by=admin_user
+        )
+        self.company_branch = CompanyBranch.objects.create(
+            name="فرع المعادي",
+            company=self.company,
+            district=self.district,
+            created_by=admin_user,
+        )
+        self.owner = CompanyUser.objects.create(
+            name="Owner",
+            phone_number="01200000000",
+            email="owner@example.com",
+            password="password123",
+            role=User.UserRoles.CompanyOwner,
+            company=self.company,
+            created_by=admin_user,
+        )
+        self.car = self.create_car("١٢٣", admin_user)
+        self.other_car = self.create_car("987", admin_user)
+        self.driver = Driver.objects.create(
+            name="مصطفى",
+            phone_number="01100000000",
+            lincense_number="L-1",
+            lincense_expiration_date=timezone.localdate(),
+            branch=self.company_branch,
+            created_by=admin_user,
+        )
+        self.operation = CarOperation.objects.create(
+            car=self.car,
+            driver=self.driver,
+            station_branch=branch,
+            worker=station_worker,
+            created_by=station_worker,
+        )
+
+    def create_car(self, plate_number, admin_user):
+        return Car.objects.create(
+            plate_number=plate_number,
+            plate_character="أ ب ج",
+            model_year=2020,
+            is_with_odometer=True,
+            tank_capacity=60,
+            permitted_fuel_amount=50,
+            number_of_fuelings_per_day=3,
+            number_of_washes_per_month=3,
+            branch=self.company_branch,
+            created_by=admin_user,
+        )
+
+    def search_cars(self, term):
+        token = AccessToken.for_user(self.owner)
+        token["company_id"] = self.company.id
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        response = self.client.get(reverse("cars-list"), {"search": term})
+        assert response.status_code == 200
+        return {car["id"] for car in response.json()["results"]}
+
+    def test_cars_match_however_the_term_is_typed(self):
+        assert self.search_cars("123 الاسكندريه") == {self.car.id}
+        assert self.search_cars("المعادى") == {self.car.id, self.other_car.id}
+        assert self.search_cars("الجيزة") == set()
+
+    def test_a_rename_through_a_relation_refreshes_the_rows_reaching_it(
+        self, django_capture_on_commit_callbacks, station_worker
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            self.district.name = "الجيزة"
+            self.district.save()
+            station_worker.name = "Worker 2"
+            station_worker.save()
+
+        self.car.refresh_from_db()
+        self.operation.refresh_from_db()
+        assert "الجيزه" in self.car.search_text
+        assert "worker 2" in self.operation.search_text
+        assert self.search_cars("الجيزة") == {self.car.id, self.other_car.id}
+
+    def test_an_update_with_update_fields_writes_the_search_text(self):
+        self.driver.name = "Ahmed"
+        self.driver.save(update_fields=["name"])
+
+        self.driver.refresh_from_db()
+        assert self.driver.search_text.startswith("ahmed ")
+
+    def test_refresh_rewrites_stale_rows(self):
+        CarOperation.objects.update(search_text="")
+
+        assert refresh_search_text(CarOperation) == 1
+        self.operation.refresh_from_db()
+        assert self.operation.search_text.endswith("worker 1")
+
+    def test_migration_fills_in_existing_rows(self):
+        migration = import_module("apps.companies.migrations.0022_search_text")
+        state = MigrationExecutor(connection).loader.project_state(
+            ("companies", "0022_search_text")
+        )
+        Car.objects.update(search_text="")
+        CarOperation.objects.update(search_text="")
+
+        migration.fill_search_text(state.apps, None)
+
+        assert self.search_cars("الاسكندريه") == {self.car.id, self.other_car.id}
+        self.operation.refresh_from_db()
+        assert self.operation.search_text.endswith("worker 1")
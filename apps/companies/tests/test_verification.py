@@ -0,0 +1,107 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.companies.car_counters import get_car_counters
+from apps.companies.models.company_models import Car, Company, CompanyBranch, Driver
+from apps.stations.models.service_models import Service
+
+# user and principal (first request with the token), car with branch, company
+# and service, driver with branch, daily fuelings and open operation (cold
+# cache), reference code probe, worker and station branch names for the
+# operation's search text, operation insert, car update, and the two
+# savepoints with their releases
+VERIFICATION_QUERIES = 15
+
+
+@pytest.mark.django_db
+class TestVerifyDriver:
+    @pytest.fixture(autouse=True)
+    def setup(self, admin_user, branch, station_worker):
+        self.station_branch = branch
+        self.worker = station_worker
+        company = Company.objects.create(
+            name="Company", address="Address", created_by=admin_user
+        )
+        company_branch = CompanyBranch.objects.create(
+            name="Company Branch",
+            company=company,
+            fees=Decimal("10.00"),
+            created_by=admin_user,
+        )
+        self.service = Service.objects.create(
+            name="Diesel",
+            type=Service.ServiceType.DIESEL,
+            unit=Service.ServiceUnit.LITRE,
+            cost=Decimal("10.00"),
+            created_by=admin_user,
+        )
+        self.car = Car.objects.create(
+            plate_number="123",
+            plate_character="ABC",
+            model_year=2020,
+            is_with_odometer=True,
+            tank_capacity=60,
+            permitted_fuel_amount=50,
+            number_of_fuelings_per_day=3,
+            number_of_washes_per_month=3,
+            balance=Decimal("1000.00"),
+            service=self.service,
+            fuel_allowed_days=[timezone.localdate().strftime("%A")],
+            branch=company_branch,
+            created_by=admin_user,
+        )
+        self.driver = Driver.objects.create(
+            name="Driver",
+            phone_number="01100000000",
+            lincense_number="L-1",
+            lincense_expiration_date=timezone.localdate(),
+            branch=company_branch,
+            created_by=admin_user,
+        )
+
+    def test_verification_query_count(self, auth_client):
+        client = auth_client(self.worker, station_id=self.station_branch.station_id)
+        url = reverse(
+            "verify-driver",
+            kwargs={
+                "driver_code": self.driver.code,
+                "car_code": self.car.code,
+                "service_type": "petrol",
+            },
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(url)
+
+        assert response.status_code == 200, response.data
+        assert len(context.captured_queries) == VERIFICATION_QUERIES
+
+    def test_verification_keeps_a_balance_credited_meanwhile(self, auth_client):
+        client = auth_client(self.worker, station_id=self.station_branch.station_id)
+        url = reverse(
+            "verify-driver",
+            kwargs={
+                "driver_code": self.driver.code,
+                "car_code": self.car.code,
+                "service_type": "petrol",
+            },
+        )
+
+        def credit_then_count(car_id):
+            Car.objects.filter(pk=car_id).update(balance=F("balance") + 100)
+            return get_car_counters(car_id)
+
+        with patch("apps.companies.verification.get_car_counters", credit_then_count):
+            response = client.post(url)
+
+        assert response.status_code == 200, response.data
+        car = Car.objects.get(pk=self.car.pk)
+        assert car.balance == self.car.balance + 100
+        assert car.is_blocked_balance_update
@@ -0,0 +1,183 @@
+"""
+Data access of driver verification.
+
+A scan needs the car with its branch, company and service, the driver with
+its branch and the station branch of the worker. The car and the driver are
+read with one query each, and the station branch id comes from the token's
+principal. `open_operation` runs the checks of a scan and opens the
+operation, for the verify endpoint and the offline sync.
+"""
+
+import math
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from rest_framework import status
+
+from apps.companies.car_counters import get_car_counters
+from apps.companies.models.company_models import Car, Driver
+from apps.companies.models.operation_model import CarOperation
+from apps.companies.partitions import lock_car_operations
+from apps.shared.base_exception_class import CustomValidationError
+from apps.stations.models.service_models import Service
+from apps.users.models import Worker
+
+
+def get_car(car_code):
+    return (
+        Car.objects.select_related("branch__company", "service")
+        .filter(code=car_code.strip())
+        .first()
+    )
+
+
+def get_driver(driver_code):
+    return (
+        Driver.objects.select_related("branch").filter(code=driver_code.strip()).first()
+    )
+
+
+def get_station_branch_id(request):
+    principal = getattr(request, "principal", None)
+    if principal is not None and principal.station_branch_id:
+        return principal.station_branch_id
+    return (
+        Worker.objects.filter(pk=request.user.pk)
+        .values_list("station_branch_id", flat=True)
+        .first()
+    )
+
+
+@dataclass(frozen=True)
+class VerifiedOperation:
+    car: Car
+    service: Service
+    operation: CarOperation
+    available_liters: int
+    available_cost: Decimal
+
+
+def open_operation(request, driver_code, car_code, service_type, **fields):
+    """
+    Check that the driver may use the car for `service_type` now and open a
+    pending operation for it, with `fields` set on the operation.
+    """
+    car = get_car(car_code)
+    if not car:
+        raise CustomValidationError(
+            message="كود السيارة هذا لا يعمل او غير مفعل الان.",
+            code="car_code_not_found",
+            errors=[],
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+
+    company_branch = car.branch
+    if not company_branch.company.is_active:
+        raise CustomValidationError(
+            message="حساب الشركه معلق مؤقتا",
+            code="company_not_active",
+            errors=[],
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+
+    driver = get_driver(driver_code)
+    if not driver:
+        raise CustomValidationError(
+            message="كود السائق هذا لا يعمل او غير مفعل الان.",
+            code="driver_code_not_found",
+            errors=[],
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+
+    if driver.branch.company_id != company_branch.company_id:
+        raise CustomValidationError(
+            message="السائق لا ينتمي للشركة",
+            code="driver_not_belongs_to_company",
+            errors=[],
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+
+    # unique_open_car_operation only covers one partition of a partitioned table
+    lock_car_operations(car.id)
+    fuelings_today, open_operation = get_car_counters(car.id)
+    if open_operation:
+        raise CustomValidationError(
+            message="السيارة قيد عمليه اخرى",
+            code="car_in_progress",
+            errors=[],
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if not car.is_available_today():
+        raise CustomValidationError(
+            message="السيبارة غير مصرح لها هذا اليوم",
+            code="car_not_active",
+            errors=[],
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+
+    if service_type == "petrol":
+        car_service = car.service
+        liter_cost = (car_service.cost * company_branch.fees / 100) + car_service.cost
+        if car.balance < liter_cost:
+            raise CustomValidationError(
+                message="السيارة لا تمتلك كافٍ من المال",
+                code="not_enough_balance",
+                errors=[],
+                status_code=status.HTTP_404_NOT_FOUND,
+            )
+
+        liters_count = (
+            car.permitted_fuel_amount
+            if car.permitted_fuel_amount
+            else car.tank_capacity
+        )
+        available_liters = math.floor(car.balance / liter_cost)
+        available_liters = min(liters_count, available_liters)
+        available_cost = available_liters * liter_cost
+        if fuelings_today >= car.number_of_fuelings_per_day:
+            raise CustomValidationError(
+                message="السيارة تجاوزت عدد عمليات البترولية اليومية المسموح بها",
+                code="car_in_progress",
+                errors=[],
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+    else:
+        car_service = None
+        available_liters = 0
+        liter_cost = 0
+        available_cost = car.balance
+
+    station_branch_id = get_station_branch_id(request)
+    try:
+        # unique_open_car_operation stops a concurrent verification of the same car
+        with transaction.atomic():
+            car_operation = CarOperation.objects.create(
+                car=car,
+                driver=driver,
+                service=car_service,
+                worker_id=request.user.id,
+                station_branch_id=station_branch_id,
+                status=CarOperation.OperationStatus.PENDING,
+                created_by_id=request.user.id,
+                **fields,
+            )
+    except IntegrityError:
+        raise CustomValidationError(
+            message="السيارة قيد عمليه اخرى",
+            code="car_in_progress",
+            errors=[],
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
+    car.is_blocked_balance_update = True
+    # the balance read above may be stale by now, it isn't written back
+    car.save(update_fields=["is_blocked_balance_update"])
+    return VerifiedOperation(
+        car=car,
+        service=car_service,
+        operation=car_operation,
+        available_liters=available_liters,
+        available_cost=available_cost,
+    )
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Notification
+from .models import Notification, PushMessage
 
 
 @admin.register(Notification)
@@ -23,3 +23,15 @@ class NotificationAdmin(admin.ModelAdmin):
 
     admin.site.site_header = "Notifications Management"
     admin.site.index_title = "Manage Notifications"
+
+
+@admin.register(PushMessage)
+class PushMessageAdmin(admin.ModelAdmin):
+    list_display = ("id", "notification", "status", "attempts", "next_retry_at")
+    list_filter = ("status",)
+    raw_id_fields = ("notification",)
+    ordering = ("-id",)
+    list_per_page = 20
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,143 @@
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from firebase_admin import messaging
+
+from apps.notifications.models import Notification, PushMessage
+from apps.users.models import FirebaseToken
+
+logger = logging.getLogger(__name__)
+
+# firebase accepts at most 500 messages per send_each call
+PUSH_BATCH_SIZE = 500
+PUSH_MAX_ATTEMPTS = 5
+# how long a claimed batch stays away from other workers while it is sent
+PUSH_LEASE = timedelta(minutes=5)
+
+# errors meaning the device token will never work again
+STALE_TOKEN_ERRORS = (messaging.UnregisteredError, messaging.SenderIdMismatchError)
+
+
+def enqueue_push_messages(notifications):
+    """Queue the notifications in the push outbox and wake the worker on commit."""
+    from apps.notifications.tasks import send_push_messages
+
+    PushMessage.objects.bulk_create(
+        [PushMessage(notification=notification) for notification in notifications]
+    )
+    transaction.on_commit(send_push_messages.delay)
+
+
+def send_notifications(notifications):
+    """
+    Insert the notifications with one statement and queue their pushes; the
+    Firebase call happens in the worker once the transaction has committed.
+    """
+    enqueue_push_messages(Notification.objects.bulk_create(notifications))
+
+
+def claim_pushes(batch_size, now):
+    """
+    Lease a batch of due outbox rows to this worker and return them. The
+    lease moves next_retry_at PUSH_LEASE ahead and commits, so other workers
+    skip the rows while they are sent, and pick them up again if this worker
+    dies before recording the outcome.
+    """
+    with transaction.atomic():
+        pushes = list(
+            PushMessage.objects.select_for_update(skip_locked=True)
+            .select_related("notification")
+            .filter(status=PushMessage.Status.PENDING, next_retry_at__lte=now)
+            .order_by("id")[:batch_size]
+        )
+        PushMessage.objects.filter(id__in=[push.id for push in pushes]).update(
+            next_retry_at=now + PUSH_LEASE
+        )
+    return pushes
+
+
+def drain_push_outbox(batch_size=PUSH_BATCH_SIZE):
+    """
+    Push one batch of due outbox rows and return how many were processed.
+
+    Rows are claimed with SKIP LOCKED and a lease so several workers can drain
+    in parallel, Firebase is called after the claim has committed. Tokens
+    Firebase reports as unregistered are deleted, transient failures are
+    retried with exponential backoff until PUSH_MAX_ATTEMPTS.
+    """
+    now = timezone.now()
+    pushes = claim_pushes(batch_size, now)
+    if not pushes:
+        return 0
+
+    user_tokens = {}
+    for user_id, token in FirebaseToken.objects.filter(
+        user_id__in={push.notification.user_id for push in pushes}
+    ).values_list("user_id", "token"):
+        user_tokens.setdefault(user_id, []).append(token)
+
+    messages, owners = [], []
+    for push in pushes:
+        for token in user_tokens.get(push.notification.user_id, []):
+            messages.append(
+                messaging.Message(
+                    notification=messaging.Notification(
+                        title=push.notification.title,
+                        body=push.notification.description,
+                    ),
+                    token=token,
+                )
+            )
+            owners.append((push, token))
+
+    delivered, failed, stale_tokens = set(), {}, set()
+    for start in range(0, len(messages), PUSH_BATCH_SIZE):
+        chunk = owners[start : start + PUSH_BATCH_SIZE]
+        try:
+            response = messaging.send_each(messages[start : start + PUSH_BATCH_SIZE])
+        except Exception as e:  # noqa
+            for push, _ in chunk:
+                failed[push.id] = str(e)
+            continue
+        for (push, token), result in zip(chunk, response.responses):
+            if result.success:
+                delivered.add(push.id)
+            elif isinstance(result.exception, STALE_TOKEN_ERRORS):
+                stale_tokens.add(token)
+            else:
+                failed[push.id] = str(result.exception)
+
+    if stale_tokens:
+        FirebaseToken.objects.filter(token__in=stale_tokens).delete()
+
+    # a push counts as done once any device got it or nothing is left to retry
+    retries, done = [], []
+    for push in pushes:
+        if push.id in failed and push.id not in delivered:
+            push.status = (
+                PushMessage.Status.FAILED
+                if push.attempts + 1 >= PUSH_MAX_ATTEMPTS
+                else PushMessage.Status.PENDING
+            )
+            push.next_retry_at = now + timedelta(minutes=2**push.attempts)
+            push.attempts += 1
+            push.last_error = failed[push.id]
+            retries.append(push)
+        else:
+            done.append(push.id)
+    with transaction.atomic():
+        PushMessage.objects.filter(id__in=done).update(
+            status=PushMessage.Status.SENT, attempts=F("attempts") + 1
+        )
+        Notification.objects.filter(push_message__id__in=delivered).update(
+            is_success=True
+        )
+        PushMessage.objects.bulk_update(
+            retries, ["status", "next_retry_at", "attempts", "last_error"]
+        )
+    if failed:
+        logger.warning("%s push messages failed and will be retried", len(failed))
+    return len(pushes)
@@ -1,7 +1,34 @@
 from django.db import models
+from django.utils import timezone
 from django_extensions.db.models import TimeStampedModel
 
 
+class NotificationManager(models.Manager):
+    def fan_out(self, user_ids, title, description, type, url=None):
+        """
+        Send the same notification to many users with one INSERT and one
+        batched push job, whatever the number of recipients.
+        """
+        from apps.notifications.helpers import enqueue_push_messages
+
+        notifications = self.bulk_create(
+            [
+                self.model(
+                    user_id=user_id,
+                    title=title,
+                    description=description,
+                    type=type,
+                    url=url,
+                )
+                for user_id in dict.fromkeys(user_ids)
+                if user_id
+            ]
+        )
+        if notifications:
+            enqueue_push_messages(notifications)
+        return notifications
+
+
 class Notification(TimeStampedModel):
 
     class NotificationType(models.TextChoices):
@@ -18,3 +45,37 @@ class Notification(TimeStampedModel):
     is_success = models.BooleanField(default=False)
     user = models.ForeignKey("users.User", on_delete=models.CASCADE)
     url = models.URLField(null=True, blank=True)
+
+    objects = NotificationManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-id"], name="notification_user"),
+            models.Index(
+                fields=["user"],
+                condition=models.Q(is_read=False),
+                name="notification_user_unread",
+            ),
+        ]
+
+
+class PushMessage(TimeStampedModel):
+    """Outbox row for a notification waiting to be pushed to the user's devices."""
+
+    class Status(models.TextChoices):
+        PENDING = "pending"
+        SENT = "sent"
+        FAILED = "failed"
+
+    notification = models.OneToOneField(
+        Notification, on_delete=models.CASCADE, related_name="push_message"
+    )
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_retry_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "next_retry_at"])]
@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from apps.notifications.helpers import PUSH_BATCH_SIZE, drain_push_outbox
+
+
+@shared_task(ignore_result=True)
+def send_push_messages():
+    while drain_push_outbox() == PUSH_BATCH_SIZE:
+        pass
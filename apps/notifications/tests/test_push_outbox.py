@@ -0,0 +1,137 @@
+from unittest.mock import patch
+
+import pytest
+from firebase_admin import messaging
+
+from apps.notifications.helpers import drain_push_outbox
+from apps.notifications.models import Notification, PushMessage
+from apps.users.models import FirebaseToken
+
+
+class FakeResponse:
+    def __init__(self, success, exception=None):
+        self.success = success
+        self.exception = exception
+
+
+class FakeBatchResponse:
+    def __init__(self, responses):
+        self.responses = responses
+
+
+@pytest.mark.django_db
+class TestPushOutbox:
+    @pytest.fixture(autouse=True)
+    def setup(self, driver_user):
+        FirebaseToken.objects.create(user=driver_user, token="live-token")
+        FirebaseToken.objects.create(user=driver_user, token="stale-token")
+        self.notification = Notification.objects.create(
+            user=driver_user,
+            title="title",
+            description="body",
+            type=Notification.NotificationType.GENERAL,
+        )
+
+    def test_notification_is_queued_without_calling_firebase(self):
+        with patch.object(messaging, "send_each") as send_each:
+            Notification.objects.create(
+                user=self.notification.user,
+                title="title",
+                description="body",
+                type=Notification.NotificationType.GENERAL,
+            )
+        send_each.assert_not_called()
+        assert (
+            PushMessage.objects.filter(status=PushMessage.Status.PENDING).count() == 2
+        )
+
+    def test_drain_sends_and_prunes_unregistered_tokens(self):
+        def send_each(messages):
+            return FakeBatchResponse(
+                [
+                    (
+                        FakeResponse(False, messaging.UnregisteredError("gone"))
+                        if message.token == "stale-token"
+                        else FakeResponse(True)
+                    )
+                    for message in messages
+                ]
+            )
+
+        with patch.object(messaging, "send_each", side_effect=send_each):
+            assert drain_push_outbox() == 1
+
+        push = PushMessage.objects.get()
+        self.notification.refresh_from_db()
+        assert push.status == PushMessage.Status.SENT
+        assert self.notification.is_success
+        assert list(FirebaseToken.objects.values_list("token", flat=True)) == [
+            "live-token"
+        ]
+
+    def test_drain_backs_off_when_firebase_is_down(self):
+        with patch.object(messaging, "send_each", side_effect=ConnectionError):
+            drain_push_outbox()
+
+        push = PushMessage.objects.get()
+        assert push.status == PushMessage.Status.PENDING
+        assert push.attempts == 1
+        assert drain_push_outbox() == 0
+
+    def test_batch_is_claimed_before_firebase_is_called(self):
+        def send_each(messages):
+            # another worker finds the leased batch taken
+            assert drain_push_outbox() == 0
+            return FakeBatchResponse([FakeResponse(True) for _ in messages])
+
+        with patch.object(messaging, "send_each", side_effect=send_each):
+            assert drain_push_outbox() == 1
+
+        assert PushMessage.objects.get().status == PushMessage.Status.SENT
+
+    def test_each_failed_push_keeps_its_own_error(self, finance_user):
+        FirebaseToken.objects.create(user=finance_user, token="finance-token")
+        other = Notification.objects.create(
+            user=finance_user,
+            title="title",
+            description="body",
+            type=Notification.NotificationType.GENERAL,
+        )
+
+        def send_each(messages):
+            return FakeBatchResponse(
+                [
+                    FakeResponse(False, ValueError(f"{message.token} failed"))
+                    for message in messages
+                ]
+            )
+
+        with patch.object(messaging, "send_each", side_effect=send_each):
+            assert drain_push_outbox() == 2
+
+        assert PushMessage.objects.get(notification=other).last_error == (
+            "finance-token failed"
+        )
+        assert PushMessage.objects.get(
+            notification=self.notification
+        ).last_error.endswith("-token failed")
+        assert set(PushMessage.objects.values_list("attempts", flat=True)) == {1}
+
+
+@pytest.mark.django_db
+def test_fan_out_dedupes_recipients_and_queues_one_push_each(
+    driver_user, finance_user, django_assert_num_queries
+):
+    with django_assert_num_queries(2):
+        notifications = Notification.objects.fan_out(
+            [driver_user.id, finance_user.id, driver_user.id, None],
+            title="title",
+            description="body",
+            type=Notification.NotificationType.MONEY,
+        )
+
+    assert [notification.user_id for notification in notifications] == [
+        driver_user.id,
+        finance_user.id,
+    ]
+    assert PushMessage.objects.count() == 2
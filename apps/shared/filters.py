@@ -0,0 +1,68 @@
+"""
+Date filters on datetime columns.
+
+`created__date__gte=day` casts every row to a date before comparing, so the
+btree index on the column can't be used. These translate dates (and times)
+to half-open [start, end) timestamp bounds in the current timezone and compare
+the raw column instead.
+"""
+
+from datetime import time, timedelta
+
+from django.db.models import Q
+from django_filters import DateFilter
+from django_filters.constants import EMPTY_VALUES
+
+from apps.shared.helpers import start_of
+
+
+def timestamp_bounds(date_from=None, date_to=None, time_from=None, time_to=None):
+    """
+    The [start, end) datetimes from `date_from` at `time_from` (midnight by
+    default) up to the end of `date_to`, or up to `time_to` on that day when
+    given. A bound whose date is missing is None.
+    """
+    start = end = None
+    if date_from:
+        start = start_of(date_from, time_from or time.min)
+    if date_to:
+        if time_to:
+            # the whole `time_to` second is included
+            end = start_of(date_to, time_to) + timedelta(seconds=1)
+        else:
+            end = start_of(date_to + timedelta(days=1))
+    return start, end
+
+
+def timestamp_range(field, date_from=None, date_to=None, time_from=None, time_to=None):
+    """Q matching `field` within timestamp_bounds(...)."""
+    start, end = timestamp_bounds(date_from, date_to, time_from, time_to)
+    condition = Q()
+    if start:
+        condition &= Q(**{f"{field}__gte": start})
+    if end:
+        condition &= Q(**{f"{field}__lt": end})
+    return condition
+
+
+class TimestampDateFilter(DateFilter):
+    """
+    DateFilter for a datetime `field_name` that compares against day bounds,
+    e.g. lookup_expr="lte" keeps everything before the next midnight.
+    """
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        if self.lookup_expr in ("gte", "gt"):
+            day = value if self.lookup_expr == "gte" else value + timedelta(days=1)
+            condition = timestamp_range(self.field_name, date_from=day)
+        elif self.lookup_expr in ("lte", "lt"):
+            day = value if self.lookup_expr == "lte" else value - timedelta(days=1)
+            condition = timestamp_range(self.field_name, date_to=day)
+        else:
+            condition = timestamp_range(self.field_name, date_from=value, date_to=value)
+        if self.exclude:
+            return self.get_method(qs)(~condition)
+        qs = self.get_method(qs)(condition)
+        return qs.distinct() if self.distinct else qs
@@ -1,4 +1,27 @@
+import hashlib
 import random
+import secrets
+import threading
+
+from django.conf import settings
+from django.core import checks
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+
+# numbers reserved from the database per round trip, the sequences created in
+# the migrations increment by the same step
+CODE_BLOCK_SIZE = 100
+FEISTEL_ROUNDS = 4
+MISSING_KEY_MESSAGE = (
+    "CODE_PERMUTATION_KEY is not set. Set it once to a random value and never "
+    "change it, codes are generated from it."
+)
+
+
+def check_code_permutation_key(app_configs=None, **kwargs):
+    if settings.CODE_PERMUTATION_KEY:
+        return []
+    return [checks.Error(MISSING_KEY_MESSAGE, id="shared.E001")]
 
 
 def generate_unique_code(model, look_up="code", min_value=100000, max_value=999999):
@@ -6,3 +29,122 @@ def generate_unique_code(model, look_up="code", min_value=100000, max_value=9999
         new_code = str(random.randint(min_value, max_value))
         if not model.objects.filter(**{look_up: new_code}).exists():
             return new_code
+
+
+def generate_unique_codes(
+    model, count, look_up="code", min_value=100000, max_value=999999
+):
+    """Pick `count` distinct unused codes, probing the table once per round."""
+    codes = set()
+    while len(codes) < count:
+        candidates = {
+            str(random.randint(min_value, max_value)) for _ in range(count - len(codes))
+        } - codes
+        taken = set(
+            model.objects.filter(**{f"{look_up}__in": candidates}).values_list(
+                look_up, flat=True
+            )
+        )
+        codes |= candidates - taken
+    return list(codes)
+
+
+def generate_otp(length=6):
+    """One time passwords only have to be unpredictable, not unique."""
+    return str(secrets.randbelow(9 * 10 ** (length - 1)) + 10 ** (length - 1))
+
+
+class CodeSequence:
+    """
+    Hands out unique codes in [min_value, max_value] without reading the table.
+
+    A Postgres sequence counts how many codes were issued; numbers are reserved
+    CODE_BLOCK_SIZE at a time and served from memory, and each number is mapped
+    through a keyed Feistel permutation of the range so consecutive codes are
+    not guessable. A permutation never maps two numbers to the same code, so
+    codes are unique as long as the range is not shared with another source
+    and the key, settings.CODE_PERMUTATION_KEY, never changes.
+    Rolled back transactions only waste numbers.
+
+    Databases without sequences (sqlite in tests) fall back to probing.
+    """
+
+    def __init__(self, name, min_value, max_value):
+        self.name = name
+        self.min_value = min_value
+        self.size = max_value - min_value + 1
+        # the permutation works on an even number of bits and cycle-walks
+        # values that fall outside the range back into it
+        self.half_bits = ((self.size - 1).bit_length() + 1) // 2
+        self.half_mask = (1 << self.half_bits) - 1
+        self._key = None
+        self._next = self._end = 0
+        self._lock = threading.Lock()
+
+    def next_code(self, model, look_up="code"):
+        return self.next_codes(model, 1, look_up)[0]
+
+    def next_codes(self, model, count, look_up="code"):
+        if connection.vendor != "postgresql":
+            return generate_unique_codes(
+                model,
+                count,
+                look_up=look_up,
+                min_value=self.min_value,
+                max_value=self.min_value + self.size - 1,
+            )
+        with self._lock:
+            numbers = []
+            while len(numbers) < count:
+                if self._next >= self._end:
+                    self._reserve_block()
+                numbers.append(self._next)
+                self._next += 1
+        return [str(self.min_value + self.permute(number)) for number in numbers]
+
+    def _reserve_block(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT nextval(%s)", [self.name])
+            start = cursor.fetchone()[0]
+        if start >= self.size:
+            raise RuntimeError(f"code sequence {self.name} is exhausted")
+        self._next, self._end = start, min(start + CODE_BLOCK_SIZE, self.size)
+
+    def permute(self, number):
+        value = number
+        while True:
+            left, right = value >> self.half_bits, value & self.half_mask
+            for round_number in range(FEISTEL_ROUNDS):
+                left, right = right, left ^ self._round(round_number, right)
+            value = (left << self.half_bits) | right
+            if value < self.size:
+                return value
+
+    def _round(self, round_number, value):
+        if self._key is None:
+            if not settings.CODE_PERMUTATION_KEY:
+                raise ImproperlyConfigured(MISSING_KEY_MESSAGE)
+            self._key = hashlib.sha256(
+                f"{settings.CODE_PERMUTATION_KEY}:{self.name}".encode()
+            ).digest()
+        digest = hashlib.blake2b(
+            f"{round_number}:{value}".encode(), key=self._key, digest_size=8
+        ).digest()
+        return int.from_bytes(digest, "big") & self.half_mask
+
+
+# the ranges are disjoint from the 6 and 9 digit codes issued by probing so
+# they can never hit a legacy value
+CAR_CODES = CodeSequence("shared_car_code_seq", 10**6, 10**7 - 1)
+DRIVER_CODES = CodeSequence("shared_driver_code_seq", 10**6, 10**7 - 1)
+CASH_REQUEST_CODES = CodeSequence("shared_cash_request_code_seq", 10**6, 10**7 - 1)
+CAR_OPERATION_CODES = CodeSequence("shared_car_operation_code_seq", 10**9, 10**10 - 1)
+REFERENCE_CODES = CodeSequence("shared_reference_code_seq", 10**9, 10**10 - 1)
+
+CODE_SEQUENCES = (
+    CAR_CODES,
+    DRIVER_CODES,
+    CASH_REQUEST_CODES,
+    CAR_OPERATION_CODES,
+    REFERENCE_CODES,
+)
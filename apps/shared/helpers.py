@@ -1,5 +1,20 @@
+from datetime import datetime, time, timedelta
+
 from django.utils import timezone
 
 
 def today():
     return timezone.now().date()
+
+
+def start_of(day, at=time.min):
+    """Aware datetime of `day` at `at` in the current timezone."""
+    return timezone.make_aware(datetime.combine(day, at))
+
+
+def day_range(day):
+    """
+    Aware [start, end) bounds of `day` in the current timezone, the indexable
+    equivalent of `created__date=day`.
+    """
+    return start_of(day), start_of(day + timedelta(days=1))
@@ -0,0 +1,114 @@
+"""
+Idempotency-Key support for the endpoints that move money.
+
+A client sends the same `Idempotency-Key` header on every retry of a request.
+The first request runs and its response is stored in the cache for
+IDEMPOTENCY_TTL seconds under the user and the key, with a fingerprint of the
+request. A retry with the same request gets the stored response back without
+running the view again, a retry while the first one still runs gets a 409,
+and the same key with a different request gets a 422. A request that fails
+with an exception stores nothing, so it can be retried.
+"""
+
+import functools
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import UploadedFile
+from rest_framework import status
+from rest_framework.response import Response
+
+from apps.shared.base_exception_class import CustomValidationError
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_TTL = 60 * 60 * 24
+# longest a request may run before its key can be used again
+IDEMPOTENCY_LOCK_TIMEOUT = 60
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+def idempotency_cache_key(request, key):
+    return f"idempotency:{request.user.id}:{key}"
+
+
+def request_fingerprint(request, args, kwargs):
+    data = {}
+    for name in sorted(request.data):
+        values = (
+            request.data.getlist(name)
+            if hasattr(request.data, "getlist")
+            else [request.data[name]]
+        )
+        data[name] = [
+            [value.name, value.size] if isinstance(value, UploadedFile) else value
+            for value in values
+        ]
+    payload = json.dumps(
+        [request.method, request.path, args, kwargs, data],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def idempotent(view_method):
+    """Make a view method replay its response for a repeated Idempotency-Key."""
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            raise CustomValidationError(
+                message="Idempotency-Key is too long", code="invalid_idempotency_key"
+            )
+
+        cache_key = idempotency_cache_key(request, key)
+        fingerprint = request_fingerprint(request, args, kwargs)
+        if not cache.add(
+            cache_key,
+            {"fingerprint": fingerprint, "done": False},
+            IDEMPOTENCY_LOCK_TIMEOUT,
+        ):
+            return replay(cache.get(cache_key), fingerprint)
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except BaseException:
+            cache.delete(cache_key)
+            raise
+        cache.set(
+            cache_key,
+            {
+                "fingerprint": fingerprint,
+                "done": True,
+                "status": response.status_code,
+                "data": response.data,
+            },
+            IDEMPOTENCY_TTL,
+        )
+        return response
+
+    return wrapper
+
+
+def replay(stored, fingerprint):
+    if stored is None or not stored["done"]:
+        raise CustomValidationError(
+            message="A request with this Idempotency-Key is in progress",
+            code="idempotency_key_in_use",
+            status_code=status.HTTP_409_CONFLICT,
+        )
+    if stored["fingerprint"] != fingerprint:
+        raise CustomValidationError(
+            message="Idempotency-Key was used with a different request",
+            code="idempotency_key_reused",
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return Response(
+        stored["data"],
+        status=stored["status"],
+        headers={"Idempotent-Replayed": "true"},
+    )
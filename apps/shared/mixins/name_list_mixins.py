@@ -0,0 +1,45 @@
+import json
+
+from django.http import StreamingHttpResponse
+
+NAME_LIST_CHUNK_SIZE = 2000
+
+
+def stream_name_list(queryset, fields):
+    """
+    Yield `{"results": [...]}` for `fields` of `queryset` one chunk of rows
+    at a time, without building model instances.
+    """
+    yield '{"results": ['
+    rows = queryset.values_list(*fields).iterator(chunk_size=NAME_LIST_CHUNK_SIZE)
+    separator = ""
+    chunk = []
+    for row in rows:
+        chunk.append(json.dumps(dict(zip(fields, row)), ensure_ascii=False))
+        if len(chunk) == NAME_LIST_CHUNK_SIZE:
+            yield separator + ",".join(chunk)
+            separator, chunk = ",", []
+    if chunk:
+        yield separator + ",".join(chunk)
+    yield "]}"
+
+
+class StreamingNameListMixin:
+    """
+    Stream `name_list_fields` of the filtered queryset as the whole list when
+    the request has no_paginate=true, for the dropdowns that need every row.
+    """
+
+    name_list_fields = ["id", "name"]
+
+    def is_name_list(self):
+        return self.request.query_params.get("no_paginate", "").lower() == "true"
+
+    def list(self, request, *args, **kwargs):
+        if not self.is_name_list():
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return StreamingHttpResponse(
+            stream_name_list(queryset, self.name_list_fields),
+            content_type="application/json",
+        )
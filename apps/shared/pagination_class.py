@@ -1,20 +1,98 @@
-from rest_framework.pagination import LimitOffsetPagination
+import json
+
+from django.db import connections
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
 from rest_framework.response import Response
 
 
+def estimate_count(queryset):
+    """
+    The planner's row estimate for `queryset` on postgres. The table's
+    pg_class stats when it is not filtered, or EXPLAIN's estimate when it is.
+    Other databases, and tables that were never analyzed, get an exact count.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return queryset.count()
+    if not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            estimate = cursor.fetchone()[0]
+    else:
+        plan = json.loads(queryset.order_by().explain(format="json"))
+        estimate = int(plan[0]["Plan"]["Plan Rows"])
+    return estimate if estimate >= 0 else queryset.count()
+
+
+class IdCursorPagination(CursorPagination):
+    ordering = "-id"
+    page_size = 10
+    page_size_query_param = "limit"
+    max_page_size = 1000
+
+
 class CustomLimitOffsetPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination with two opt-in modes:
+
+    - `cursor` (empty for the first page) switches querysets ordered by -id to
+      keyset pagination with opaque cursors, so deep pages cost the same as
+      the first one and no COUNT(*) is run. `estimate_count=true` adds the
+      planner's estimate as `count`.
+    - `no_paginate=true` returns the first `no_paginate_max` rows unpaginated,
+      with `truncated` telling whether there were more. Views that must
+      return every row stream them instead, see StreamingNameListMixin.
+    """
+
     limit_query_param = "limit"
     offset_query_param = "offset"
+    cursor_query_param = "cursor"
     default_limit = 10
+    no_paginate_max = 1000
 
     def paginate_queryset(self, queryset, request, view=None):
         self.request = request
+        self.cursor_pagination = None
 
+        if self.cursor_query_param in request.query_params and tuple(
+            queryset.query.order_by
+        ) in (("-id",), ("-pk",)):
+            self.cursor_pagination = IdCursorPagination()
+            self.queryset = queryset
+            return self.cursor_pagination.paginate_queryset(queryset, request, view)
         if request.query_params.get("no_paginate", "").lower() == "true":
-            return queryset
+            rows = list(queryset[: self.no_paginate_max + 1])
+            self.truncated = len(rows) > self.no_paginate_max
+            return rows[: self.no_paginate_max]
         return super().paginate_queryset(queryset, request, view)
 
     def get_paginated_response(self, data):
+        if self.cursor_pagination is not None:
+            response = self.cursor_pagination.get_paginated_response(data)
+            if self.request.query_params.get("estimate_count", "").lower() == "true":
+                response.data["count"] = estimate_count(self.queryset)
+            return response
         if self.request.query_params.get("no_paginate", "").lower() == "true":
-            return Response({"results": data})
+            return Response({"results": data, "truncated": self.truncated})
         return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Keyset pagination cursor, empty for the first page.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": "estimate_count",
+                "required": False,
+                "in": "query",
+                "description": "Add an estimated count to keyset pages.",
+                "schema": {"type": "boolean"},
+            },
+        ]
@@ -0,0 +1,195 @@
+"""
+Monthly range partitions on postgres.
+
+A partitioned table gets one partition per month, named `<table>_YYYY_MM`,
+bounded by the first midnight of the month in the current timezone.
+`create_partitions` keeps the partitions of the coming months ready and
+`detach_partitions` takes old months out of the table. Rows of a month
+without a partition go to the default one and move into the month's
+partition once it is created. `on_create` lets a table add what postgres
+can't declare on the parent, e.g. unique indexes without the partition key.
+
+Django's migrations don't know about the partitions, schema changes of a
+partitioned table need a hand-written migration.
+"""
+
+import re
+from datetime import date
+
+from django.utils import timezone
+
+from apps.shared.helpers import start_of
+
+# partitions are kept this many months ahead of the current one
+PARTITION_MONTHS_AHEAD = 3
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f"{table}_{month:%Y_%m}"
+
+
+def partition_month(table, name):
+    match = re.match(rf"^{table}_(\d{{4}})_(\d{{2}})$", name)
+    return date(int(match[1]), int(match[2]), 1) if match else None
+
+
+def is_partitioned(cursor, table):
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = %s::regclass", [table])
+    return cursor.fetchone()[0] == "p"
+
+
+def list_partitions(cursor, table):
+    cursor.execute(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = %s::regclass ORDER BY c.relname",
+        [table],
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def partition_key(cursor, table):
+    cursor.execute("SELECT pg_get_partkeydef(%s::regclass)", [table])
+    return re.match(r"^RANGE \((\w+)\)$", cursor.fetchone()[0])[1]
+
+
+def create_partition(cursor, table, month, on_create=None):
+    """
+    The partition of `month`. Rows of the month that landed in the default
+    partition meanwhile are moved into it.
+    """
+    name = partition_name(table, month)
+    bounds = [start_of(month), start_of(add_months(month, 1))]
+    cursor.execute("SELECT to_regclass(%s)", [name])
+    if cursor.fetchone()[0] is None:
+        cursor.execute(
+            f"CREATE TABLE {name} "
+            f"(LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+        default = f"{table}_default"
+        if default in list_partitions(cursor, table):
+            key = partition_key(cursor, table)
+            cursor.execute(
+                f"WITH moved AS (DELETE FROM {default} "
+                f"WHERE {key} >= %s AND {key} < %s RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved",
+                bounds,
+            )
+        cursor.execute(
+            f"ALTER TABLE {table} ATTACH PARTITION {name} "
+            "FOR VALUES FROM (%s) TO (%s)",
+            bounds,
+        )
+    if on_create:
+        on_create(cursor, name)
+    return name
+
+
+def create_partitions(
+    cursor, table, first_month=None, months_ahead=PARTITION_MONTHS_AHEAD, on_create=None
+):
+    """
+    Partitions from `first_month` (this month by default) up to
+    `months_ahead` months from now.
+    """
+    month = first_month or month_start(timezone.localdate())
+    last_month = add_months(month_start(timezone.localdate()), months_ahead)
+    created = []
+    while month <= last_month:
+        created.append(create_partition(cursor, table, month, on_create))
+        month = add_months(month, 1)
+    return created
+
+
+def create_default_partition(cursor, table, on_create=None):
+    name = f"{table}_default"
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} DEFAULT")
+    if on_create:
+        on_create(cursor, name)
+    return name
+
+
+def detach_partitions(cursor, table, before, archive_schema=None):
+    """
+    Detach the partitions of the months before `before`, their rows leave the
+    table. With `archive_schema` they are moved into that schema.
+    """
+    detached = []
+    for name in list_partitions(cursor, table):
+        month = partition_month(table, name)
+        if month is None or month >= month_start(before):
+            continue
+        cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+        if archive_schema:
+            cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {archive_schema}")
+            cursor.execute(f"ALTER TABLE {name} SET SCHEMA {archive_schema}")
+        detached.append(name)
+    return detached
+
+
+def convert_to_partitioned(
+    cursor, table, key, months_ahead=PARTITION_MONTHS_AHEAD, on_create=None
+):
+    """
+    Rebuild `table` as one partitioned by month of `key`, with the same rows,
+    indexes and foreign keys and a default partition. The primary key becomes
+    (id, key). Unique indexes without `key` can't exist on the parent,
+    `on_create` has to add them to each partition. The table is locked until
+    the surrounding transaction ends.
+    """
+    legacy = f"{table}_unpartitioned"
+    sequence = f"{table}_partitioned_id_seq"
+    cursor.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+    cursor.execute(
+        "SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i "
+        "JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attname = %s "
+        "WHERE i.indrelid = %s::regclass AND NOT i.indisprimary "
+        "AND (NOT i.indisunique OR a.attnum = ANY(i.indkey::int2[]))",
+        [key, table],
+    )
+    indexes = [row[0] for row in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [table],
+    )
+    foreign_keys = cursor.fetchall()
+    cursor.execute(f"SELECT min({key}), max(id) FROM {table}")
+    first, last_id = cursor.fetchone()
+
+    cursor.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+    cursor.execute(
+        f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS "
+        f"INCLUDING CONSTRAINTS) PARTITION BY RANGE ({key})"
+    )
+    cursor.execute(f"CREATE SEQUENCE {sequence} OWNED BY {table}.id")
+    cursor.execute(
+        f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{sequence}')"
+    )
+    cursor.execute(f"SELECT setval('{sequence}', %s, false)", [(last_id or 0) + 1])
+    cursor.execute(f"ALTER TABLE {table} ADD PRIMARY KEY (id, {key})")
+
+    first_month = month_start(timezone.localdate(first)) if first else None
+    partitions = create_partitions(cursor, table, first_month, months_ahead, on_create)
+    create_default_partition(cursor, table, on_create)
+    cursor.execute(f"INSERT INTO {table} SELECT * FROM {legacy}")
+    # deferred foreign key checks of rows written earlier in the transaction
+    # keep the legacy table from being dropped, they run now
+    cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+    cursor.execute(f"DROP TABLE {legacy}")
+
+    # the definitions still name the table, the legacy names are free now
+    for index in indexes:
+        cursor.execute(index)
+    for name, definition in foreign_keys:
+        cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
+    return partitions
@@ -0,0 +1,96 @@
+import pytest
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from apps.shared.idempotency import IDEMPOTENCY_KEY_MAX_LENGTH, idempotent
+
+
+class CountingView(APIView):
+    """Answers with how many times its body ran, running `during` meanwhile."""
+
+    calls = 0
+    during = None
+    fail = False
+
+    @idempotent
+    def post(self, request):
+        type(self).calls += 1
+        if self.during is not None:
+            self.during()
+        if self.fail:
+            raise RuntimeError("failed")
+        return Response({"calls": self.calls, "amount": request.data["amount"]})
+
+
+@pytest.mark.django_db
+class TestIdempotent:
+    @pytest.fixture(autouse=True)
+    def setup(self, admin_user):
+        self.user = admin_user
+        self.factory = APIRequestFactory()
+        CountingView.calls = 0
+        CountingView.fail = False
+
+    def send(self, amount="20", key="retry-1", user=None, during=None):
+        headers = {"HTTP_IDEMPOTENCY_KEY": key} if key else {}
+        request = self.factory.post(
+            "/operations/", {"amount": amount}, format="json", **headers
+        )
+        force_authenticate(request, user=user or self.user)
+        return CountingView.as_view(during=during)(request)
+
+    def test_a_retry_replays_the_stored_response(self):
+        first = self.send()
+        replayed = self.send()
+
+        assert first.status_code == replayed.status_code == 200
+        assert replayed.data == first.data == {"calls": 1, "amount": "20"}
+        assert replayed["Idempotent-Replayed"] == "true"
+        assert CountingView.calls == 1
+
+    def test_a_retry_while_the_first_request_runs_gets_a_409(self):
+        retries = []
+
+        first = self.send(during=lambda: retries.append(self.send()))
+
+        assert first.status_code == 200
+        assert retries[0].status_code == 409
+        assert retries[0].data["code"] == "idempotency_key_in_use"
+        assert CountingView.calls == 1
+
+    def test_the_key_with_a_different_request_gets_a_422(self):
+        self.send(amount="20")
+        reused = self.send(amount="25")
+
+        assert reused.status_code == 422
+        assert reused.data["code"] == "idempotency_key_reused"
+        assert CountingView.calls == 1
+
+    def test_a_failed_request_can_be_retried(self):
+        CountingView.fail = True
+        with pytest.raises(RuntimeError):
+            self.send()
+        CountingView.fail = False
+
+        assert self.send().data == {"calls": 2, "amount": "20"}
+
+    def test_keys_are_kept_per_user(self, station_worker):
+        self.send()
+        other = self.send(user=station_worker)
+
+        assert other.data == {"calls": 2, "amount": "20"}
+        assert "Idempotent-Replayed" not in other
+
+    def test_requests_without_a_key_always_run(self):
+        self.send(key=None)
+        self.send(key=None)
+
+        assert CountingView.calls == 2
+
+    def test_an_overlong_key_is_rejected(self):
+        response = self.send(key="k" * (IDEMPOTENCY_KEY_MAX_LENGTH + 1))
+
+        assert response.status_code == 400
+        assert response.data["code"] == "invalid_idempotency_key"
+        assert CountingView.calls == 0
@@ -0,0 +1,64 @@
+import pytest
+from django.db import connection
+from django.urls import reverse
+
+from apps.notifications.models import Notification
+from apps.shared.pagination_class import CustomLimitOffsetPagination
+
+
+@pytest.mark.django_db
+class TestNotificationPagination:
+    @pytest.fixture(autouse=True)
+    def setup(self, auth_client, driver_user):
+        self.client = auth_client(driver_user)
+        self.notifications = Notification.objects.bulk_create(
+            [
+                Notification(
+                    user=driver_user,
+                    title=f"title {index}",
+                    description="body",
+                    type=Notification.NotificationType.GENERAL,
+                )
+                for index in range(5)
+            ]
+        )
+        self.ids = sorted(notification.id for notification in self.notifications)
+        self.url = reverse("notification-list")
+
+    def test_cursor_pages_follow_the_id_order(self):
+        response = self.client.get(self.url, {"cursor": "", "limit": 2})
+        seen = [item["id"] for item in response.data["results"]]
+        while response.data["next"]:
+            response = self.client.get(response.data["next"])
+            seen += [item["id"] for item in response.data["results"]]
+
+        assert seen == self.ids[::-1]
+        assert "count" not in response.data
+
+    def test_cursor_page_can_estimate_the_count(self):
+        if connection.vendor == "postgresql":
+            # the estimate comes from the planner's statistics
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {Notification._meta.db_table}")
+        response = self.client.get(
+            self.url, {"cursor": "", "limit": 2, "estimate_count": "true"}
+        )
+
+        assert response.data["count"] == 5
+        assert len(response.data["results"]) == 2
+
+    def test_no_paginate_flags_a_capped_list(self, monkeypatch):
+        monkeypatch.setattr(CustomLimitOffsetPagination, "no_paginate_max", 3)
+
+        response = self.client.get(self.url, {"no_paginate": "true"})
+
+        assert len(response.data["results"]) == 3
+        assert response.data["truncated"] is True
+
+    def test_no_paginate_returns_a_whole_list_under_the_cap(self, monkeypatch):
+        monkeypatch.setattr(CustomLimitOffsetPagination, "no_paginate_max", 5)
+
+        response = self.client.get(self.url, {"no_paginate": "true"})
+
+        assert len(response.data["results"]) == 5
+        assert response.data["truncated"] is False
@@ -0,0 +1,68 @@
+from io import BytesIO
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+
+from apps.shared import validators
+
+SVG = (
+    '<?xml version="1.0"?>'
+    '<svg xmlns="http://www.w3.org/2000/svg" '
+    'xmlns:xlink="http://www.w3.org/1999/xlink" viewBox="0 0 10 10">'
+    '<defs><circle id="dot" r="2"/></defs><use xlink:href="#dot"/>{}</svg>'
+)
+
+
+def upload(name, content):
+    return SimpleUploadedFile(name, content)
+
+
+def png():
+    buffer = BytesIO()
+    Image.new("RGB", (4, 4)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class TestValidateImage:
+    def test_accepts_a_raster_image_by_its_first_bytes(self):
+        file = upload("photo.txt", png())
+
+        validators.validate_image(file)
+
+        assert file.tell() == 0
+
+    def test_rejects_a_renamed_file(self):
+        with pytest.raises(ValidationError):
+            validators.validate_image(upload("photo.png", b"MZ\x90\x00" * 16))
+
+    def test_rejects_an_upload_over_the_size_cap(self, monkeypatch):
+        monkeypatch.setattr(validators, "UPLOAD_MAX_SIZE", 64)
+        with pytest.raises(ValidationError, match="limit"):
+            validators.validate_image(upload("photo.png", png() + b"\x00" * 64))
+
+
+class TestValidateImageOrSvg:
+    def test_accepts_a_self_contained_svg(self):
+        validators.validate_image_or_svg(
+            upload("icon.svg", SVG.format("<style>.a{fill:url(#g)}</style>").encode())
+        )
+
+    @pytest.mark.parametrize(
+        "content",
+        [
+            SVG.format("<script>alert(1)</script>"),
+            SVG.format('<rect onload="alert(1)"/>'),
+            SVG.format('<image xlink:href="https://example.com/a.png"/>'),
+            SVG.format('<a href="javascript:alert(1)"><rect/></a>'),
+            SVG.format("<style>@import url(https://example.com/a.css);</style>"),
+            SVG.format("<foreignObject><p>text</p></foreignObject>"),
+            '<!DOCTYPE svg [<!ENTITY a "aaaa">]><svg>&a;</svg>',
+            "<html><body/></html>",
+            "<svg><unclosed></svg>",
+        ],
+    )
+    def test_rejects_an_unsafe_or_invalid_svg(self, content):
+        with pytest.raises(ValidationError):
+            validators.validate_image_or_svg(upload("icon.svg", content.encode()))
@@ -0,0 +1,118 @@
+"""
+Validators of uploaded images.
+
+They never load a whole upload: the size comes from the upload handler,
+raster images are recognized by the signature in their first bytes and SVGs
+are read in chunks by expat and rejected when they declare a DTD or can run
+scripts or load other resources.
+"""
+
+import re
+from xml.parsers import expat
+
+from django.core.exceptions import ValidationError
+
+UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+SVG_MAX_SIZE = 1024 * 1024
+IMAGE_SIGNATURES = {
+    b"\xff\xd8\xff": "jpeg",
+    b"\x89PNG\r\n\x1a\n": "png",
+    b"GIF87a": "gif",
+    b"GIF89a": "gif",
+}
+HEADER_SIZE = max(len(signature) for signature in IMAGE_SIGNATURES)
+SVG_UNSAFE_ELEMENTS = {"script", "foreignObject", "iframe", "embed", "object"}
+# references to the document itself or to inline raster images
+SAFE_REFERENCE = re.compile(r"^\s*(#|data:image/(png|jpeg|gif)[;,])", re.IGNORECASE)
+EXTERNAL_URL = re.compile(r"url\(\s*['\"]?\s*(?!#)|@import", re.IGNORECASE)
+
+
+def read_header(file, size=HEADER_SIZE):
+    file.seek(0)
+    header = file.read(size)
+    file.seek(0)
+    return header
+
+
+def image_type(file):
+    """jpeg, png or gif according to the first bytes of `file`, None otherwise."""
+    header = read_header(file)
+    for signature, kind in IMAGE_SIGNATURES.items():
+        if header.startswith(signature):
+            return kind
+    return None
+
+
+def validate_upload_size(file, max_size=None):
+    max_size = max_size or UPLOAD_MAX_SIZE
+    if file.size is not None and file.size > max_size:
+        raise ValidationError(
+            f"The file is larger than the {max_size // 1024 // 1024} MB limit."
+        )
+
+
+def reject_svg(reason):
+    raise ValidationError(f"The SVG file is not allowed: {reason}.")
+
+
+def local_name(name):
+    # expat joins the namespace and the name with the separator
+    return name.rsplit(" ", 1)[-1]
+
+
+def validate_svg(file):
+    """Parse `file` as a stream and reject what isn't a self-contained SVG."""
+    validate_upload_size(file, SVG_MAX_SIZE)
+    parser = expat.ParserCreate(namespace_separator=" ")
+    # consecutive text is reported together rather than per chunk read
+    parser.buffer_text = True
+    elements = []
+
+    def start_element(name, attributes):
+        element = local_name(name)
+        if not elements and element != "svg":
+            reject_svg("the document is not an SVG image")
+        if element in SVG_UNSAFE_ELEMENTS:
+            reject_svg(f"it contains a <{element}> element")
+        for attribute, value in attributes.items():
+            attribute = local_name(attribute)
+            if attribute.lower().startswith("on"):
+                reject_svg(f"it contains the {attribute} event handler")
+            if attribute == "href" and not SAFE_REFERENCE.match(value):
+                reject_svg("it references another resource")
+            if EXTERNAL_URL.search(value):
+                reject_svg("it references another resource")
+        elements.append(element)
+
+    def character_data(data):
+        if elements and elements[-1] == "style" and EXTERNAL_URL.search(data):
+            reject_svg("it references another resource")
+
+    def start_doctype(*args):
+        reject_svg("it declares a DTD")
+
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = lambda name: elements.pop()
+    parser.CharacterDataHandler = character_data
+    parser.StartDoctypeDeclHandler = start_doctype
+    parser.EntityDeclHandler = start_doctype
+    file.seek(0)
+    try:
+        parser.ParseFile(file)
+    except expat.ExpatError:
+        reject_svg("it is not valid XML")
+    finally:
+        file.seek(0)
+
+
+def validate_image(file):
+    """Accept JPEG, PNG and GIF uploads of at most UPLOAD_MAX_SIZE."""
+    validate_upload_size(file)
+    if image_type(file) is None:
+        raise ValidationError("Only JPEG, PNG or GIF images are allowed.")
+
+
+def validate_image_or_svg(file):
+    validate_upload_size(file)
+    if image_type(file) is None:
+        validate_svg(file)
@@ -1,5 +1,7 @@
 import math
+from datetime import timedelta
 
+from django.utils import timezone
 from rest_framework import serializers
 
 from apps.companies.api.v1.serializers.car_serializer import (
@@ -9,6 +11,7 @@ from apps.companies.api.v1.serializers.driver_serializer import SingleDriverSeri
 from apps.companies.models.operation_model import CarOperation
 from apps.shared.base_exception_class import CustomValidationError
 from apps.shared.constants import SERVICE_UNIT_CHOICES
+from apps.shared.validators import validate_image
 from apps.stations.api.v1.serializers import (
     ServiceNameSerializer,
     SingleStationBranchSerializer,
@@ -17,13 +20,17 @@ from apps.stations.models.service_models import Service
 from apps.stations.models.stations_models import StationBranchService
 from apps.users.v1.serializers.station_serializer import WorkerWithBranchSerializer
 
+# how far ahead of the server clock a device may be
+SYNC_CLOCK_SKEW = timedelta(minutes=5)
+
 
 class updateStationGasCarOperationSerializer(serializers.Serializer):
     car_meter = serializers.DecimalField(
         max_digits=10, decimal_places=2, required=False
     )
-    motor_image = serializers.ImageField(required=False)
-    fuel_image = serializers.ImageField(required=False)
+    # checked by their first bytes, the full Pillow check would read them whole
+    motor_image = serializers.FileField(required=False, validators=[validate_image])
+    fuel_image = serializers.FileField(required=False, validators=[validate_image])
     amount = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
     start_time = serializers.DateTimeField(required=False, allow_null=True)
     car_first_meter = serializers.DecimalField(
@@ -74,10 +81,36 @@ class updateStationGasCarOperationSerializer(serializers.Serializer):
         return instance
 
 
+class SyncGasOperationSerializer(serializers.Serializer):
+    """
+    A fueling recorded by a station device while offline. The images are the
+    names of file parts of the same multipart request.
+    """
+
+    client_key = serializers.CharField(max_length=64)
+    car_code = serializers.CharField()
+    driver_code = serializers.CharField()
+    started_at = serializers.DateTimeField()
+    finished_at = serializers.DateTimeField()
+    car_meter = serializers.DecimalField(
+        max_digits=10, decimal_places=2, required=False
+    )
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2)
+    motor_image = serializers.CharField(required=False)
+    fuel_image = serializers.CharField()
+
+    def validate(self, attrs):
+        if attrs["finished_at"] < attrs["started_at"]:
+            raise CustomValidationError({"finished_at": "وقت الانتهاء قبل وقت البدء"})
+        if attrs["finished_at"] > timezone.now() + SYNC_CLOCK_SKEW:
+            raise CustomValidationError({"finished_at": "وقت الانتهاء في المستقبل"})
+        return attrs
+
+
 class updateStationOtherCarOperationSerializer(serializers.ModelSerializer):
     service = serializers.IntegerField(required=True)
     cost = serializers.DecimalField(max_digits=10, decimal_places=2, required=True)
-    car_image = serializers.ImageField(required=True)
+    car_image = serializers.FileField(required=True, validators=[validate_image])
 
     class Meta:
         model = CarOperation
@@ -150,6 +183,8 @@ class ListStationHomeCarOperationSerializer(serializers.ModelSerializer):
             "car_meter",
             "motor_image",
             "fuel_image",
+            "motor_thumbnail",
+            "fuel_thumbnail",
             "fuel_consumption_rate",
             "service_category",
         ]
@@ -3,6 +3,7 @@ from rest_framework.routers import DefaultRouter
 
 from apps.stations.api.v1.views.car_operations_views import (
     StationGasOperationAPIView,
+    StationGasOperationSyncAPIView,
     StationOtherOperationAPIView,
 )
 from apps.stations.api.v1.views.service_views import ServiceViewSet
@@ -29,6 +30,11 @@ urlpatterns += [
         StationGasOperationAPIView.as_view(),
         name="station-gas-operations",
     ),
+    path(
+        "gas-operations/sync/",
+        StationGasOperationSyncAPIView.as_view(),
+        name="station-gas-operations-sync",
+    ),
     path(
         "other-operations/<int:pk>/",
         StationOtherOperationAPIView.as_view(),
@@ -1,14 +1,16 @@
-import math
-from datetime import timedelta
-from decimal import Decimal
+import json
 
 from django.db.transaction import atomic
 from django.utils import timezone
 from drf_spectacular.utils import OpenApiResponse, extend_schema
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from apps.accounting import ledger
 from apps.accounting.helpers import (
     generate_company_transaction,
     generate_station_transaction,
@@ -17,28 +19,40 @@ from apps.accounting.models import KhaznaTransaction
 from apps.companies.models.operation_model import CarOperation
 from apps.notifications.models import Notification
 from apps.shared.base_exception_class import CustomValidationError
+from apps.shared.idempotency import idempotent
+from apps.shared.permissions import StationWorkerPermission
 from apps.stations.api.station_serializers.car_operation_serializer import (
+    SyncGasOperationSerializer,
     updateStationGasCarOperationSerializer,
     updateStationOtherCarOperationSerializer,
 )
-from apps.stations.models.service_models import Service
+from apps.stations.helpers import complete_gas_operation, sync_gas_operation
 from apps.users.models import CompanyUser, StationOwner
 
+SYNC_MAX_OPERATIONS = 50
+
 
 class StationGasOperationAPIView(APIView):
     @extend_schema(
         request=updateStationGasCarOperationSerializer,
         responses={200: updateStationGasCarOperationSerializer},
     )
+    @idempotent
     @atomic
     def patch(self, request, pk, *args, **kwargs):
-        car_opertion = CarOperation.objects.filter(
-            id=pk,
-            status__in=[
-                CarOperation.OperationStatus.PENDING,
-                CarOperation.OperationStatus.IN_PROGRESS,
-            ],
-        ).first()
+        car_opertion = (
+            CarOperation.objects.select_related(
+                "car__branch", "service", "worker__station_branch"
+            )
+            .filter(
+                id=pk,
+                status__in=[
+                    CarOperation.OperationStatus.PENDING,
+                    CarOperation.OperationStatus.IN_PROGRESS,
+                ],
+            )
+            .first()
+        )
         if not car_opertion:
             raise CustomValidationError(
                 message="هذا العمليه غير موجوده او انتهت بالفعل", code="not_found"
@@ -60,164 +74,7 @@ class StationGasOperationAPIView(APIView):
                 serializer.save(status=status)
 
             elif "amount" in serializer.validated_data:
-                if not car_opertion.start_time:
-                    raise CustomValidationError(
-                        message="يجب تحديد الوقت البدء", code="not_found"
-                    )
-                end_time = timezone.localtime()
-                if end_time > car_opertion.start_time + timedelta(seconds=60):
-                    raise CustomValidationError(
-                        message="الوقت الانتهاء يجب ان يكون اقل من 60 ثانية",
-                        code="not_found",
-                    )
-                car = car_opertion.car
-                car_tank_capacity = (
-                    car.permitted_fuel_amount
-                    if car.permitted_fuel_amount
-                    else car.tank_capacity
-                )
-                company_liter_cost = (
-                    car_opertion.service.cost * (car.branch.fees / 100)
-                    + car_opertion.service.cost
-                )
-                available_liters = math.floor(car.balance / company_liter_cost)
-                available_liters = min(car_tank_capacity, available_liters)
-                if serializer.validated_data["amount"] > available_liters:
-                    raise CustomValidationError(
-                        message="الكمية المطلوبة اكبر من الحد الأقصى", code="not_found"
-                    )
-
-                status = CarOperation.OperationStatus.COMPLETED
-                duration = (end_time - car_opertion.created).total_seconds()
-                cost = round(
-                    Decimal(serializer.validated_data["amount"])
-                    * Decimal(car_opertion.service.cost),
-                    2,
-                )
-                company_cost = round(
-                    Decimal(serializer.validated_data["amount"])
-                    * Decimal(company_liter_cost),
-                    2,
-                )
-                worker = car_opertion.worker
-                station_cost = round(
-                    Decimal(serializer.validated_data["amount"])
-                    * Decimal(car_opertion.service.cost + worker.station_branch.fees),
-                    2,
-                )
-                profits = round(company_cost - station_cost, 2)
-
-                if car.is_with_odometer:
-                    car.fuel_consumption_rate = (
-                        car_opertion.car_meter - car.last_meter
-                    ) / serializer.validated_data["amount"]
-
-                serializer.save(
-                    end_time=end_time,
-                    status=status,
-                    duration=duration,
-                    cost=cost,
-                    car_first_meter=car.last_meter,
-                    company_cost=company_cost,
-                    station_cost=station_cost,
-                    profits=profits,
-                    unit=Service.ServiceUnit.LITRE,
-                    fuel_consumption_rate=car.fuel_consumption_rate,
-                )
-
-                car.is_blocked_balance_update = False
-                car.last_meter = car_opertion.car_meter
-                car.balance = car.balance - company_cost
-                car.save()
-
-                company_id = car.branch.company_id
-                notification_users = list(
-                    CompanyUser.objects.filter(
-                        company_id=company_id, role=CompanyUser.UserRoles.CompanyOwner
-                    ).values_list("id", flat=True)
-                )
-                notification_users.extend(
-                    list(
-                        CompanyUser.objects.filter(
-                            company_id=company_id,
-                            role=CompanyUser.UserRoles.CompanyBranchManager,
-                            company_branch_managers__company_branch=car.branch_id,
-                        ).values_list("id", flat=True)
-                    )
-                )
-                if (
-                    car.next_oil_change_km
-                    and car.next_oil_change_km > 0
-                    and car.next_oil_change_km <= car.last_meter
-                ):
-                    # send notification to company owner to change oil for this car in arabic
-                    message = f"يجب تغيير زيت السيارة رقم {car.plate} بعدد {car_opertion.amount} لتر"
-                    for user_id in notification_users:
-                        Notification.objects.create(
-                            user_id=user_id,
-                            title=message,
-                            description=message,
-                            type=Notification.NotificationType.GENERAL,
-                        )
-
-                station_id = request.station_id
-                generate_station_transaction(
-                    station_id=station_id,
-                    station_branch_id=worker.station_branch_id,
-                    amount=station_cost,
-                    status=KhaznaTransaction.TransactionStatus.APPROVED,
-                    description=f"تم تفويل سيارة رقم {car.plate} بعدد {car_opertion.amount} لتر",
-                    created_by_id=request.user.id,
-                    is_internal=False,
-                )
-                station_branch = worker.station_branch
-                station_branch.balance = station_branch.balance - station_cost
-                station_branch.save()
-
-                # send notifications for station users
-                message = f"تم تفويل سيارة رقم {car_opertion.car.plate} بعدد {car_opertion.amount} لتر"
-                notification_users = list(
-                    StationOwner.objects.filter(station_id=station_id).values_list(
-                        "id", flat=True
-                    )
-                )
-                notification_users.append(request.user.id)
-                for user_id in notification_users:
-                    Notification.objects.create(
-                        user_id=user_id,
-                        title=message,
-                        description=message,
-                        type=Notification.NotificationType.MONEY,
-                    )
-
-                # send notfication for company user
-                generate_company_transaction(
-                    company_id=company_id,
-                    company_branch_id=car.branch_id,
-                    amount=company_cost,
-                    status=KhaznaTransaction.TransactionStatus.APPROVED,
-                    description=f"تم تفويل سيارة رقم {car_opertion.car.plate} بعدد {car_opertion.amount} لتر",
-                    created_by_id=request.user.id,
-                    is_internal=True,
-                )
-                message = (
-                    f"تم تفويل سيارة رقم {car_opertion.car.plate} بعدد {car_opertion.amount} لتر "
-                    f"وخصم مبلغ بمقدار {car_opertion.company_cost:.2f} جنية"  # noqa
-                )
-                notification_users = list(
-                    CompanyUser.objects.filter(company_id=company_id).values_list(
-                        "id", flat=True
-                    )
-                )
-                notification_users.append(request.user.id)
-                for user_id in notification_users:
-                    Notification.objects.create(
-                        user_id=user_id,
-                        title=message,
-                        description=message,
-                        type=Notification.NotificationType.MONEY,
-                    )
-
+                complete_gas_operation(car_opertion, serializer, request.user)
                 return Response(serializer.data)
             elif "start_time" in serializer.validated_data:
                 car_opertion.start_time = timezone.localtime()
@@ -261,6 +118,7 @@ class StationOtherOperationAPIView(APIView):
             )
         },
     )
+    @idempotent
     @atomic
     def patch(self, request, pk, *args, **kwargs):
         car_operation = CarOperation.objects.filter(
@@ -294,16 +152,13 @@ class StationOtherOperationAPIView(APIView):
                 * company_branch.other_service_fees
                 / 100
             ) + serializer.validated_data["cost"]
-            if car.balance < company_cost:
-                raise CustomValidationError(
-                    {"error": "السيارة لا تمتلك كافٍ من المال"},
-                    code="not_enough_balance",
-                    errors=[],
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                )
+            ledger.debit(
+                car,
+                company_cost,
+                error_message={"error": "السيارة لا تمتلك كافٍ من المال"},
+            )
             car.is_blocked_balance_update = False
-            car.balance = car.balance - company_cost
-            car.save()
+            car.save(update_fields=["is_blocked_balance_update"])
 
             station_cost = serializer.validated_data["cost"] - (
                 serializer.validated_data["cost"]
@@ -327,13 +182,12 @@ class StationOtherOperationAPIView(APIView):
                 ).values_list("id", flat=True)
             )
             notification_users.append(request.user.id)
-            for user_id in notification_users:
-                Notification.objects.create(
-                    user_id=user_id,
-                    title=message,
-                    description=message,
-                    type=Notification.NotificationType.MONEY,
-                )
+            Notification.objects.fan_out(
+                notification_users,
+                title=message,
+                description=message,
+                type=Notification.NotificationType.MONEY,
+            )
             # send notfication for company user
             company_id = company_branch.company_id
             generate_company_transaction(
@@ -352,13 +206,12 @@ class StationOtherOperationAPIView(APIView):
                 )
             )
             notification_users.append(request.user.id)
-            for user_id in notification_users:
-                Notification.objects.create(
-                    user_id=user_id,
-                    title=message,
-                    description=message,
-                    type=Notification.NotificationType.MONEY,
-                )
+            Notification.objects.fan_out(
+                notification_users,
+                title=message,
+                description=message,
+                type=Notification.NotificationType.MONEY,
+            )
             return Response({"message": "تم اضافة الخدمه بنجاح"})
         raise CustomValidationError(serializer.errors)
 
@@ -386,3 +239,137 @@ class StationOtherOperationAPIView(APIView):
         car.save()
 
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class StationGasOperationSyncAPIView(APIView):
+    """
+    Settle the fuelings a station device recorded while offline in one
+    transaction. Every item is applied in its own savepoint and reported on
+    its own, and an item whose client_key was already synced is not applied
+    again, so a device can resend a batch after a dropped connection.
+    """
+
+    permission_classes = [IsAuthenticated, StationWorkerPermission]
+    parser_classes = [JSONParser, MultiPartParser]
+
+    @extend_schema(
+        request=SyncGasOperationSerializer(many=True),
+        responses={
+            200: OpenApiResponse(
+                response={
+                    "type": "object",
+                    "properties": {
+                        "results": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "client_key": {"type": "string"},
+                                    "status": {"type": "string"},
+                                    "operation_id": {"type": "integer"},
+                                    "code": {"type": "string"},
+                                    "message": {"type": "string"},
+                                },
+                            },
+                        }
+                    },
+                },
+                description="The result of every synced operation, in order.",
+            )
+        },
+    )
+    @atomic
+    def post(self, request, *args, **kwargs):
+        operations = request.data.get("operations")
+        if isinstance(operations, str):
+            # multipart requests send the operations as a JSON field
+            try:
+                operations = json.loads(operations)
+            except ValueError:
+                operations = None
+        if not isinstance(operations, list) or not operations:
+            raise CustomValidationError(
+                message="لا توجد عمليات للمزامنة", code="invalid"
+            )
+        if len(operations) > SYNC_MAX_OPERATIONS:
+            raise CustomValidationError(
+                message=f"الحد الأقصى {SYNC_MAX_OPERATIONS} عملية في المرة",
+                code="invalid",
+            )
+
+        synced = dict(
+            CarOperation.objects.filter(
+                worker_id=request.user.id,
+                client_key__in=[
+                    item.get("client_key")
+                    for item in operations
+                    if isinstance(item, dict)
+                ],
+            ).values_list("client_key", "id")
+        )
+        results = []
+        for item in operations:
+            serializer = SyncGasOperationSerializer(data=item)
+            try:
+                serializer.is_valid(raise_exception=True)
+            except (CustomValidationError, ValidationError) as error:
+                results.append(
+                    {
+                        "client_key": (
+                            item.get("client_key") if isinstance(item, dict) else None
+                        ),
+                        "status": "failed",
+                        "code": "validation_error",
+                        "errors": error.detail,
+                    }
+                )
+                continue
+
+            client_key = serializer.validated_data["client_key"]
+            if client_key in synced:
+                results.append(
+                    {
+                        "client_key": client_key,
+                        "status": "duplicate",
+                        "operation_id": synced[client_key],
+                    }
+                )
+                continue
+            try:
+                with atomic():
+                    car_operation = sync_gas_operation(
+                        request, serializer.validated_data
+                    )
+            except CustomValidationError as error:
+                # a resend of the batch running alongside may have synced the
+                # item after `synced` was read, the client key stopped this one
+                operation_id = (
+                    CarOperation.objects.filter(
+                        worker_id=request.user.id, client_key=client_key
+                    )
+                    .values_list("id", flat=True)
+                    .first()
+                )
+                if operation_id is None:
+                    results.append(
+                        {"client_key": client_key, "status": "failed", **error.detail}
+                    )
+                else:
+                    synced[client_key] = operation_id
+                    results.append(
+                        {
+                            "client_key": client_key,
+                            "status": "duplicate",
+                            "operation_id": operation_id,
+                        }
+                    )
+                continue
+            synced[client_key] = car_operation.id
+            results.append(
+                {
+                    "client_key": client_key,
+                    "status": "completed",
+                    "operation_id": car_operation.id,
+                }
+            )
+        return Response({"results": results})
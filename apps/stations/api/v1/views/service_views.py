@@ -4,6 +4,7 @@ from apps.stations.api.v1.serializers import ListServiceSerializer
 from apps.stations.filters import ServiceFilter
 from apps.stations.models.service_models import Service
 from apps.users.models import User
+from apps.users.scope import get_scope
 
 
 class ServiceViewSet(viewsets.ModelViewSet):
@@ -18,6 +19,8 @@ class ServiceViewSet(viewsets.ModelViewSet):
             )
         if self.request.user.role == User.UserRoles.StationBranchManager:
             return self.queryset.exclude(
-                station_branch_services__station_branch__managers__user=self.request.user
+                station_branch_services__station_branch_id__in=get_scope(
+                    self.request
+                ).station_branch_ids
             )
         return self.queryset.distinct()
@@ -6,11 +6,13 @@ from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.views import Response
 
-from apps.accounting.helpers import generate_station_transaction
+from apps.accounting import ledger
+from apps.accounting.helpers import build_station_transaction
 from apps.accounting.models import StationKhaznaTransaction
 from apps.notifications.models import Notification
 from apps.shared.base_exception_class import CustomValidationError
 from apps.shared.constants import DASHBOARD_ROLES
+from apps.shared.idempotency import idempotent
 from apps.shared.mixins.inject_user_mixins import InjectUserMixin
 from apps.shared.permissions import DashboardPermission, StationOwnerPermission
 from apps.stations.api.station_serializers.station_branch_serializers import (
@@ -31,6 +33,7 @@ from apps.stations.models.service_models import Service
 from apps.stations.models.stations_models import StationBranch, StationBranchService
 from apps.stations.tasks import add
 from apps.users.models import StationBranchManager, User
+from apps.users.scope import get_scope
 
 SERVICE_CATEGORY_CHOICES = {
     "petrol": [Service.ServiceType.PETROL, Service.ServiceType.DIESEL],
@@ -95,7 +98,9 @@ class StationBranchViewSet(InjectUserMixin, viewsets.ModelViewSet):
         if self.request.user.role == User.UserRoles.StationOwner:
             return self.queryset.filter(station__owners=self.request.user)
         if self.request.user.role == User.UserRoles.StationBranchManager:
-            return self.queryset.filter(managers__user=self.request.user)
+            return self.queryset.filter(
+                id__in=get_scope(self.request).station_branch_ids
+            )
         if self.request.user.role in DASHBOARD_ROLES:
             return self.queryset.annotate(
                 services_count=Count("station_branch_services", distinct=True),
@@ -105,85 +110,59 @@ class StationBranchViewSet(InjectUserMixin, viewsets.ModelViewSet):
         return self.queryset.distinct()
 
     @action(detail=True, methods=["post"], url_path="update-balance")
+    @idempotent
     def update_balance(self, request, *args, **kwargs):
         station_branch = self.get_object()
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
+        amount = serializer.validated_data["amount"]
         with transaction.atomic():
             station = station_branch.station
             if serializer.validated_data["type"] == "add":
-                station.refresh_from_db()
-                if station.balance >= serializer.validated_data["amount"]:
-                    station_branch.balance += serializer.validated_data["amount"]
-                    station_branch.save()
-
-                    station.balance -= serializer.validated_data["amount"]
-                    station.save()
-                    message = f"تم شحن رصيد فرع {station_branch.name} برصيد {serializer.validated_data['amount']}"
-                    generate_station_transaction(
+                message = f"تم شحن رصيد فرع {station_branch.name} برصيد {amount}"
+                ledger.transfer(
+                    station,
+                    station_branch,
+                    amount,
+                    error_message="المحطة لا تمتلك كافٍ من المال",
+                    record=build_station_transaction(
                         station_id=station_branch.station_id,
                         station_branch_id=station_branch.id,
-                        amount=serializer.validated_data["amount"],
+                        amount=amount,
                         status=StationKhaznaTransaction.TransactionStatus.APPROVED,
                         description=message,
                         is_internal=True,
                         created_by_id=request.user.id,
-                    )
-                    notification_users = list(
-                        station_branch.managers.values_list("user_id", flat=True)
-                    )
-                    notification_users.append(request.user.id)
-                    for user_id in notification_users:
-                        Notification.objects.create(
-                            user_id=user_id,
-                            title=message,
-                            description=message,
-                            type=Notification.NotificationType.MONEY,
-                        )
-                else:
-                    raise CustomValidationError(
-                        message="المحطة لا تمتلك كافٍ من المال",
-                        code="not_enough_balance",
-                        errors=[],
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                    )
+                    ),
+                )
             else:
-                if station_branch.balance >= serializer.validated_data["amount"]:
-                    station_branch.balance -= serializer.validated_data["amount"]
-                    station_branch.save()
-
-                    station.refresh_from_db()
-                    station.balance += serializer.validated_data["amount"]
-                    station.save()
-
-                    message = f"تم خصم رصيد فرع {station_branch.name} برصيد {serializer.validated_data['amount']}"
-                    generate_station_transaction(
+                message = f"تم خصم رصيد فرع {station_branch.name} برصيد {amount}"
+                ledger.transfer(
+                    station_branch,
+                    station,
+                    amount,
+                    error_message="الفرع لا يمتلك كافٍ من المال",
+                    record=build_station_transaction(
                         station_id=station_branch.station_id,
-                        amount=serializer.validated_data["amount"],
+                        amount=amount,
                         status=StationKhaznaTransaction.TransactionStatus.APPROVED,
                         description=message,
                         is_internal=True,
                         created_by_id=request.user.id,
-                    )
-                    notification_users = list(
-                        station_branch.managers.values_list("user_id", flat=True)
-                    )
-                    notification_users.append(request.user.id)
-                    for user_id in notification_users:
-                        Notification.objects.create(
-                            user_id=user_id,
-                            title=message,
-                            description=message,
-                            type=Notification.NotificationType.MONEY,
-                        )
-                else:
-                    raise CustomValidationError(
-                        message="الفرع لا يمتلك كافٍ من المال",
-                        code="not_enough_balance",
-                        errors=[],
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                    )
+                    ),
+                )
+            notification_users = list(
+                station_branch.managers.values_list("user_id", flat=True)
+            )
+            notification_users.append(request.user.id)
+            Notification.objects.fan_out(
+                notification_users,
+                title=message,
+                description=message,
+                type=Notification.NotificationType.MONEY,
+            )
+        station_branch.refresh_from_db(fields=["balance"])
         return Response({"balance": station_branch.balance})
 
     @extend_schema(
@@ -210,7 +189,9 @@ class StationBranchViewSet(InjectUserMixin, viewsets.ModelViewSet):
         ).order_by("-id")
         if self.request.user.role == User.UserRoles.StationBranchManager:
             services = services.filter(
-                station_branch_services__station_branch__managers__user=self.request.user,
+                station_branch_services__station_branch_id__in=get_scope(
+                    request
+                ).station_branch_ids,
             )
         if request.query_params.get("types"):
             types = request.query_params.get("types").split(",")
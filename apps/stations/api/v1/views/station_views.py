@@ -1,6 +1,6 @@
-from datetime import date
-
 from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_time
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import (
@@ -9,8 +9,7 @@ from drf_spectacular.utils import (
     OpenApiResponse,
     extend_schema,
 )
-from rest_framework import viewsets
-from rest_framework.filters import SearchFilter
+from rest_framework import status, viewsets
 from rest_framework.generics import ListAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView, Response
@@ -21,12 +20,16 @@ from apps.companies.api.v1.serializers.car_operation_serializer import (
 )
 from apps.companies.models.company_cash_models import CompanyCashRequest
 from apps.companies.models.operation_model import CarOperation
+from apps.companies.search_index import SEARCH_PATHS
+from apps.shared.base_exception_class import CustomValidationError
+from apps.shared.filters import timestamp_bounds
 from apps.shared.mixins.inject_user_mixins import InjectUserMixin
 from apps.shared.permissions import (
     DashboardPermission,
     EitherPermission,
     StationPermission,
 )
+from apps.shared.search import SearchTextFilter
 from apps.stations.api.station_serializers.car_operation_serializer import (
     ListStationHomeCarOperationSerializer,
 )
@@ -40,7 +43,9 @@ from apps.stations.api.station_serializers.station_serailizers import (
 from apps.stations.api.v1.serializers import ListStationSerializer
 from apps.stations.models.service_models import Service
 from apps.stations.models.stations_models import Station, StationBranch
+from apps.stations.rollups import get_station_rollup
 from apps.users.models import StationBranchManager, StationOwner, User, Worker
+from apps.users.scope import get_scope
 
 
 class StationViewSet(InjectUserMixin, viewsets.ModelViewSet):
@@ -116,17 +121,15 @@ class StationHomeAPIView(APIView):
         if request.user.role == User.UserRoles.StationOwner:
             base_balance = station.balance
 
-            branches_balance = (
-                StationBranch.objects.filter(station_id=request.station_id)
-                .aggregate(balance=Sum("balance"))
-                .get("balance")
-            )
+            branches_balance = get_station_rollup(station.id).branches_balance
 
-            distributed_balance = branches_balance or 0
+            distributed_balance = branches_balance
 
         if request.user.role == User.UserRoles.StationBranchManager:
             branches_balance = (
-                StationBranch.objects.filter(managers__user=request.user)
+                StationBranch.objects.filter(
+                    id__in=get_scope(request).station_branch_ids
+                )
                 .aggregate(balance=Sum("balance"))
                 .get("balance")
             )
@@ -180,16 +183,10 @@ class StationOperationsAPIView(ListAPIView):
     queryset = CarOperation.objects.select_related(
         "car__branch", "driver", "station_branch", "worker__station_branch", "service"
     ).order_by("-id")
-    filter_backends = [DjangoFilterBackend, SearchFilter]
+    filter_backends = [DjangoFilterBackend, SearchTextFilter]
     filterset_class = CarOperationFilter
     serializer_class = ListStationCarOperationSerializer
-    search_fields = [
-        "code",
-        "car__code",
-        "driver__name",
-        "station_branch__name",
-        "worker__name",
-    ]
+    search_fields = SEARCH_PATHS[CarOperation]
 
     def get_queryset(self):
         if self.request.user.role == User.UserRoles.StationOwner:
@@ -198,7 +195,7 @@ class StationOperationsAPIView(ListAPIView):
             )
         if self.request.user.role == User.UserRoles.StationBranchManager:
             self.queryset = self.queryset.filter(
-                station_branch__managers__user=self.request.user
+                station_branch_id__in=get_scope(self.request).station_branch_ids
             )
         if self.request.user.role == User.UserRoles.StationWorker:
             self.queryset = self.queryset.filter(worker=self.request.user)
@@ -236,6 +233,22 @@ class StationOperationsAPIView(ListAPIView):
 class StationReportsAPIView(APIView):
     permission_classes = [IsAuthenticated, StationPermission]
 
+    @staticmethod
+    def parse_param(request, name, parse, default=None):
+        value = request.query_params.get(name)
+        if not value:
+            return default
+        try:
+            parsed = parse(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise CustomValidationError(
+                message=f"Invalid {name} format",
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+        return parsed
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -293,32 +306,37 @@ class StationReportsAPIView(APIView):
             station_branch_filter = Q(station_branch__station_id=request.station_id)
             cash_request_filter = station_branch_filter
         if request.user.role == User.UserRoles.StationBranchManager:
-            station_branch_filter = Q(station_branch__managers__user=request.user)
+            station_branch_filter = Q(
+                station_branch_id__in=get_scope(request).station_branch_ids
+            )
             cash_request_filter = station_branch_filter
         if request.user.role == User.UserRoles.StationWorker:
             station_branch_filter = Q(worker=request.user)
             cash_request_filter = Q(approved_by_id=request.user.id)
 
-        today = date.today()
-        date_from = request.query_params.get("date_from", today)
-        date_to = request.query_params.get("date_to", None)
-        time_from = request.query_params.get("time_from", "00:00:00")
-        time_to = request.query_params.get("time_to", "23:59:59")
-        if date_from:
-            station_branch_filter &= Q(modified__date__gte=date_from)
-            cash_request_filter &= Q(modified__date__gte=date_from)
-        if date_to:
-            station_branch_filter &= Q(modified__date__lte=date_to)
-            cash_request_filter &= Q(modified__date__lte=date_to)
+        date_from = self.parse_param(
+            request, "date_from", parse_date, timezone.localdate()
+        )
+        date_to = self.parse_param(request, "date_to", parse_date)
+        time_from = self.parse_param(request, "time_from", parse_time)
+        time_to = self.parse_param(request, "time_to", parse_time)
+        # without date_to the window ends today (nothing is modified later)
+        start, end = timestamp_bounds(
+            date_from=date_from,
+            date_to=date_to or max(date_from, timezone.localdate()),
+        )
+        period = Q(modified__gte=start, modified__lt=end)
+        # the times bound every day of the period, not its first and last day
         if time_from:
-            station_branch_filter &= Q(modified__time__gte=time_from)
-            cash_request_filter &= Q(modified__time__gte=time_from)
+            period &= Q(modified__time__gte=time_from)
         if time_to:
-            station_branch_filter &= Q(modified__time__lte=time_to)
-            cash_request_filter &= Q(modified__time__lte=time_to)
+            period &= Q(modified__time__lte=time_to)
+        cash_request_filter &= period
 
+        # an operation is modified at or after its creation, the bound on
+        # `created` skips the partitions of later months
         operations = (
-            CarOperation.objects.filter(station_branch_filter)
+            CarOperation.objects.filter(station_branch_filter, period, created__lt=end)
             .select_related("service")
             .values("service")
             .annotate(
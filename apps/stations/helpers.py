@@ -0,0 +1,263 @@
+import math
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from apps.accounting import ledger
+from apps.accounting.helpers import (
+    build_station_transaction,
+    generate_company_transaction,
+)
+from apps.accounting.models import KhaznaTransaction
+from apps.companies.models.company_models import Car
+from apps.companies.models.operation_model import CarOperation
+from apps.companies.rollups import add_to_branch_rollups
+from apps.companies.verification import open_operation
+from apps.notifications.helpers import send_notifications
+from apps.notifications.models import Notification
+from apps.shared.base_exception_class import CustomValidationError
+from apps.shared.generate_code import REFERENCE_CODES
+from apps.stations.api.station_serializers.car_operation_serializer import (
+    updateStationGasCarOperationSerializer,
+)
+from apps.stations.models.service_models import Service
+from apps.users.models import CompanyBranchManager, User
+
+
+def get_fueling_recipients(company_id, company_branch_id, station_id):
+    """
+    Resolve every user notified by a fueling with a single query.
+
+    Returns the company users (flagging owners and managers of the car's branch,
+    who receive the oil change reminder) and the station owners.
+    """
+    users = (
+        User.objects.filter(
+            Q(companyuser__company_id=company_id)
+            | Q(stationowner__station_id=station_id)
+        )
+        .annotate(
+            manages_branch=Exists(
+                CompanyBranchManager.objects.filter(
+                    user_id=OuterRef("pk"), company_branch_id=company_branch_id
+                )
+            )
+        )
+        .values_list("id", "role", "companyuser__company_id", "manages_branch")
+    )
+    company_users, oil_change_users, station_owners = [], [], []
+    for user_id, role, user_company_id, manages_branch in users:
+        if user_company_id is None:
+            station_owners.append(user_id)
+            continue
+        company_users.append(user_id)
+        if role == User.UserRoles.CompanyOwner or (
+            role == User.UserRoles.CompanyBranchManager and manages_branch
+        ):
+            oil_change_users.append(user_id)
+    return company_users, oil_change_users, station_owners
+
+
+def complete_gas_operation(car_operation, serializer, user, end_time=None):
+    """
+    Settle a fueling with a fixed number of queries whatever the number of
+    recipients.
+
+    `car_operation` must be loaded with `car__branch`, `service` and
+    `worker__station_branch` so no lazy lookup happens here. The car is
+    debited together with its meter fields in one conditional update and the
+    station branch through the ledger, both khazna reference codes come from
+    the code sequence and all notifications are written with one insert and
+    pushed after commit. `end_time` defaults to now, synced operations pass
+    the device's.
+    """
+    if not car_operation.start_time:
+        raise CustomValidationError(message="يجب تحديد الوقت البدء", code="not_found")
+    end_time = end_time or timezone.localtime()
+    if end_time > car_operation.start_time + timedelta(seconds=60):
+        raise CustomValidationError(
+            message="الوقت الانتهاء يجب ان يكون اقل من 60 ثانية",
+            code="not_found",
+        )
+
+    amount = serializer.validated_data["amount"]
+    car = car_operation.car
+    company_branch = car.branch
+    service = car_operation.service
+    station_branch = car_operation.worker.station_branch
+
+    car_tank_capacity = (
+        car.permitted_fuel_amount if car.permitted_fuel_amount else car.tank_capacity
+    )
+    company_liter_cost = service.cost * (company_branch.fees / 100) + service.cost
+    available_liters = math.floor(car.balance / company_liter_cost)
+    available_liters = min(car_tank_capacity, available_liters)
+    if amount > available_liters:
+        raise CustomValidationError(
+            message="الكمية المطلوبة اكبر من الحد الأقصى", code="not_found"
+        )
+
+    cost = round(Decimal(amount) * Decimal(service.cost), 2)
+    company_cost = round(Decimal(amount) * Decimal(company_liter_cost), 2)
+    station_cost = round(
+        Decimal(amount) * Decimal(service.cost + station_branch.fees), 2
+    )
+    profits = round(company_cost - station_cost, 2)
+
+    car_first_meter = car.last_meter
+    fuel_consumption_rate = car.fuel_consumption_rate
+    if car.is_with_odometer and car_operation.car_meter is not None:
+        fuel_consumption_rate = (car_operation.car_meter - car.last_meter) / amount
+
+    car_fields = {
+        "balance": F("balance") - company_cost,
+        "fuel_consumption_rate": fuel_consumption_rate,
+        "is_blocked_balance_update": False,
+    }
+    if car_operation.car_meter is not None:
+        car_fields["last_meter"] = car_operation.car_meter
+    # the balance condition guards against a concurrent debit of the same car
+    if not Car.objects.filter(id=car.id, balance__gte=company_cost).update(
+        **car_fields
+    ):
+        raise CustomValidationError(
+            message="السيارة لا تمتلك كافٍ من المال", code="not_enough_balance"
+        )
+    add_to_branch_rollups(car.branch_id, {"cars_balance": -company_cost})
+    if car_operation.car_meter is not None:
+        car.last_meter = car_operation.car_meter
+
+    serializer.save(
+        end_time=end_time,
+        status=CarOperation.OperationStatus.COMPLETED,
+        duration=(
+            end_time - min(car_operation.created, car_operation.start_time)
+        ).total_seconds(),
+        cost=cost,
+        car_first_meter=car_first_meter,
+        company_cost=company_cost,
+        station_cost=station_cost,
+        profits=profits,
+        unit=Service.ServiceUnit.LITRE,
+        fuel_consumption_rate=fuel_consumption_rate,
+    )
+
+    company_users, oil_change_users, station_owners = get_fueling_recipients(
+        company_id=company_branch.company_id,
+        company_branch_id=company_branch.id,
+        station_id=station_branch.station_id,
+    )
+    station_reference_code, company_reference_code = REFERENCE_CODES.next_codes(
+        KhaznaTransaction, 2, look_up="reference_code"
+    )
+    fueling_message = f"تم تفويل سيارة رقم {car.plate} بعدد {amount} لتر"
+    ledger.debit(
+        station_branch,
+        station_cost,
+        allow_overdraft=True,
+        record=build_station_transaction(
+            station_id=station_branch.station_id,
+            station_branch_id=station_branch.id,
+            amount=station_cost,
+            status=KhaznaTransaction.TransactionStatus.APPROVED,
+            description=fueling_message,
+            created_by_id=user.id,
+            is_internal=False,
+            reference_code=station_reference_code,
+        ),
+    )
+    generate_company_transaction(
+        company_id=company_branch.company_id,
+        company_branch_id=company_branch.id,
+        amount=company_cost,
+        status=KhaznaTransaction.TransactionStatus.APPROVED,
+        description=fueling_message,
+        created_by_id=user.id,
+        is_internal=True,
+        reference_code=company_reference_code,
+    )
+
+    notifications = []
+    if (
+        car.next_oil_change_km
+        and car.next_oil_change_km > 0
+        and car.next_oil_change_km <= car.last_meter
+    ):
+        message = f"يجب تغيير زيت السيارة رقم {car.plate} بعدد {amount} لتر"
+        notifications += [
+            Notification(
+                user_id=user_id,
+                title=message,
+                description=message,
+                type=Notification.NotificationType.GENERAL,
+            )
+            for user_id in oil_change_users
+        ]
+    notifications += [
+        Notification(
+            user_id=user_id,
+            title=fueling_message,
+            description=fueling_message,
+            type=Notification.NotificationType.MONEY,
+        )
+        for user_id in [*station_owners, user.id]
+    ]
+    message = f"{fueling_message} وخصم مبلغ بمقدار {company_cost:.2f} جنية"
+    notifications += [
+        Notification(
+            user_id=user_id,
+            title=message,
+            description=message,
+            type=Notification.NotificationType.MONEY,
+        )
+        for user_id in [*company_users, user.id]
+    ]
+    send_notifications(notifications)
+
+
+def sync_gas_operation(request, data):
+    """
+    Open and settle a fueling recorded offline, `data` being a validated
+    SyncGasOperationSerializer item. Runs the same checks as the verify and
+    gas operation endpoints, with the device's start and finish times.
+    """
+    verified = open_operation(
+        request,
+        data["driver_code"],
+        data["car_code"],
+        "petrol",
+        start_time=data["started_at"],
+        car_meter=data.get("car_meter"),
+        client_key=data["client_key"],
+    )
+    car = verified.car
+    if (
+        data.get("car_meter") is not None
+        and car.is_with_odometer
+        and data["car_meter"] < car.last_meter
+    ):
+        raise CustomValidationError(
+            message="العداد الحالي يجب ان يكون اكبر من العداد السابق",
+            code="not_found",
+        )
+
+    car_operation = CarOperation.objects.select_related(
+        "car__branch", "service", "worker__station_branch"
+    ).get(id=verified.operation.id)
+    update = {"amount": data["amount"]}
+    if data.get("car_meter") is not None:
+        update["car_meter"] = data["car_meter"]
+    for field in ("fuel_image", "motor_image"):
+        if data.get(field) in request.FILES:
+            update[field] = request.FILES[data[field]]
+    serializer = updateStationGasCarOperationSerializer(
+        car_operation, data=update, partial=True
+    )
+    if not serializer.is_valid():
+        raise CustomValidationError(serializer.errors)
+    complete_gas_operation(
+        car_operation, serializer, request.user, end_time=data["finished_at"]
+    )
+    return car_operation
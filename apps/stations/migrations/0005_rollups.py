@@ -0,0 +1,35 @@
+# Generated by Django 4.2 on 2026-10-18 15:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stations", "0004_stationbranch_is_for_landing_page"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StationRollup",
+            fields=[
+                (
+                    "station",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="rollup",
+                        serialize=False,
+                        to="stations.station",
+                    ),
+                ),
+                (
+                    "branches_balance",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("branches_count", models.IntegerField(default=0)),
+                ("refreshed_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -1,21 +1,9 @@
-import imghdr
-import mimetypes
-
-from django.core.exceptions import ValidationError
 from django.db import models
 
+from apps.shared.validators import validate_image_or_svg
 from apps.utilities.models.abstract_base_model import AbstractBaseModel
 
 
-def validate_image_or_svg(file):
-    mime_type, _ = mimetypes.guess_type(file.name)
-    if mime_type == "image/svg+xml":
-        return  # Allow SVGs
-    elif imghdr.what(file) in ["jpeg", "png", "gif"]:
-        return  # Allow raster images
-    raise ValidationError("Only valid images or SVGs are allowed.")
-
-
 class Service(AbstractBaseModel):
     class ServiceType(models.TextChoices):
         PETROL = "petrol"
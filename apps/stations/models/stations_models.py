@@ -77,3 +77,20 @@ class StationBranchService(AbstractBaseModel):
     class Meta:
         verbose_name = "Station Branch Service"
         verbose_name_plural = "Station Branch Services"
+
+
+class StationRollup(models.Model):
+    """
+    Running branch totals behind the station home screen, kept up to date by
+    the ledger and the station branch signals and recomputed nightly.
+    """
+
+    station = models.OneToOneField(
+        Station, on_delete=models.CASCADE, primary_key=True, related_name="rollup"
+    )
+    branches_balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    branches_count = models.IntegerField(default=0)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return str(self.station_id)
@@ -0,0 +1,99 @@
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from apps.stations.models.stations_models import Station, StationBranch, StationRollup
+
+
+def remember_state(instance):
+    if "station_id" in instance.__dict__ and "balance" in instance.__dict__:
+        instance._rollup_state = (instance.station_id, instance.balance)
+    else:
+        instance._rollup_state = None
+
+
+def add_to_station_rollup(station_id, branches_balance=0, branches_count=0):
+    totals = {
+        field: F(field) + value
+        for field, value in (
+            ("branches_balance", branches_balance),
+            ("branches_count", branches_count),
+        )
+        if value
+    }
+    if totals:
+        StationRollup.objects.filter(station_id=station_id).update(**totals)
+
+
+def track_change(instance, created=False, deleted=False):
+    """Apply the difference between the remembered and the current branch."""
+    old_state = getattr(instance, "_rollup_state", None)
+    if not created and old_state is None:
+        refresh_station_rollups([instance.station_id])
+        return
+    new_state = (instance.station_id, instance.balance)
+    if not created and not deleted and old_state == new_state:
+        return
+    if not created:
+        add_to_station_rollup(old_state[0], -(old_state[1] or 0), -1)
+    if not deleted:
+        add_to_station_rollup(new_state[0], new_state[1] or 0, 1)
+    remember_state(instance)
+
+
+def move_balances(movements):
+    """Mirror ledger movements of station branches in the rollups."""
+    totals = {}
+    for account, amount in movements:
+        if isinstance(account, StationBranch):
+            totals[account.station_id] = totals.get(account.station_id, 0) + amount
+            if getattr(account, "_rollup_state", None) is not None:
+                station_id, balance = account._rollup_state
+                account._rollup_state = (station_id, balance + amount)
+    for station_id in sorted(totals):
+        add_to_station_rollup(station_id, branches_balance=totals[station_id])
+
+
+def refresh_station_rollups(station_ids=None):
+    """Recompute the rollups of the given stations (all when None)."""
+    stations = Station.objects.all()
+    if station_ids is not None:
+        stations = stations.filter(id__in=station_ids)
+    with transaction.atomic():
+        StationRollup.objects.bulk_create(
+            [
+                StationRollup(station_id=station_id)
+                for station_id in stations.values_list("id", flat=True)
+            ],
+            ignore_conflicts=True,
+        )
+        rollups = list(
+            StationRollup.objects.select_for_update()
+            .filter(station__in=stations)
+            .order_by("station_id")
+        )
+        totals = {
+            row["station_id"]: row
+            for row in StationBranch.objects.filter(station__in=stations)
+            .values("station_id")
+            .annotate(branches_balance=Sum("balance"), branches_count=Count("id"))
+        }
+        now = timezone.now()
+        for rollup in rollups:
+            row = totals.get(rollup.station_id, {})
+            rollup.branches_balance = row.get("branches_balance") or 0
+            rollup.branches_count = row.get("branches_count") or 0
+            rollup.refreshed_at = now
+        StationRollup.objects.bulk_update(
+            rollups,
+            ["branches_balance", "branches_count", "refreshed_at"],
+            batch_size=500,
+        )
+
+
+def get_station_rollup(station_id):
+    rollup = StationRollup.objects.filter(station_id=station_id).first()
+    if rollup is None:
+        refresh_station_rollups([station_id])
+        rollup = StationRollup.objects.filter(station_id=station_id).first()
+    return rollup
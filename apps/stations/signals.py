@@ -0,0 +1,30 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from apps.stations import rollups
+from apps.stations.models.stations_models import Station, StationBranch, StationRollup
+
+
+@receiver(post_save, sender=Station)
+def create_rollup_after_station_created(sender, instance, created, **kwargs):
+    if created:
+        StationRollup.objects.create(station=instance)
+
+
+@receiver(post_init, sender=StationBranch)
+def remember_rollup_state(sender, instance, **kwargs):
+    rollups.remember_state(instance)
+
+
+@receiver(post_save, sender=StationBranch)
+def update_rollup_after_branch_saved(
+    sender, instance, created, update_fields, **kwargs
+):
+    if update_fields and not {"station", "balance"}.intersection(update_fields):
+        return
+    rollups.track_change(instance, created=created)
+
+
+@receiver(post_delete, sender=StationBranch)
+def update_rollup_after_branch_deleted(sender, instance, **kwargs):
+    rollups.track_change(instance, deleted=True)
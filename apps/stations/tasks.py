@@ -2,8 +2,15 @@ from time import sleep
 
 from celery import shared_task
 
+from apps.stations.rollups import refresh_station_rollups
+
 
 @shared_task
 def add(x, y):
     sleep(5)
     return x + y
+
+
+@shared_task(ignore_result=True)
+def refresh_rollups():
+    refresh_station_rollups()
@@ -0,0 +1,268 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from apps.accounting.models import CompanyKhaznaTransaction, StationKhaznaTransaction
+from apps.companies.models.company_models import Car, Company, CompanyBranch, Driver
+from apps.companies.models.operation_model import CarOperation
+from apps.notifications.models import Notification
+from apps.stations.api.station_serializers.car_operation_serializer import (
+    SyncGasOperationSerializer,
+)
+from apps.stations.models.service_models import Service
+from apps.users.models import CompanyUser, User
+
+# operation lookup, recipients, reference code allocation (a probe
+# on sqlite, usually none on postgres), car/operation/branch
+# updates, company and station rollup updates, two multi-table khazna
+# inserts (two statements each) and their ledger entries, one
+# notifications insert and one push outbox insert
+COMPLETION_QUERY_BUDGET = 16
+
+
+def fuel_image():
+    buffer = BytesIO()
+    Image.new("RGB", (1, 1)).save(buffer, format="PNG")
+    return SimpleUploadedFile("fuel.png", buffer.getvalue(), content_type="image/png")
+
+
+@pytest.mark.django_db
+class TestStationGasOperationCompletion:
+    @pytest.fixture(autouse=True)
+    def setup(self, settings, tmp_path, admin_user, station, branch, station_worker):
+        settings.MEDIA_ROOT = tmp_path
+        self.admin = admin_user
+        self.station_branch = branch
+        self.worker = station_worker
+        self.company = Company.objects.create(
+            name="Company", address="Address", created_by=admin_user
+        )
+        self.company_branch = CompanyBranch.objects.create(
+            name="Company Branch",
+            company=self.company,
+            fees=Decimal("10.00"),
+            created_by=admin_user,
+        )
+        self.service = Service.objects.create(
+            name="Diesel",
+            type=Service.ServiceType.DIESEL,
+            unit=Service.ServiceUnit.LITRE,
+            cost=Decimal("10.00"),
+            created_by=admin_user,
+        )
+        self.car = Car.objects.create(
+            plate_number="123",
+            plate_character="ABC",
+            plate_color=Car.PlateColor.BLUE,
+            color="white",
+            model_year=2020,
+            brand="Toyota",
+            is_with_odometer=True,
+            tank_capacity=60,
+            permitted_fuel_amount=50,
+            number_of_fuelings_per_day=3,
+            number_of_washes_per_month=3,
+            last_meter=1000,
+            balance=Decimal("1000.00"),
+            service=self.service,
+            branch=self.company_branch,
+            created_by=admin_user,
+        )
+        self.driver = Driver.objects.create(
+            name="Driver",
+            phone_number="01100000000",
+            lincense_number="L-1",
+            lincense_expiration_date=timezone.localdate(),
+            branch=self.company_branch,
+            created_by=admin_user,
+        )
+
+    def add_company_owners(self, count):
+        existing = CompanyUser.objects.count()
+        for index in range(existing, existing + count):
+            CompanyUser.objects.create(
+                name=f"Owner {index}",
+                phone_number=f"012000000{index:02d}",
+                email=f"owner{index}@example.com",
+                password="password123",
+                role=User.UserRoles.CompanyOwner,
+                company=self.company,
+                created_by=self.admin,
+            )
+
+    def start_operation(self):
+        return CarOperation.objects.create(
+            car=self.car,
+            driver=self.driver,
+            service=self.service,
+            worker=self.worker,
+            station_branch=self.station_branch,
+            status=CarOperation.OperationStatus.IN_PROGRESS,
+            start_time=timezone.localtime(),
+            car_meter=Decimal("1200"),
+            created_by=self.worker,
+        )
+
+    def complete(self, client, operation):
+        url = reverse("station-gas-operations", kwargs={"pk": operation.id})
+        with CaptureQueriesContext(connection) as context:
+            response = client.patch(
+                url, {"amount": "20", "fuel_image": fuel_image()}, format="multipart"
+            )
+        assert response.status_code == 200, response.data
+        return len(context.captured_queries)
+
+    def test_completion_settles_balances_and_ledger(self, auth_client):
+        self.add_company_owners(1)
+        operation = self.start_operation()
+        client = auth_client(self.worker, station_id=self.station_branch.station_id)
+
+        self.complete(client, operation)
+
+        operation.refresh_from_db()
+        self.car.refresh_from_db()
+        self.station_branch.refresh_from_db()
+        assert operation.status == CarOperation.OperationStatus.COMPLETED
+        assert operation.company_cost == Decimal("220.00")
+        assert operation.station_cost == Decimal("200.00")
+        assert self.car.balance == Decimal("780.00")
+        assert self.car.last_meter == 1200
+        assert not self.car.is_blocked_balance_update
+        assert self.station_branch.balance == Decimal("-200.00")
+        assert CompanyKhaznaTransaction.objects.get().amount == Decimal("220.00")
+        assert StationKhaznaTransaction.objects.get().amount == Decimal("200.00")
+        # station message to the worker, company message to the owner and worker
+        assert Notification.objects.count() == 3
+
+    def test_completion_query_count_is_independent_of_recipients(self, auth_client):
+        client = auth_client(self.worker, station_id=self.station_branch.station_id)
+        self.add_company_owners(1)
+        # the first request with the token loads the user, later ones reuse it
+        self.complete(client, self.start_operation())
+        few_recipients = self.complete(client, self.start_operation())
+
+        self.add_company_owners(5)
+        many_recipients = self.complete(client, self.start_operation())
+
+        # request overhead: the atomic savepoint and its release
+        assert many_recipients == few_recipients
+        assert many_recipients <= COMPLETION_QUERY_BUDGET + 2
+
+    def test_a_car_has_one_open_operation_at_most(self):
+        self.start_operation()
+
+        with pytest.raises(IntegrityError), transaction.atomic():
+            self.start_operation()
+
+    def test_sync_settles_a_batch_and_ignores_resent_items(self, auth_client):
+        client = auth_client(self.worker, station_id=self.station_branch.station_id)
+        self.car.fuel_allowed_days = [timezone.localdate().strftime("%A")]
+        self.car.save()
+        finished_at = timezone.now()
+        operations = [
+            {
+                "client_key": "device-1",
+                "car_code": self.car.code,
+                "driver_code": self.driver.code,
+                "started_at": (finished_at - timedelta(seconds=30)).isoformat(),
+                "finished_at": finished_at.isoformat(),
+                "amount": "20",
+                "fuel_image": "fuel-1",
+            },
+            {
+                "client_key": "device-2",
+                "car_code": "missing",
+                "driver_code": self.driver.code,
+                "started_at": finished_at.isoformat(),
+                "finished_at": finished_at.isoformat(),
+                "amount": "20",
+                "fuel_image": "fuel-2",
+            },
+        ]
+        url = reverse("station-gas-operations-sync")
+
+        def sync():
+            response = client.post(
+                url,
+                {"operations": json.dumps(operations), "fuel-1": fuel_image()},
+                format="multipart",
+            )
+            assert response.status_code == 200, response.data
+            return response.data["results"]
+
+        first, missing_car = sync()
+        resent, _ = sync()
+
+        operation = CarOperation.objects.get(client_key="device-1")
+        assert first == {
+            "client_key": "device-1",
+            "status": "completed",
+            "operation_id": operation.id,
+        }
+        assert missing_car["status"] == "failed"
+        assert missing_car["code"] == "car_code_not_found"
+        assert resent["status"] == "duplicate"
+        assert resent["operation_id"] == operation.id
+        assert operation.status == CarOperation.OperationStatus.COMPLETED
+        assert operation.end_time == finished_at
+        self.car.refresh_from_db()
+        assert self.car.balance == Decimal("780.00")
+        assert CarOperation.objects.count() == 1
+
+    def test_sync_reports_an_item_synced_by_a_concurrent_resend(self, auth_client):
+        client = auth_client(self.worker, station_id=self.station_branch.station_id)
+        self.car.fuel_allowed_days = [timezone.localdate().strftime("%A")]
+        self.car.save()
+        now = timezone.now()
+        validate = SyncGasOperationSerializer.validate
+
+        def resent_meanwhile(serializer, attrs):
+            # the other request commits the item once this one read `synced`
+            self.concurrent = CarOperation.objects.create(
+                car=self.car,
+                driver=self.driver,
+                worker=self.worker,
+                station_branch=self.station_branch,
+                status=CarOperation.OperationStatus.COMPLETED,
+                client_key=attrs["client_key"],
+                created_by=self.worker,
+            )
+            return validate(serializer, attrs)
+
+        with patch.object(SyncGasOperationSerializer, "validate", resent_meanwhile):
+            response = client.post(
+                reverse("station-gas-operations-sync"),
+                {
+                    "operations": [
+                        {
+                            "client_key": "device-1",
+                            "car_code": self.car.code,
+                            "driver_code": self.driver.code,
+                            "started_at": now.isoformat(),
+                            "finished_at": now.isoformat(),
+                            "amount": "20",
+                            "fuel_image": "fuel-1",
+                        }
+                    ]
+                },
+                format="json",
+            )
+
+        assert response.status_code == 200, response.data
+        assert response.data["results"] == [
+            {
+                "client_key": "device-1",
+                "status": "duplicate",
+                "operation_id": self.concurrent.id,
+            }
+        ]
@@ -0,0 +1,96 @@
+from datetime import time, timedelta
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.companies.models.company_models import Car, Company, CompanyBranch, Driver
+from apps.companies.models.operation_model import CarOperation
+from apps.shared.helpers import start_of
+from apps.stations.models.service_models import Service
+
+
+@pytest.mark.django_db
+class TestStationReports:
+    @pytest.fixture(autouse=True)
+    def setup(self, auth_client, admin_user, branch, station_worker, station_owner):
+        company = Company.objects.create(
+            name="Company", address="Address", created_by=admin_user
+        )
+        company_branch = CompanyBranch.objects.create(
+            name="Company Branch", company=company, created_by=admin_user
+        )
+        self.service = Service.objects.create(
+            name="Diesel",
+            type=Service.ServiceType.DIESEL,
+            unit=Service.ServiceUnit.LITRE,
+            cost=Decimal("10.00"),
+            created_by=admin_user,
+        )
+        self.car = Car.objects.create(
+            plate_number="123",
+            plate_character="ABC",
+            model_year=2020,
+            is_with_odometer=True,
+            tank_capacity=60,
+            permitted_fuel_amount=50,
+            number_of_fuelings_per_day=3,
+            number_of_washes_per_month=3,
+            branch=company_branch,
+            created_by=admin_user,
+        )
+        self.driver = Driver.objects.create(
+            name="Driver",
+            phone_number="01100000000",
+            lincense_number="L-1",
+            lincense_expiration_date=timezone.localdate(),
+            branch=company_branch,
+            created_by=admin_user,
+        )
+        self.branch = branch
+        self.worker = station_worker
+        self.client = auth_client(station_owner, station_id=branch.station_id)
+
+    def add_operation(self, **times):
+        operation = CarOperation.objects.create(
+            car=self.car,
+            driver=self.driver,
+            service=self.service,
+            worker=self.worker,
+            station_branch=self.branch,
+            status=CarOperation.OperationStatus.COMPLETED,
+            amount=Decimal("10"),
+            created_by=self.worker,
+        )
+        CarOperation.objects.filter(id=operation.id).update(**times)
+        return operation
+
+    def report(self, **params):
+        response = self.client.get(reverse("station-reports"), params)
+        assert response.status_code == 200, response.data
+        return response.data["operations"]
+
+    def test_an_operation_edited_long_after_its_creation_counts_on_the_edit_day(self):
+        self.add_operation(created=timezone.localtime() - timedelta(days=30))
+
+        assert [row["count"] for row in self.report()] == [1]
+
+    def test_report_times_bound_every_day_of_the_period(self):
+        today = timezone.localdate()
+        yesterday = today - timedelta(days=1)
+        for day, at in (
+            (yesterday, time(11)),
+            (yesterday, time(15)),
+            (today, time(11)),
+        ):
+            self.add_operation(modified=start_of(day, at))
+
+        operations = self.report(
+            date_from=yesterday.isoformat(),
+            date_to=today.isoformat(),
+            time_from="10:00:00",
+            time_to="12:00:00",
+        )
+
+        assert [row["count"] for row in operations] == [2]
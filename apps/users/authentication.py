@@ -0,0 +1,139 @@
+"""
+JWT authentication that verifies a token once per process.
+
+The first request with a token verifies its signature, loads the user and
+builds a small principal from the claims. All three are kept in a per-process
+LRU for AUTH_CACHE_TTL seconds (never past the token's expiry), so the
+following requests with the same token skip both the signature check and the
+user SELECT. Saving or deleting a user drops their entries in this process.
+The other processes drop theirs within AUTH_CACHE_TTL.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from apps.users.models import User, Worker
+
+AUTH_CACHE_SIZE = 2048
+AUTH_CACHE_TTL = 30
+
+
+@dataclass(frozen=True)
+class Principal:
+    user_id: int
+    role: str
+    company_id: int = None
+    station_id: int = None
+    station_branch_id: int = None
+
+
+@dataclass(frozen=True)
+class CachedToken:
+    token: object
+    user: User
+    principal: Principal
+    expires_at: float
+
+
+class TokenCache:
+    """
+    Thread-safe LRU of verified tokens.
+
+    Entries are keyed by the raw token rather than its jti, so a token with a
+    tampered payload never matches an entry that was verified.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, raw_token):
+        with self.lock:
+            entry = self.entries.get(raw_token)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.time():
+                del self.entries[raw_token]
+                return None
+            self.entries.move_to_end(raw_token)
+            return entry
+
+    def add(self, raw_token, entry):
+        with self.lock:
+            self.entries[raw_token] = entry
+            self.entries.move_to_end(raw_token)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def forget_user(self, user_id):
+        with self.lock:
+            for raw_token in [
+                raw_token
+                for raw_token, entry in self.entries.items()
+                if entry.principal.user_id == user_id
+            ]:
+                del self.entries[raw_token]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+token_cache = TokenCache(AUTH_CACHE_SIZE)
+
+
+def build_principal(user, token):
+    station_branch_id = None
+    if user.role == User.UserRoles.StationWorker:
+        station_branch_id = (
+            Worker.objects.filter(pk=user.pk)
+            .values_list("station_branch_id", flat=True)
+            .first()
+        )
+    return Principal(
+        user_id=user.pk,
+        role=user.role,
+        company_id=token.get("company_id"),
+        station_id=token.get("station_id"),
+        station_branch_id=station_branch_id,
+    )
+
+
+class CompanyJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication backed by `token_cache`. It also sets `principal`,
+    `company_id` and `station_id` on the request.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        entry = token_cache.get(raw_token)
+        if entry is None:
+            token = self.get_validated_token(raw_token)
+            user = self.get_user(token)
+            entry = CachedToken(
+                token=token,
+                user=user,
+                principal=build_principal(user, token),
+                expires_at=min(time.time() + AUTH_CACHE_TTL, token["exp"]),
+            )
+            token_cache.add(raw_token, entry)
+
+        django_request = getattr(request, "_request", request)
+        django_request.principal = entry.principal
+        django_request.company_id = entry.principal.company_id
+        django_request.station_id = entry.principal.station_id
+        # views may set attributes on request.user, each request gets a copy
+        return copy.copy(entry.user), entry.token
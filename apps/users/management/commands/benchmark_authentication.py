@@ -0,0 +1,49 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.users.authentication import CompanyJWTAuthentication, token_cache
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the authentication overhead per request of simplejwt's "
+        "JWTAuthentication and CompanyJWTAuthentication with the same token."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(is_active=True).first()
+        if user is None:
+            raise CommandError("The benchmark needs an active user.")
+        token = AccessToken.for_user(user)
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        token_cache.clear()
+
+        for name, authentication in (
+            ("JWTAuthentication", JWTAuthentication()),
+            ("CompanyJWTAuthentication", CompanyJWTAuthentication()),
+        ):
+            timings = []
+            for _ in range(options["requests"]):
+                started = time.perf_counter()
+                authentication.authenticate(request)
+                timings.append(time.perf_counter() - started)
+            self.report(name, timings)
+
+    def report(self, name, timings):
+        timings = sorted(timings)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{name}: mean {statistics.mean(timings) * 1e6:.1f}us, "
+                f"p50 {timings[len(timings) // 2] * 1e6:.1f}us, "
+                f"p99 {timings[int(len(timings) * 0.99)] * 1e6:.1f}us"
+            )
+        )
@@ -0,0 +1,90 @@
+"""
+The branches a branch manager may see, cached per user.
+
+Querysets of branch managers used to filter through the manager tables
+(`branch__managers__user=...`), which adds joins and duplicate rows to every
+list query. `get_scope` resolves the ids once, caches them under the user id
+and a version counter, and keeps them on the request. Changing a user's
+manager rows bumps the version, so the next request computes a fresh scope.
+"""
+
+from dataclasses import dataclass
+
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.users.models import CompanyBranchManager, StationBranchManager, User
+
+SCOPE_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+@dataclass(frozen=True)
+class Scope:
+    company_branch_ids: tuple = ()
+    station_branch_ids: tuple = ()
+    station_ids: tuple = ()
+
+
+def version_key(user_id):
+    return f"scope_version:{user_id}"
+
+
+def scope_key(user_id, version):
+    return f"scope:{user_id}:{version}"
+
+
+def compute_scope(user):
+    if user.role == User.UserRoles.CompanyBranchManager:
+        return Scope(
+            company_branch_ids=tuple(
+                CompanyBranchManager.objects.filter(user_id=user.id)
+                .order_by("company_branch_id")
+                .values_list("company_branch_id", flat=True)
+            )
+        )
+    if user.role == User.UserRoles.StationBranchManager:
+        branches = list(
+            StationBranchManager.objects.filter(user_id=user.id)
+            .order_by("station_branch_id")
+            .values_list("station_branch_id", "station_branch__station_id")
+        )
+        return Scope(
+            station_branch_ids=tuple(branch_id for branch_id, _ in branches),
+            station_ids=tuple(sorted({station_id for _, station_id in branches})),
+        )
+    return Scope()
+
+
+def get_scope(request):
+    django_request = getattr(request, "_request", request)
+    scope = getattr(django_request, "scope", None)
+    if scope is None:
+        user = request.user
+        version = cache.get(version_key(user.id), 0)
+        scope = cache.get(scope_key(user.id, version))
+        if scope is None:
+            scope = compute_scope(user)
+            cache.set(scope_key(user.id, version), scope, SCOPE_CACHE_TIMEOUT)
+        django_request.scope = scope
+    return scope
+
+
+def bump_scope_version(user_ids):
+    for user_id in user_ids:
+        key = version_key(user_id)
+        version = cache.get(key, 0)
+        cache.delete(scope_key(user_id, version))
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, version + 1, None)
+
+
+def invalidate_scope(*user_ids):
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+    # now for the rest of this transaction, and again after the commit to
+    # drop a scope another request computed from the uncommitted rows
+    bump_scope_version(user_ids)
+    transaction.on_commit(lambda: bump_scope_version(user_ids))
@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.users.authentication import token_cache
+from apps.users.models import CompanyBranchManager, StationBranchManager, User
+from apps.users.scope import invalidate_scope
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def forget_cached_tokens_of_changed_user(sender, instance, **kwargs):
+    if isinstance(instance, User):
+        token_cache.forget_user(instance.pk)
+
+
+@receiver(post_save, sender=CompanyBranchManager)
+@receiver(post_save, sender=StationBranchManager)
+@receiver(post_delete, sender=CompanyBranchManager)
+@receiver(post_delete, sender=StationBranchManager)
+def invalidate_scope_of_manager(sender, instance, **kwargs):
+    invalidate_scope(instance.user_id)
@@ -0,0 +1,51 @@
+import pytest
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.users.authentication import CompanyJWTAuthentication, token_cache
+
+
+@pytest.mark.django_db
+class TestCompanyJWTAuthentication:
+    @pytest.fixture(autouse=True)
+    def setup(self, station_worker, branch):
+        token_cache.clear()
+        self.worker = station_worker
+        self.branch = branch
+        self.token = AccessToken.for_user(station_worker)
+        self.token["station_id"] = branch.station_id
+
+    def authenticate(self, token):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        return request, CompanyJWTAuthentication().authenticate(request)
+
+    def test_token_is_verified_and_loaded_once(self, django_assert_num_queries):
+        request, (user, _) = self.authenticate(self.token)
+
+        assert user.pk == self.worker.pk
+        assert request.station_id == self.branch.station_id
+        assert request.company_id is None
+        assert request.principal.station_branch_id == self.branch.id
+
+        with django_assert_num_queries(0):
+            request, (cached_user, _) = self.authenticate(self.token)
+
+        assert cached_user.pk == self.worker.pk
+        assert cached_user is not user
+
+    def test_tampered_token_is_rejected(self):
+        self.authenticate(self.token)
+        header, payload, signature = str(self.token).split(".")
+
+        with pytest.raises(InvalidToken):
+            self.authenticate(f"{header}.{payload}x.{signature}")
+
+    def test_saving_the_user_drops_the_cached_token(self):
+        self.authenticate(self.token)
+        self.worker.is_active = False
+        self.worker.save()
+
+        with pytest.raises(AuthenticationFailed):
+            self.authenticate(self.token)
@@ -0,0 +1,60 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory
+
+from apps.stations.models.stations_models import StationBranch
+from apps.users.models import StationBranchManager
+from apps.users.scope import get_scope
+
+
+@pytest.mark.django_db
+class TestScope:
+    @pytest.fixture(autouse=True)
+    def setup(self, admin_user, geo_data, branch, branch_manager):
+        self.admin_user = admin_user
+        self.geo_data = geo_data
+        self.branch = branch
+        self.manager = branch_manager
+
+    def get_scope(self):
+        request = APIRequestFactory().get("/")
+        request.user = self.manager
+        return get_scope(request)
+
+    def test_scope_is_cached_per_user(self, django_assert_num_queries):
+        scope = self.get_scope()
+
+        assert scope.station_branch_ids == (self.branch.id,)
+        assert scope.station_ids == (self.branch.station_id,)
+        assert scope.company_branch_ids == ()
+        with django_assert_num_queries(0):
+            assert self.get_scope() == scope
+
+    def test_new_manager_row_invalidates_the_scope(self):
+        self.get_scope()
+        other_branch = StationBranch.objects.create(
+            name="Other Branch",
+            address="Other Address",
+            lang=31.2357,
+            lat=30.0444,
+            station=self.branch.station,
+            district=self.geo_data["district"],
+            created_by=self.admin_user,
+        )
+        StationBranchManager.objects.create(
+            station_branch=other_branch,
+            user=self.manager,
+            created_by=self.admin_user,
+        )
+
+        assert self.get_scope().station_branch_ids == (self.branch.id, other_branch.id)
+
+    def test_worker_list_is_limited_to_the_scope(self, auth_client, station_worker):
+        client = auth_client(self.manager, station_id=self.branch.station_id)
+
+        response = client.get(reverse("workers-list"))
+
+        assert response.status_code == 200
+        assert [worker["id"] for worker in response.data["results"]] == [
+            station_worker.id
+        ]
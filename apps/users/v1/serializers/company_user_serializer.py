@@ -5,6 +5,7 @@ from apps.companies.models.company_models import CompanyBranch
 from apps.shared.base_exception_class import CustomValidationError
 from apps.shared.constants import DASHBOARD_ROLES
 from apps.users.models import CompanyBranchManager, CompanyUser, User
+from apps.users.scope import invalidate_scope
 
 from .user_serializers import SingleUserSerializer
 
@@ -174,6 +175,7 @@ class CompanyBranchManagerSerializer(serializers.ModelSerializer):
                     for branch in company_branches
                 ]
             )
+            invalidate_scope(company_user.id)
         return company_user
 
     def update(self, instance, validated_data):
@@ -197,4 +199,5 @@ class CompanyBranchManagerSerializer(serializers.ModelSerializer):
                     for branch in company_branches
                 ]
             )
+            invalidate_scope(instance.id)
         return instance
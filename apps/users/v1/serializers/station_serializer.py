@@ -11,6 +11,7 @@ from apps.stations.api.v1.serializers import (
 )
 from apps.stations.models.stations_models import StationBranch
 from apps.users.models import StationBranchManager, StationOwner, User, Worker
+from apps.users.scope import invalidate_scope
 
 
 class SingleWorkerSerializer(serializers.ModelSerializer):
@@ -217,6 +218,7 @@ class StationBranchManagerCreationSerializer(serializers.ModelSerializer):
                     for branch in station_branches
                 ]
             )
+            invalidate_scope(station_manger.id)
         return station_manger
 
     def update(self, instance, validated_data):
@@ -249,4 +251,5 @@ class StationBranchManagerCreationSerializer(serializers.ModelSerializer):
                     for branch in validated_data["station_branches"]
                 ]
             )
+            invalidate_scope(instance.id)
         return super().update(instance, validated_data)
@@ -8,6 +8,7 @@ from apps.shared.permissions import (
     StationPermission,
 )
 from apps.users.models import StationOwner, User, Worker
+from apps.users.scope import get_scope
 from apps.users.v1.filters import StationBranchManagerFilter, StationOwnerFilter
 from apps.users.v1.serializers.station_serializer import (
     CreateWorkerSerializer,
@@ -21,7 +22,11 @@ from apps.users.v1.serializers.station_serializer import (
 
 
 class StationOwnerViewSet(viewsets.ModelViewSet):
-    queryset = StationOwner.objects.select_related("station").filter(role=User.UserRoles.StationOwner).order_by("-id")
+    queryset = (
+        StationOwner.objects.select_related("station")
+        .filter(role=User.UserRoles.StationOwner)
+        .order_by("-id")
+    )
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_class = StationOwnerFilter
     search_fields = ["name", "phone_number", "email"]
@@ -92,6 +97,6 @@ class WorkerViewSet(viewsets.ModelViewSet):
             )
         if self.request.user.role == User.UserRoles.StationBranchManager:
             return self.queryset.filter(
-                station_branch__managers__user=self.request.user
+                station_branch_id__in=get_scope(self.request).station_branch_ids
             )
         return self.queryset
@@ -1,7 +1,4 @@
-from datetime import timedelta
-
-from django.db.models import Count, Q, Sum
-from django.utils import timezone
+from django.db.models import Sum
 from rest_framework import status
 from rest_framework.response import Response
 
@@ -13,8 +10,9 @@ from apps.companies.api.v1.serializers.car_operation_serializer import (
     ListCompanyHomeCarOperationSerializer,
 )
 from apps.companies.models.company_cash_models import CompanyCashRequest
-from apps.companies.models.company_models import Car, Company, CompanyBranch
+from apps.companies.models.company_models import CompanyBranch
 from apps.companies.models.operation_model import CarOperation
+from apps.companies.rollups import get_company_rollup
 
 
 def company_home_for_owner(company_id):
@@ -22,66 +20,12 @@ def company_home_for_owner(company_id):
         "id", flat=True
     )
 
-    branches_filter = Q(branches__id__in=set(branches_id))
-
-    diesel_car_filter = Q(
-        branches__cars__fuel_type=Car.FuelType.DIESEL, branches__id__in=branches_id
-    )
-    gasoline_car_filter = Q(
-        branches__cars__fuel_type=Car.FuelType.GASOLINE,
-        branches__id__in=branches_id,
-    )
-    drivers_lincense_expiration_date_filter = Q(
-        branches__drivers__lincense_expiration_date__lt=timezone.localtime().date(),
-        branches__id__in=branches_id,
-    )
-    drivers_lincense_expiration_date_filter_30_days = Q(
-        branches__drivers__lincense_expiration_date__lt=timezone.localtime().date()
-        - timedelta(days=30),
-        branches__id__in=branches_id,
-    )
-
-    company = (
-        Company.objects.filter(id=company_id)
-        .annotate(
-            total_cars_count=Count(
-                "branches__cars", distinct=True, filter=branches_filter
-            ),
-            diesel_cars_count=Count(
-                "branches__cars", filter=diesel_car_filter, distinct=True
-            ),
-            gasoline_cars_count=Count(
-                "branches__cars", filter=gasoline_car_filter, distinct=True
-            ),
-            total_drivers_count=Count(
-                "branches__drivers", distinct=True, filter=branches_filter
-            ),
-            total_drivers_with_lincense_expiration_date=Count(
-                "branches__drivers",
-                filter=drivers_lincense_expiration_date_filter,
-                distinct=True,
-            ),
-            total_drivers_with_lincense_expiration_date_30_days=Count(
-                "branches__drivers",
-                filter=drivers_lincense_expiration_date_filter_30_days,
-                distinct=True,
-            ),
-            total_branches_count=Count(
-                "branches", distinct=True, filter=branches_filter
-            ),
-            cars_balance=Sum(
-                "branches__cars__balance", filter=branches_filter, distinct=True
-            ),
-            branches_balance=Sum(
-                "branches__balance", filter=branches_filter, distinct=True
-            ),
-        )
-        .first()
-    )
-    if not company:
+    rollup = get_company_rollup(company_id)
+    if not rollup:
         return Response(
             {"message": "Company not found"}, status=status.HTTP_404_NOT_FOUND
         )
+    company = rollup.company
     cash_requests_balance = (
         CompanyCashRequest.objects.filter(
             driver__branch__in=branches_id,
@@ -89,36 +33,28 @@ def company_home_for_owner(company_id):
         ).aggregate(Sum("amount"))["amount__sum"]
         or 0
     )
-    company.cars_balance = company.cars_balance if company.cars_balance else 0
-    company.branches_balance = (
-        company.branches_balance if company.branches_balance else 0
-    )
-
-    base_balance = company.balance if company.balance else 0
     total_balance = (
         company.balance
-        + company.cars_balance
-        + company.branches_balance
+        + rollup.cars_balance
+        + rollup.branches_balance
         + cash_requests_balance
     )
 
     response_data = {
         "name": company.name,
-        "total_cars_count": company.total_cars_count,
-        "diesel_cars_count": company.diesel_cars_count,
-        "gasoline_cars_count": company.gasoline_cars_count,
-        "total_drivers_count": company.total_drivers_count,
-        "total_drivers_with_lincense_expiration_date": company.total_drivers_with_lincense_expiration_date,
-        "total_drivers_with_lincense_expiration_date_30_days": company.total_drivers_with_lincense_expiration_date_30_days,
-        "total_branches_count": company.total_branches_count,
-        "total_branch_count": company.total_branches_count,
-        "balance": base_balance,
-        "cars_balance": company.cars_balance if company.cars_balance else 0,
-        "branches_balance": (
-            company.branches_balance if company.branches_balance else 0
-        ),
+        "total_cars_count": rollup.cars_count,
+        "diesel_cars_count": rollup.diesel_cars_count,
+        "gasoline_cars_count": rollup.gasoline_cars_count,
+        "total_drivers_count": rollup.drivers_count,
+        "total_drivers_with_lincense_expiration_date": rollup.expired_license_drivers_count,
+        "total_drivers_with_lincense_expiration_date_30_days": rollup.expired_license_30_days_drivers_count,
+        "total_branches_count": rollup.branches_count,
+        "total_branch_count": rollup.branches_count,
+        "balance": company.balance,
+        "cars_balance": rollup.cars_balance,
+        "branches_balance": rollup.branches_balance,
         "cash_requests_balance": cash_requests_balance,
-        "total_balance": total_balance if total_balance else 0,
+        "total_balance": total_balance,
     }
 
     response_data["car_operations"] = ListCompanyHomeCarOperationSerializer(
@@ -20,6 +20,7 @@ from pathlib import Path
 import environ
 import firebase_admin
 import sentry_sdk
+from celery.schedules import crontab
 from firebase_admin import credentials
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -36,6 +37,13 @@ env = environ.Env()
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = env("SECRET_KEY")
 
+# Keys the permutation that turns sequence numbers into car, driver, operation,
+# cash request and reference codes. Unlike SECRET_KEY it must never change:
+# another key maps the coming numbers onto codes that were already issued.
+# There is no fallback, the check shared.E001 reports it missing and codes
+# aren't generated without it.
+CODE_PERMUTATION_KEY = env("CODE_PERMUTATION_KEY", default=None)
+
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = env("DEBUG", default=False)
 
@@ -63,7 +71,7 @@ THIRD_PARTY_APPS = [
     "rest_framework_simplejwt",
     "rest_framework_simplejwt.token_blacklist",
     "gunicorn",
-    "psycopg2"
+    "psycopg2",
 ]
 
 LOCAL_APPS = [
@@ -86,7 +94,6 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "apps.users.middleware.CompanyMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -185,11 +192,11 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": ["rest_framework.permissions.IsAuthenticated"],
     "PAGE_SIZE": 100,
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.users.authentication.CompanyJWTAuthentication",
     ),
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
-        "rest_framework.filters.SearchFilter",
+        "apps.shared.search.SearchTextFilter",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "TIME_ZONE": "Africa/Cairo",
@@ -333,6 +340,40 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = "UTC"
+CELERY_BEAT_SCHEDULE = {
+    # retries pushes whose previous attempt failed
+    "send-push-messages": {
+        "task": "apps.notifications.tasks.send_push_messages",
+        "schedule": timedelta(minutes=1),
+    },
+    # recounts the home screen rollups and moves the license expiry counters
+    "refresh-company-rollups": {
+        "task": "apps.companies.tasks.refresh_rollups",
+        "schedule": crontab(hour=0, minute=5),
+    },
+    # no-op until the car operations table is partitioned
+    "create-car-operation-partitions": {
+        "task": "apps.companies.tasks.create_car_operation_partitions",
+        "schedule": crontab(hour=0, minute=15),
+    },
+    # yesterday's per-company and per-station ledger totals
+    "snapshot-ledger": {
+        "task": "apps.accounting.tasks.snapshot_ledger",
+        "schedule": crontab(hour=0, minute=20),
+    },
+    "create-ledger-partitions": {
+        "task": "apps.accounting.tasks.create_ledger_partitions",
+        "schedule": crontab(hour=0, minute=15),
+    },
+    "refresh-station-rollups": {
+        "task": "apps.stations.tasks.refresh_rollups",
+        "schedule": crontab(hour=0, minute=10),
+    },
+    "refresh-admin-statistics": {
+        "task": "configrations.tasks.refresh_admin_statistics",
+        "schedule": timedelta(minutes=1),
+    },
+}
 
 SESSION_ENGINE = "django.contrib.sessions.backends.cache"
 SESSION_CACHE_ALIAS = "default"
@@ -7,3 +7,17 @@ DATABASES = {
         "NAME": ":memory:",
     }
 }
+# the postgres-only code (partitions, trigram indexes) runs its tests against a
+# real database when one is given, e.g. postgres://user@localhost/petro
+if env("TEST_DATABASE_URL", default=None):
+    DATABASES = {"default": env.db("TEST_DATABASE_URL")}
+
+CODE_PERMUTATION_KEY = "test-code-permutation-key"
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+CELERY_TASK_ALWAYS_EAGER = True
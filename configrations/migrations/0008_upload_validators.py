@@ -0,0 +1,22 @@
+# Generated by Django 4.2 on 2026-10-18 16:14
+
+from django.db import migrations, models
+
+import apps.shared.validators
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("configrations", "0007_configrationsmodel_android_app_link_and_more"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="slider",
+            name="image",
+            field=models.FileField(
+                upload_to="", validators=[apps.shared.validators.validate_image_or_svg]
+            ),
+        ),
+    ]
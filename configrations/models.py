@@ -1,5 +1,7 @@
 from django.db import models
 
+from apps.shared.validators import validate_image_or_svg
+
 
 class ConfigrationsModel(models.Model):
     term_conditions = models.TextField()
@@ -29,5 +31,5 @@ class ConfigrationsModel(models.Model):
 
 class Slider(models.Model):
     name = models.CharField(max_length=255, default="")
-    image = models.FileField()
+    image = models.FileField(validators=[validate_image_or_svg])
     order = models.IntegerField(default=0)
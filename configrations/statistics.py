@@ -0,0 +1,141 @@
+"""
+Admin dashboard statistics.
+
+Every table is read once with conditional aggregates, and the result is kept
+in the cache. A beat task refreshes it before it goes stale. When a request
+finds it stale, one worker recomputes it behind a lock and the others keep
+serving the previous value.
+"""
+
+import time
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.accounting.models import KhaznaTransaction
+from apps.companies.models.company_cash_models import CompanyCashRequest
+from apps.companies.models.company_models import Car, Company, CompanyBranch, Driver
+from apps.companies.models.operation_model import CarOperation
+from apps.geo.models import City, Country, District
+from apps.shared.helpers import day_range
+from apps.stations.models.service_models import Service
+from apps.stations.models.stations_models import Station, StationBranch
+from apps.users.models import User
+
+STATISTICS_CACHE_KEY = "admin_statistics"
+STATISTICS_LOCK_KEY = "admin_statistics:lock"
+# served as is for FRESH_FOR seconds, then recomputed while still served
+STATISTICS_FRESH_FOR = 90
+STATISTICS_STALE_FOR = 15 * 60
+STATISTICS_LOCK_TIMEOUT = 60
+STATISTICS_WAIT = 5
+
+
+def collect_statistics():
+    start, end = day_range(timezone.localdate())
+    created_today = Q(created__gte=start, created__lt=end)
+    roles = User.UserRoles
+
+    users = User.objects.aggregate(
+        total_users=Count("id"),
+        admin_users=Count("id", filter=Q(role=roles.Admin)),
+        company_owners=Count("id", filter=Q(role=roles.CompanyOwner)),
+        station_owners=Count("id", filter=Q(role=roles.StationOwner)),
+        station_workers=Count("id", filter=Q(role=roles.StationWorker)),
+    )
+    companies = Company.objects.aggregate(
+        total_companies=Count("id"),
+        active_companies=Count("id", filter=Q(is_active=True)),
+    )
+    cash_requests = CompanyCashRequest.objects.filter(
+        status=CompanyCashRequest.Status.APPROVED
+    ).aggregate(
+        total_cash_requests=Count("id"),
+        total_cash_requests_today=Count("id", filter=created_today),
+    )
+    operations = CarOperation.objects.filter(
+        status=CarOperation.OperationStatus.COMPLETED
+    ).aggregate(
+        total_operations=Count("id"),
+        total_today_operations=Count("id", filter=created_today),
+        total_profit=Sum("profits"),
+        total_profit_today=Sum("profits", filter=created_today),
+    )
+    transactions = KhaznaTransaction.objects.aggregate(
+        total_transactions=Count("id"),
+        total_today_transactions=Count("id", filter=created_today),
+        total_incoming_today_transactions=Count(
+            "id", filter=Q(is_incoming=True) & created_today
+        ),
+        total_incoming_transactions=Count("id", filter=Q(is_incoming=True)),
+        total_outgoing_transactions=Count("id", filter=Q(is_incoming=False)),
+        total_outgoing_today_transactions=Count(
+            "id", filter=Q(is_incoming=False) & created_today
+        ),
+        total_approved_transactions=Count(
+            "id", filter=Q(status=KhaznaTransaction.TransactionStatus.APPROVED)
+        ),
+        total_company_transactions=Count("companykhaznatransaction"),
+        total_station_transactions=Count("stationkhaznatransaction"),
+    )
+
+    return {
+        "users": users,
+        "geo": {
+            "total_countries": Country.objects.count(),
+            "total_cities": City.objects.count(),
+            "total_districts": District.objects.count(),
+        },
+        "companies": {
+            **companies,
+            "total_cars": Car.objects.count(),
+            "total_drivers": Driver.objects.count(),
+            **cash_requests,
+            **operations,
+        },
+        "company_branches": {
+            "total_branches": CompanyBranch.objects.count(),
+        },
+        "stations": {
+            "total_stations": Station.objects.count(),
+        },
+        "station_branches": {
+            "total_branches": StationBranch.objects.count(),
+        },
+        "transactions": transactions,
+        "services": {
+            "total_services": Service.objects.count(),
+        },
+    }
+
+
+def refresh_statistics():
+    data = collect_statistics()
+    cache.set(
+        STATISTICS_CACHE_KEY,
+        {"data": data, "fresh_until": time.time() + STATISTICS_FRESH_FOR},
+        timeout=STATISTICS_STALE_FOR,
+    )
+    return data
+
+
+def get_statistics():
+    cached = cache.get(STATISTICS_CACHE_KEY)
+    if cached is not None and cached["fresh_until"] > time.time():
+        return cached["data"]
+    if cache.add(STATISTICS_LOCK_KEY, 1, timeout=STATISTICS_LOCK_TIMEOUT):
+        try:
+            return refresh_statistics()
+        finally:
+            cache.delete(STATISTICS_LOCK_KEY)
+    if cached is not None:
+        return cached["data"]
+    # cold cache and another request is already computing it
+    deadline = time.monotonic() + STATISTICS_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(0.1)
+        cached = cache.get(STATISTICS_CACHE_KEY)
+        if cached is not None:
+            return cached["data"]
+    return collect_statistics()
@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from configrations.statistics import refresh_statistics
+
+
+@shared_task(ignore_result=True)
+def refresh_admin_statistics():
+    refresh_statistics()
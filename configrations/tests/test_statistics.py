@@ -0,0 +1,44 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.users.models import User
+from configrations.statistics import STATISTICS_LOCK_KEY
+
+
+@pytest.mark.django_db
+class TestStatistics:
+    def setup_method(self):
+        cache.clear()
+        self.admin = User.objects.create(
+            role=User.UserRoles.Admin,
+            email="admin@test.com",
+            name="Admin",
+            phone_number="1111111111",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_one_query_per_table_then_cached(self, django_assert_num_queries):
+        with django_assert_num_queries(14):
+            response = self.client.get(reverse("statistics"))
+
+        assert response.status_code == 200
+        assert response.data["users"]["admin_users"] == 1
+        assert response.data["transactions"]["total_company_transactions"] == 0
+
+        with django_assert_num_queries(0):
+            assert self.client.get(reverse("statistics")).data == response.data
+
+    def test_waits_for_the_request_holding_the_lock(self, django_assert_num_queries):
+        self.client.get(reverse("statistics"))
+        cache.add(STATISTICS_LOCK_KEY, 1)
+        cached = cache.get("admin_statistics")
+        cache.set("admin_statistics", {**cached, "fresh_until": 0})
+
+        # stale value served while another request recomputes it
+        with django_assert_num_queries(0):
+            response = self.client.get(reverse("statistics"))
+
+        assert response.data["users"]["total_users"] == 1
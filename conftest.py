@@ -1,4 +1,5 @@
 import pytest
+from django.core.cache import cache
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import AccessToken
 from apps.geo.models import City, Country, District
@@ -9,6 +10,13 @@ pytest_plugins = [
     "apps.stations.tests.conftest",
 ]
 
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # ids repeat across tests, keep cached scopes and statistics per test
+    cache.clear()
+
+
 @pytest.fixture
 def api_client():
     return APIClient()